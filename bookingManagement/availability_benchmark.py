@@ -0,0 +1,146 @@
+""" Compare the old SQL availability lookups with the interval index.
+
+Run from the project root:
+    python -m bookingManagement.availability_benchmark --bookings 100000 --rooms 200 --queries 500
+A throwaway database is built in a temporary directory; hotel_management.db is never touched.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from bookingManagement.availability_index import AvailabilityIndex
+from util.database import open_connection
+
+#   The queries BookingManagement ran on every date/time change before the index existed
+LEGACY_NIGHTLY_SQL = """
+    SELECT r.id, r.room_number
+    FROM Rooms r
+    WHERE r.id NOT IN (
+        SELECT b.room_id
+        FROM Bookings b
+        WHERE (
+            (b.check_in_date <= ? AND b.check_out_date >= ?)
+            AND NOT (
+                b.check_out_date = ? AND TIME(b.check_out_time) <= TIME(?)
+            )
+        )
+    )
+"""
+
+LEGACY_CONFLICT_SQL = """
+    SELECT id FROM Bookings
+    WHERE room_id = ?
+    AND check_in_date <= ?
+    AND check_out_date >= ?
+    AND id != ?
+"""
+
+SCHEMA = """
+    CREATE TABLE Rooms (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        room_number TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE Bookings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        room_id INTEGER NOT NULL,
+        check_in_date TEXT NOT NULL,
+        check_out_date TEXT NOT NULL,
+        check_in_time TEXT DEFAULT '12:00',
+        check_out_time TEXT DEFAULT '10:00',
+        price_type TEXT NOT NULL,
+        status TEXT DEFAULT 'Pending'
+    );
+    CREATE UNIQUE INDEX idx_unique_room_booking ON Bookings (room_id, check_in_date) WHERE price_type != '3 Hour';
+    CREATE INDEX idx_room_booking_time ON Bookings (room_id, check_in_date, check_in_time, check_out_time) WHERE price_type = '3 Hour';
+"""
+
+FIRST_DAY = date(2020, 1, 1)
+
+
+def build_database(path, bookings, rooms, seed=7):
+    """ Fill a fresh database with back-to-back, non-overlapping stays spread over all rooms """
+    rng = random.Random(seed)
+    conn = open_connection(path)
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO Rooms (room_number) VALUES (?)", [(f"R{n:04d}",) for n in range(1, rooms + 1)])
+
+    rows = []
+    per_room = bookings // rooms + 1
+    for room_id in range(1, rooms + 1):
+        day = FIRST_DAY + timedelta(days=rng.randint(0, 3))
+        for _ in range(per_room):
+            if len(rows) >= bookings:
+                break
+            nights = rng.randint(1, 4)
+            rows.append((room_id, day.isoformat(), (day + timedelta(days=nights)).isoformat(), "Normal"))
+            day += timedelta(days=nights + rng.randint(0, 2))
+
+    conn.executemany(
+        "INSERT INTO Bookings (room_id, check_in_date, check_out_date, price_type) VALUES (?, ?, ?, ?)", rows
+    )
+    conn.commit()
+    last_day = max(date.fromisoformat(row[2]) for row in rows)
+    return conn, (last_day - FIRST_DAY).days
+
+
+def time_it(function, requests):
+    start = time.perf_counter()
+    for request in requests:
+        function(*request)
+    return (time.perf_counter() - start) / len(requests) * 1000
+
+
+def run(bookings, rooms, queries):
+    with tempfile.TemporaryDirectory() as directory:
+        conn, days = build_database(os.path.join(directory, "availability.db"), bookings, rooms)
+        rng = random.Random(11)
+        stays = []
+        for _ in range(queries):
+            check_in = FIRST_DAY + timedelta(days=rng.randint(0, days))
+            check_out = check_in + timedelta(days=rng.randint(1, 5))
+            stays.append((check_in.isoformat(), check_out.isoformat()))
+
+        start = time.perf_counter()
+        index = AvailabilityIndex()
+        index.load(conn)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        def legacy_free_rooms(check_in, check_out):
+            conn.execute(LEGACY_NIGHTLY_SQL, (check_in, check_in, check_in, "12:00")).fetchall()
+
+        def index_free_rooms(check_in, check_out):
+            index.free_rooms(check_in, "12:00", check_out, "10:00")
+
+        def legacy_conflict(room_id, check_in, check_out):
+            conn.execute(LEGACY_CONFLICT_SQL, (room_id, check_out, check_in, -1)).fetchone()
+
+        def index_conflict(room_id, check_in, check_out):
+            index.find_conflict(room_id, check_in, "12:00", check_out, "10:00")
+
+        conflict_requests = [(rng.randint(1, rooms), check_in, check_out) for check_in, check_out in stays]
+        results = [
+            ("free rooms", time_it(legacy_free_rooms, stays), time_it(index_free_rooms, stays)),
+            ("conflict check", time_it(legacy_conflict, conflict_requests), time_it(index_conflict, conflict_requests)),
+        ]
+        conn.close()
+
+    print(f"📅 {bookings} bookings, {rooms} rooms, {queries} queries (index built in {build_ms:.1f} ms)")
+    print(f"   {'lookup':<16}{'SQL (ms)':>12}{'index (ms)':>12}{'speed-up':>10}")
+    for name, legacy_ms, index_ms in results:
+        print(f"   {name:<16}{legacy_ms:>12.3f}{index_ms:>12.3f}{legacy_ms / index_ms:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark room availability lookups")
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    run(args.bookings, args.rooms, args.queries)
+
+
+if __name__ == "__main__":
+    main()
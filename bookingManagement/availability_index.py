@@ -0,0 +1,197 @@
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date
+from itertools import accumulate
+
+from util.database import get_connection
+
+DEFAULT_CHECK_IN_TIME = "12:00"
+DEFAULT_CHECK_OUT_TIME = "10:00"
+
+
+def to_minutes(date_text, time_text, default_time):
+    """ Convert 'yyyy-MM-dd' + 'HH:mm' into minutes on a single timeline """
+    time_text = time_text or default_time
+    hours, minutes = int(time_text[0:2]), int(time_text[3:5])
+    return date.fromisoformat(date_text[:10]).toordinal() * 1440 + hours * 60 + minutes
+
+
+def booking_interval(check_in_date, check_in_time, check_out_date, check_out_time):
+    """ Half-open [start, end) interval in minutes covered by a booking (nightly or 3 hour) """
+    start = to_minutes(check_in_date, check_in_time, DEFAULT_CHECK_IN_TIME)
+    end = to_minutes(check_out_date, check_out_time, DEFAULT_CHECK_OUT_TIME)
+    return start, max(end, start + 1)  # Inverted/empty stays still block their start minute
+
+
+class RoomIntervals:
+    """ Bookings of one room kept sorted by start, with a prefix maximum of end times.
+
+    Overlap test for [start, end): take the last interval starting before `end`
+    (binary search); a conflict exists iff the largest end among it and every earlier
+    interval is after `start`. That is O(log n) even if legacy data already overlaps.
+    """
+
+    __slots__ = ("starts", "ends", "ids", "max_ends")
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.ids = []
+        self.max_ends = None  # Rebuilt lazily after a change
+
+    def add(self, start, end, booking_id):
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, booking_id)
+        self.max_ends = None
+
+    def remove(self, start, booking_id):
+        i = bisect_left(self.starts, start)
+        while i < len(self.starts) and self.starts[i] == start:
+            if self.ids[i] == booking_id:
+                del self.starts[i], self.ends[i], self.ids[i]
+                self.max_ends = None
+                return True
+            i += 1
+        return False
+
+    def find_overlap(self, start, end, ignore_id=None):
+        """ Return the id of a booking overlapping [start, end), or None """
+        i = bisect_left(self.starts, end) - 1
+        if i < 0:
+            return None
+
+        if self.max_ends is None:
+            self.max_ends = list(accumulate(self.ends, max))
+        if self.max_ends[i] <= start:
+            return None
+
+        #   A conflict exists; walk back to name one (skipping the booking being edited)
+        while i >= 0 and self.max_ends[i] > start:
+            if self.ends[i] > start and self.ids[i] != ignore_id:
+                return self.ids[i]
+            i -= 1
+        return None
+
+
+class AvailabilityIndex:
+    """ In-memory interval index over Bookings answering availability and conflict queries """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.rooms = {}         # room_id -> room_number (in Rooms id order)
+        self.intervals = {}     # room_id -> RoomIntervals
+        self.bookings = {}      # booking_id -> (room_id, start, end)
+        self.data_versions = {} # id(connection) -> PRAGMA data_version when last synced
+
+    def load(self, conn):
+        """ (Re)build the index from Rooms and every non-cancelled booking """
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, room_number FROM Rooms ORDER BY id")
+        rooms = cursor.fetchall()
+        cursor.execute("""
+            SELECT id, room_id, check_in_date, check_in_time, check_out_date, check_out_time
+            FROM Bookings
+            WHERE status IS NULL OR status != 'Cancelled'
+        """)
+        bookings = cursor.fetchall()
+
+        with self.lock:
+            self.rooms = dict(rooms)
+            self.intervals = {room_id: RoomIntervals() for room_id in self.rooms}
+            self.bookings = {}
+            for booking_id, room_id, check_in_date, check_in_time, check_out_date, check_out_time in bookings:
+                self.add_booking(booking_id, room_id, check_in_date, check_in_time, check_out_date, check_out_time)
+            self.data_versions[id(conn)] = conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def sync(self, conn):
+        """ Reload if another connection (e.g. another terminal) committed since the last sync """
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        with self.lock:
+            if self.data_versions.get(id(conn)) == version:
+                return False
+        self.load(conn)
+        return True
+
+    #   Keeping the index in step with writes to Bookings / Rooms
+    def add_booking(self, booking_id, room_id, check_in_date, check_in_time, check_out_date, check_out_time):
+        start, end = booking_interval(check_in_date, check_in_time, check_out_date, check_out_time)
+        with self.lock:
+            self.remove_booking(booking_id)
+            self.intervals.setdefault(room_id, RoomIntervals()).add(start, end, booking_id)
+            self.bookings[booking_id] = (room_id, start, end)
+
+    def remove_booking(self, booking_id):
+        with self.lock:
+            entry = self.bookings.pop(booking_id, None)
+            if entry:
+                room_id, start, _ = entry
+                self.intervals[room_id].remove(start, booking_id)
+
+    def update_booking(self, booking_id, room_id, check_in_date, check_in_time, check_out_date, check_out_time):
+        """ Move an indexed booking to its new room/dates (cancelled bookings stay out) """
+        with self.lock:
+            if booking_id in self.bookings:
+                self.add_booking(booking_id, room_id, check_in_date, check_in_time, check_out_date, check_out_time)
+
+    def set_room(self, room_id, room_number):
+        with self.lock:
+            self.rooms[room_id] = room_number
+            self.intervals.setdefault(room_id, RoomIntervals())
+
+    #   Queries
+    def find_conflict(self, room_id, check_in_date, check_in_time, check_out_date, check_out_time, ignore_booking_id=None):
+        """ Id of an existing booking that overlaps the requested stay in this room, or None """
+        start, end = booking_interval(check_in_date, check_in_time, check_out_date, check_out_time)
+        with self.lock:
+            intervals = self.intervals.get(room_id)
+            return intervals.find_overlap(start, end, ignore_booking_id) if intervals else None
+
+    def free_rooms(self, check_in_date, check_in_time, check_out_date, check_out_time,
+                   include_room=None, ignore_booking_id=None):
+        """ [(room_id, room_number)] with no booking overlapping the requested stay """
+        start, end = booking_interval(check_in_date, check_in_time, check_out_date, check_out_time)
+        with self.lock:
+            return [
+                (room_id, room_number)
+                for room_id, room_number in self.rooms.items()
+                if room_id == include_room
+                or self.intervals[room_id].find_overlap(start, end, ignore_booking_id) is None
+            ]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_availability_index():
+    """ Shared index, built from the database on first use """
+    global _index
+    with _index_lock:
+        if _index is None:
+            index = AvailabilityIndex()
+            index.load(get_connection())
+            _index = index
+        return _index
+
+
+def lock_and_find_conflict(conn, room_id, check_in_date, check_in_time, check_out_date, check_out_time,
+                           ignore_booking_id=None):
+    """ Start the write transaction, bring the shared index up to date and look for an overlapping booking.
+
+    The write lock is held until the caller commits (or rolls back), so no other terminal
+    can book the room between this check and the INSERT/UPDATE that follows it.
+    """
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    index = get_availability_index()
+    index.sync(conn)  #   Another connection may have committed since this page last refreshed
+    return index.find_conflict(room_id, check_in_date, check_in_time, check_out_date, check_out_time, ignore_booking_id)
+
+
+def invalidate_availability_index():
+    """ Forget the shared index (e.g. after rooms are added or deleted); rebuilt on next use """
+    global _index
+    with _index_lock:
+        _index = None
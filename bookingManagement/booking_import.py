@@ -0,0 +1,390 @@
+""" Bulk booking import (and export) for group reservations and channel-manager feeds.
+
+add_booking() looks a room's price up with one or more SELECTs per booking and inserts
+one row per form submit. Here a whole file is checked in memory instead:
+
+- every room is read with one query (ids, numbers and prices);
+- guests are matched by id, or by name + contact in IN (...) chunks, and missing
+  guests are created;
+- each stay is checked against the availability index and against the stays accepted
+  earlier in the same file;
+- the accepted rows are written with executemany() inside one BEGIN IMMEDIATE
+  transaction, so another terminal cannot book a room between the check and the insert.
+
+Rows that fail are reported with their line number and skipped (or, with strict=True,
+nothing is written). Columns (CSV header or JSON keys; blank means "not given"):
+    guest_id | guest_name, contact, email
+    room_id | room_number
+    check_in_date, check_out_date, check_in_time, check_out_time
+    price_type (Normal, Low Season, High Season, 3 Hour; default Normal)
+    price (the stay's price as agreed, like the form's custom price; blank computes it from
+           price_type and the room, so an exported file imports with its prices unchanged)
+
+    python -m bookingManagement.booking_import group.csv --dry-run
+    python -m bookingManagement.booking_import feed.json --problems problems.csv
+    python -m bookingManagement.booking_import --export bookings.csv --from 2025-01-01 --to 2025-12-31
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+
+from bookingManagement.availability_index import (
+    DEFAULT_CHECK_IN_TIME, DEFAULT_CHECK_OUT_TIME, RoomIntervals, booking_interval, get_availability_index
+)
+from util.database import begin_immediate, get_connection, release_connection
+
+FIELDS = (
+    "guest_id", "guest_name", "contact", "email", "room_id", "room_number",
+    "check_in_date", "check_out_date", "check_in_time", "check_out_time", "price_type", "price",
+)
+
+#   Same rules as BookingManagement.add_booking
+PRICE_FACTORS = {"Normal": 1.0, "Low Season": 0.9, "High Season": 1.1}
+PRICE_TYPES = (*PRICE_FACTORS, "3 Hour")
+
+#   Guest lookups larger than this are read in several IN (...) chunks
+GUEST_CHUNK = 500
+
+#   Rows per fetchmany() batch when exporting
+EXPORT_BATCH = 1000
+
+
+class ImportResult:
+    """ Outcome of one import: the new booking and guest ids, and (line, message) per rejected row """
+
+    def __init__(self):
+        self.booking_ids = []
+        self.guest_ids = []
+        self.problems = []
+
+    def summary(self):
+        return (f"{len(self.booking_ids)} bookings imported, {len(self.guest_ids)} new guests, "
+                f"{len(self.problems)} rows rejected")
+
+
+def read_rows(path):
+    """ [(line, {field: text})] from a .json file (a list, or {"bookings": [...]}) or a CSV file with a header """
+    if os.path.splitext(path)[1].lower() == ".json":
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        if isinstance(data, dict):
+            data = data.get("bookings", [])
+        return [(number, {key: "" if value is None else str(value) for key, value in item.items()})
+                for number, item in enumerate(data, start=1)]
+
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        #   Line 1 is the header
+        return [(number, row) for number, row in enumerate(csv.DictReader(file), start=2)]
+
+
+def clean(row, field):
+    return (row.get(field) or "").strip()
+
+
+def parse_time(text, default):
+    """ 'HH:mm' (also accepts 'H:mm' / 'HH:mm:ss'); raises ValueError """
+    if not text:
+        return default
+    return datetime.strptime(text[:5] if len(text) > 5 else text, "%H:%M").strftime("%H:%M")
+
+
+def load_rooms(conn):
+    """ One query: {room_id: (base_price, three_hour_price)} and {room number: room_id} """
+    prices, numbers = {}, {}
+    for room_id, room_number, base_price, three_hour_price in conn.execute(
+        "SELECT id, TRIM(room_number), base_price, three_hour_price FROM Rooms"
+    ):
+        prices[room_id] = (base_price, three_hour_price)
+        numbers[room_number] = room_id
+    return prices, numbers
+
+
+def find_guests(conn, rows):
+    """ Existing guest ids among the given ids, and {(name, contact): id} for the named guests """
+    given_ids = {int(clean(row, "guest_id")) for _, row in rows if clean(row, "guest_id").isdigit()}
+    names = list({clean(row, "guest_name") for _, row in rows if not clean(row, "guest_id") and clean(row, "guest_name")})
+
+    known_ids = set()
+    given_ids = list(given_ids)
+    for start in range(0, len(given_ids), GUEST_CHUNK):
+        chunk = given_ids[start:start + GUEST_CHUNK]
+        known_ids.update(guest_id for guest_id, in conn.execute(
+            f"SELECT id FROM Guests WHERE id IN ({','.join('?' * len(chunk))})", chunk
+        ))
+
+    named = {}
+    for start in range(0, len(names), GUEST_CHUNK):
+        chunk = names[start:start + GUEST_CHUNK]
+        for guest_id, name, contact in conn.execute(
+            f"SELECT id, name, contact FROM Guests WHERE name IN ({','.join('?' * len(chunk))}) ORDER BY id", chunk
+        ):
+            named.setdefault((name, contact.strip()), guest_id)  #   Oldest record wins on duplicates
+    return known_ids, named
+
+
+def validate_row(row, rooms, room_numbers, known_guest_ids):
+    """ (guest key, booking values) for one row; raises ValueError with the reason it is rejected
+
+    The guest key is an existing guest id, or (name, contact, email) for a guest to
+    match or create. Booking values follow the Bookings INSERT column order, without
+    guest_id.
+    """
+    guest_id = clean(row, "guest_id")
+    if guest_id:
+        if not guest_id.isdigit() or int(guest_id) not in known_guest_ids:
+            raise ValueError(f"unknown guest_id {guest_id}")
+        guest = int(guest_id)
+    else:
+        name, contact = clean(row, "guest_name"), clean(row, "contact")
+        if not name or not contact:
+            raise ValueError("guest_id, or guest_name and contact, is required")
+        guest = (name, contact, clean(row, "email") or None)
+
+    room_id, room_number = clean(row, "room_id"), clean(row, "room_number")
+    if room_id:
+        if not room_id.isdigit() or int(room_id) not in rooms:
+            raise ValueError(f"unknown room_id {room_id}")
+        room_id = int(room_id)
+    elif room_number:
+        if room_number not in room_numbers:
+            raise ValueError(f"unknown room_number {room_number}")
+        room_id = room_numbers[room_number]
+    else:
+        raise ValueError("room_id or room_number is required")
+
+    price_type = clean(row, "price_type") or "Normal"
+    if price_type not in PRICE_TYPES:
+        raise ValueError(f"price_type must be one of {', '.join(PRICE_TYPES)}")
+
+    try:
+        check_in_date = date.fromisoformat(clean(row, "check_in_date")).isoformat()
+        check_out_date = date.fromisoformat(clean(row, "check_out_date")).isoformat()
+    except ValueError:
+        raise ValueError("check_in_date and check_out_date must be YYYY-MM-DD") from None
+    try:
+        check_in_time = parse_time(clean(row, "check_in_time"), DEFAULT_CHECK_IN_TIME)
+        if price_type == "3 Hour" and not clean(row, "check_out_time"):
+            #   Like the form: check-out 3 hours after check-in
+            check_out_time = (datetime.strptime(check_in_time, "%H:%M") + timedelta(hours=3)).strftime("%H:%M")
+        else:
+            check_out_time = parse_time(clean(row, "check_out_time"), DEFAULT_CHECK_OUT_TIME)
+    except ValueError:
+        raise ValueError("check_in_time and check_out_time must be HH:mm") from None
+
+    start, end = booking_interval(check_in_date, check_in_time, check_out_date, check_out_time)
+    if end <= start or (price_type != "3 Hour" and check_out_date <= check_in_date):
+        raise ValueError("check-out must be after check-in")
+
+    base_price, three_hour_price = rooms[room_id]
+    price = clean(row, "price")
+    if price:
+        try:
+            calculated_price = float(price)
+        except ValueError:
+            raise ValueError(f"price {price} is not a number") from None
+        if not math.isfinite(calculated_price) or calculated_price < 0:
+            raise ValueError(f"price {price} must be zero or more")
+    elif price_type != "3 Hour":
+        calculated_price = base_price * PRICE_FACTORS[price_type]
+    elif three_hour_price is not None:
+        calculated_price = three_hour_price
+    else:
+        raise ValueError("room has no 3 Hour price; give one in the price column")
+
+    return guest, (room_id, check_in_date, check_out_date, check_in_time, check_out_time, price_type, calculated_price)
+
+
+def find_taken_check_ins(conn, bookings):
+    """ {(room_id, check_in_date): (booking id, status)} of existing non-3-Hour bookings clashing with
+    idx_unique_room_booking (cancelled ones included), one query per room in the file """
+    check_ins = {}
+    for room_id, check_in_date, _, _, _, price_type, _ in bookings:
+        if price_type != "3 Hour":
+            check_ins.setdefault(room_id, set()).add(check_in_date)
+
+    taken = {}
+    for room_id, days in check_ins.items():
+        for booking_id, check_in_date, status in conn.execute("""
+            SELECT id, check_in_date, status FROM Bookings
+            WHERE room_id = ? AND check_in_date BETWEEN ? AND ? AND price_type != '3 Hour'
+        """, (room_id, min(days), max(days))):
+            if check_in_date in days:
+                taken[(room_id, check_in_date)] = (booking_id, status or "Pending")
+    return taken
+
+
+def insert_many(conn, sql, rows):
+    """ executemany() and return the new ids (consecutive: the transaction holds the write lock) """
+    conn.executemany(sql, rows)
+    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    return list(range(last_id - len(rows) + 1, last_id + 1))
+
+
+def import_bookings(conn, rows, dry_run=False, strict=False):
+    """ Validate and insert [(line, row)] in one transaction; returns an ImportResult.
+
+    Rejected rows are skipped, unless `strict` is set, in which case nothing is written
+    if any row is rejected. `dry_run` validates without writing. The availability index
+    is updated with the new bookings after the commit. `conn` must not be in a transaction
+    (sqlite3.ProgrammingError): the import commits or rolls back one of its own.
+    """
+    result = ImportResult()
+    index = get_availability_index()
+    begin_immediate(conn)  #   No booking can slip in between the checks and the inserts
+    try:
+        index.sync(conn)
+        rooms, room_numbers = load_rooms(conn)
+        known_guest_ids, named_guests = find_guests(conn, rows)
+
+        valid = []
+        for line, row in rows:
+            try:
+                valid.append((line, *validate_row(row, rooms, room_numbers, known_guest_ids)))
+            except ValueError as e:
+                result.problems.append((line, str(e)))
+        taken_check_ins = find_taken_check_ins(conn, [booking for _, _, booking in valid])
+
+        accepted = []
+        batch_intervals = {}  #   room_id -> RoomIntervals of the rows accepted so far
+        for line, guest, booking in valid:
+            room_id, check_in_date, check_out_date, check_in_time, check_out_time, price_type = booking[:6]
+            taken = taken_check_ins.get((room_id, check_in_date)) if price_type != "3 Hour" else None
+            if taken is not None:
+                #   Cancelled stays are not in the index but still hold idx_unique_room_booking
+                result.problems.append((line, f"room already has booking #{taken[0]} ({taken[1]}) checking in that day"))
+                continue
+            conflict_id = index.find_conflict(room_id, check_in_date, check_in_time, check_out_date, check_out_time)
+            if conflict_id is not None:
+                result.problems.append((line, f"room is already booked (booking #{conflict_id})"))
+                continue
+            start, end = booking_interval(check_in_date, check_in_time, check_out_date, check_out_time)
+            intervals = batch_intervals.setdefault(room_id, RoomIntervals())
+            conflict_line = intervals.find_overlap(start, end)
+            if conflict_line is not None:
+                result.problems.append((line, f"overlaps line {conflict_line} of this file"))
+                continue
+            intervals.add(start, end, line)
+            accepted.append((guest, booking))
+
+        if dry_run or (strict and result.problems) or not accepted:
+            conn.rollback()
+            return result
+
+        #   Guests to create: one per (name, contact) not found in the database
+        new_guests = {}
+        for guest, _ in accepted:
+            if isinstance(guest, tuple) and guest[:2] not in named_guests:
+                new_guests.setdefault(guest[:2], guest)
+        if new_guests:
+            result.guest_ids = insert_many(
+                conn, "INSERT INTO Guests (name, contact, email) VALUES (?, ?, ?)", list(new_guests.values())
+            )
+            named_guests.update(zip(new_guests, result.guest_ids))
+
+        result.booking_ids = insert_many(conn, """
+            INSERT INTO Bookings (guest_id, room_id, check_in_date, check_out_date, check_in_time, check_out_time,
+                                  price_type, calculated_price, payment_status, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'PENDING', 'BOOKING')
+        """, [
+            (guest if isinstance(guest, int) else named_guests[guest[:2]], *booking)
+            for guest, booking in accepted
+        ])
+    except BaseException:
+        conn.rollback()
+        result.booking_ids, result.guest_ids = [], []
+        raise
+    conn.commit()
+
+    for booking_id, (_, booking) in zip(result.booking_ids, accepted):
+        room_id, check_in_date, check_out_date, check_in_time, check_out_time = booking[:5]
+        index.add_booking(booking_id, room_id, check_in_date, check_in_time, check_out_date, check_out_time)
+    return result
+
+
+def import_file(conn, path, dry_run=False, strict=False):
+    return import_bookings(conn, read_rows(path), dry_run, strict)
+
+
+def write_problems(path, problems):
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["line", "problem"])
+        writer.writerows(problems)
+
+
+def export_bookings(conn, path, from_date, to_date):
+    """ Write the non-cancelled bookings checking in from_date..to_date in the import format; returns the count """
+    cursor = conn.execute("""
+        SELECT b.guest_id, g.name, g.contact, g.email, b.room_id, TRIM(r.room_number),
+            b.check_in_date, b.check_out_date, b.check_in_time, b.check_out_time, b.price_type, b.calculated_price
+        FROM Bookings b
+        JOIN Guests g ON g.id = b.guest_id
+        JOIN Rooms r ON r.id = b.room_id
+        WHERE b.check_in_date BETWEEN ? AND ? AND (b.status IS NULL OR b.status != 'Cancelled')
+        ORDER BY b.check_in_date, b.id
+    """, (from_date, to_date))
+
+    total = 0
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDS)
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH)
+            if not rows:
+                return total
+            writer.writerows(rows)
+            total += len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import bookings from CSV/JSON, or export them in the same format")
+    parser.add_argument("file", nargs="?", help="CSV or JSON file to import")
+    parser.add_argument("--dry-run", action="store_true", help="Check every row but write nothing")
+    parser.add_argument("--strict", action="store_true", help="Write nothing if any row is rejected")
+    parser.add_argument("--problems", help="Write rejected rows (line, problem) to this CSV file")
+    parser.add_argument("--export", help="Export bookings to this CSV file instead of importing")
+    parser.add_argument("--from", dest="from_date", help="First check-in day to export (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="to_date", help="Last check-in day to export (YYYY-MM-DD)")
+    args = parser.parse_args()
+    if bool(args.file) == bool(args.export):
+        parser.error("give a file to import, or --export FILE --from ... --to ...")
+    if args.export and not (args.from_date and args.to_date):
+        parser.error("--export needs --from and --to")
+
+    start = time.perf_counter()
+    conn = get_connection()
+    try:
+        if args.export:
+            total = export_bookings(conn, args.export, args.from_date, args.to_date)
+            print(f"  Exported {total} bookings to {args.export} in {time.perf_counter() - start:.2f} s")
+            return 0
+
+        result = import_file(conn, args.file, args.dry_run, args.strict)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        release_connection(conn)
+
+    for line, problem in result.problems[:20]:
+        print(f"❌ line {line}: {problem}")
+    if len(result.problems) > 20:
+        print(f"   ... and {len(result.problems) - 20} more")
+    if args.problems:
+        write_problems(args.problems, result.problems)
+    if args.dry_run:
+        print(f"  Dry run: {len(result.problems)} rows rejected, nothing written")
+    elif args.strict and result.problems:
+        print("  Nothing imported (--strict)")
+    else:
+        print(f"  {result.summary()} in {time.perf_counter() - start:.2f} s")
+    return 1 if result.problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,20 +1,63 @@
 
 from PyQt6.QtWidgets import (
-    QWidget, QLabel, QVBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
-    QHBoxLayout, QLineEdit, QComboBox, QMessageBox, QDateEdit, QTimeEdit,QFrame
+    QWidget, QLabel, QVBoxLayout, QPushButton, QTableView, QAbstractItemView,
+    QHBoxLayout, QLineEdit, QComboBox, QMessageBox, QDateEdit, QTimeEdit,QFrame, QFileDialog
 )
 from PyQt6.QtGui import QIcon
-from PyQt6.QtCore import Qt, QDate, QTime, QTimer
+from PyQt6.QtCore import Qt, QDate, QTime, QTimer, QThreadPool
 import sqlite3
+from util.database import get_connection, release_connection
 
+from bookingManagement.availability_index import get_availability_index, lock_and_find_conflict
+from bookingManagement.booking_import import import_file
+from bookingManagement.booking_table_model import BookingTableModel, ACTIONS_COLUMN
+from util.action_delegate import ActionButtonDelegate
 from util.custom_btn import CustomButton
 from util.custom_input import CustomInput
+from util.event_bus import DirtySet, get_event_bus
+from util.search import SEARCH_DEBOUNCE_MS
+from util.worker import Worker
 from PyQt6.QtGui import QPixmap
 import os
 
+#   Quiet period after the last date/time change before rooms are looked up again
+AVAILABILITY_DEBOUNCE_MS = 250
+
+
+def lookup_free_rooms(generation, stay, ignore_booking_id):
+    """ Runs on a worker thread: rooms free for (check_in_date, check_in_time, check_out_date, check_out_time) """
+    return generation, get_availability_index().free_rooms(*stay, ignore_booking_id=ignore_booking_id)
+
+
+def import_booking_file(path):
+    """ Runs on a worker thread: bulk import (see bookingManagement.booking_import) """
+    conn = get_connection()
+    try:
+        return import_file(conn, path)
+    finally:
+        release_connection(conn)
+
+
 class BookingManagement(QWidget):
     def __init__(self):
         super().__init__()
+        self.editing_booking_id = None  #   Booking being edited (its own stay never blocks its room)
+        self.availability_generation = 0  #   Bumped per lookup; older results are dropped
+
+        self.availability_timer = QTimer(self)
+        self.availability_timer.setSingleShot(True)
+        self.availability_timer.setInterval(AVAILABILITY_DEBOUNCE_MS)
+        self.availability_timer.timeout.connect(self.filter_available_rooms)
+
+        #   Typing restarts the timer; the list reloads once the user pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.load_bookings)
+
+        #   Guests and rooms feed the dropdowns and the names/numbers shown in the list
+        self.dirty = DirtySet(["guests", "rooms", "bookings"], self)
+
         self.initUI()
 
     def initUI(self):
@@ -29,9 +72,35 @@ class BookingManagement(QWidget):
         table_title.setStyleSheet("font-size: 16px; font-weight: bold; margin-bottom: 10px;")
         table_layout.addWidget(table_title)
 
-        self.booking_table = QTableWidget()
-        self.booking_table.setColumnCount(6)
-        self.booking_table.setHorizontalHeaderLabels(["ID", "Guest", "Room", "Check-in", "Check-out", "Status"])
+        #   Search Input
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search by Guest, Room, or Booking ID")
+        self.search_input.textChanged.connect(self.schedule_search)
+        table_layout.addWidget(self.search_input)
+
+        #   Model/view table: rows are fetched page by page while scrolling
+        self.booking_model = BookingTableModel()
+        self.booking_table = QTableView()
+        self.booking_table.setModel(self.booking_model)
+        self.booking_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.booking_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.booking_table.verticalHeader().setDefaultSectionSize(34)
+
+        #   Set Column Widths
+        column_widths = [50, 120, 50, 100, 70, 100, 70, 100, 100, 100, 140]
+        for i, width in enumerate(column_widths):
+            self.booking_table.setColumnWidth(i, width)
+        self.booking_table.horizontalHeader().setStretchLastSection(True)
+
+        #   Action icons are painted by one delegate instead of four buttons per row
+        self.action_delegate = ActionButtonDelegate([
+            ("edit", "icons/ic_edit.png", None),
+            ("delete", "icons/ic_delete.png", None),
+            ("check_in", "icons/ic_in.png", None),
+            ("check_out", "icons/ic_out.png", lambda row: self.booking_model.status(row) == "CHECKED-IN"),
+        ], parent=self.booking_table)
+        self.action_delegate.action_triggered.connect(self.handle_booking_action)
+        self.booking_table.setItemDelegateForColumn(ACTIONS_COLUMN, self.action_delegate)
         table_layout.addWidget(self.booking_table)
 
         #   Right Section (Add/Edit Booking Form)
@@ -158,12 +227,12 @@ class BookingManagement(QWidget):
 
        
 
-        # Connect signals to dynamically update available rooms
-        self.check_in_date.dateChanged.connect(self.filter_available_rooms)
-        self.check_out_date.dateChanged.connect(self.filter_available_rooms)
-        self.check_in_time.timeChanged.connect(self.filter_available_rooms)
-        self.check_out_time.timeChanged.connect(self.filter_available_rooms)
-        self.price_type_dropdown.currentIndexChanged.connect(self.filter_available_rooms)
+        # Connect signals to dynamically update available rooms (coalesced by the debounce timer)
+        self.check_in_date.dateChanged.connect(self.schedule_room_refresh)
+        self.check_out_date.dateChanged.connect(self.schedule_room_refresh)
+        self.check_in_time.timeChanged.connect(self.schedule_room_refresh)
+        self.check_out_time.timeChanged.connect(self.schedule_room_refresh)
+        self.price_type_dropdown.currentIndexChanged.connect(self.schedule_room_refresh)
 
 
         #   Add Booking & Cancel Booking Buttons
@@ -175,6 +244,11 @@ class BookingManagement(QWidget):
         self.cancel_booking_button.clicked.connect(self.cancel_booking)
         form_layout.addWidget(self.cancel_booking_button)
 
+        #   Group reservations / channel-manager files (CSV or JSON)
+        self.import_button = CustomButton("Import Bookings", "#0277bd", "icons/ic_upload.png", height=30)
+        self.import_button.clicked.connect(self.import_bookings)
+        form_layout.addWidget(self.import_button)
+
         form_layout.addStretch()
 
         #   Combine Layouts (70% Table, 30% Form)
@@ -186,10 +260,28 @@ class BookingManagement(QWidget):
 
 
     def refresh_data(self):
-        """ Refresh the guest and room dropdown lists """
-        self.load_guests()
-        self.load_available_rooms()
+        """ Bring the list and dropdowns up to date with changes made elsewhere, then reset the form """
+        self.apply_changes()
+        self.load_available_rooms()  #   From the in-memory index, no query
         self.reset_form()
+
+    def apply_changes(self):
+        """ Patch only the bookings that changed since the last look; nothing changed means no queries """
+        changes = self.dirty.take()
+        if not changes:
+            return
+        if "bookings" in changes or "rooms" in changes:
+            get_availability_index().sync(get_connection())  #   Pick up bookings made from other terminals
+        if "guests" in changes:
+            self.load_guests()
+
+        if any(ids is None for ids in changes.values()):
+            self.load_bookings()
+            return
+        booking_ids = set(changes.get("bookings", ())) | self.booking_model.loaded_ids(
+            guest_ids=changes.get("guests", ()), room_ids=changes.get("rooms", ())
+        )
+        self.booking_model.patch_rows(booking_ids)
         
     def clear_form(self):
         """ Clears the booking form fields """
@@ -199,102 +291,32 @@ class BookingManagement(QWidget):
         self.check_out_date.setDate(QDate.currentDate().addDays(1))
         self.reset_form()
 
-    def load_bookings(self):
-        """ Load all bookings into the table with Edit & Delete buttons """
-        conn = sqlite3.connect("hotel_management.db")
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT b.id, g.name, r.room_number, 
-                b.check_in_date, 
-                IFNULL(b.check_in_time, '12:00'),  -- Ensure empty times show as "-"
-                b.check_out_date, 
-                IFNULL(b.check_out_time, '10:00'), 
-                IFNULL(bd.calculated_price, 0), 
-                b.price_type, 
-                b.status
-            FROM Bookings b
-            JOIN Guests g ON b.guest_id = g.id
-            JOIN Rooms r ON b.room_id = r.id
-            LEFT JOIN BookingDetails bd ON b.id = bd.booking_id
-            ORDER BY b.check_in_date DESC
-        """)
-
-
+    def schedule_search(self):
+        """ Restart the debounce window; only the last keystroke in a burst reloads the list """
+        self.search_timer.start()
 
+    def load_bookings(self):
+        """ Reload the booking list (filtered by the search text); the view pulls rows from the model as it scrolls """
+        self.booking_model.set_search(self.search_input.text())
 
-        bookings = cursor.fetchall()
-        conn.close()
-
-        self.booking_table.setRowCount(len(bookings))
-        self.booking_table.setColumnCount(11)  # Ensure 11 columns match headers
-        self.booking_table.setHorizontalHeaderLabels([
-            "ID", "Guest", "Room", "Check-in", "In Time", "Check-out", "Out Time", "Price", "Price Type", "Status", "Actions"
-        ])
-
-        #   Set Column Widths
-        column_widths = [50, 120, 50, 100, 70, 100, 70, 100, 100, 100, 140]
-        for i, width in enumerate(column_widths):
-            self.booking_table.setColumnWidth(i, width)
+    def handle_booking_action(self, action, row):
+        """ Dispatch a click on one of the painted action icons """
+        booking_id = self.booking_model.booking_id(row)
+        if booking_id is None:
+            return
 
-        #   Auto-resize remaining columns
-        self.booking_table.horizontalHeader().setStretchLastSection(True)
+        if action == "edit":
+            self.edit_booking(booking_id)
+        elif action == "delete":
+            self.delete_booking(booking_id)
+        elif action == "check_in":
+            self.confirm_checkin(booking_id)
+        elif action == "check_out":
+            self.confirm_checkout(booking_id)
 
-        for row, (booking_id, guest, room, check_in, check_in_time, check_out, check_out_time, total_price, price_type, status) in enumerate(bookings):
-            self.booking_table.setItem(row, 0, QTableWidgetItem(str(booking_id)))
-            self.booking_table.setItem(row, 1, QTableWidgetItem(guest))
-            self.booking_table.setItem(row, 2, QTableWidgetItem(str(room)))
-            self.booking_table.setItem(row, 3, QTableWidgetItem(check_in))
-            self.booking_table.setItem(row, 4, QTableWidgetItem(check_in_time))  #   Fixed "In Time"
-            self.booking_table.setItem(row, 5, QTableWidgetItem(check_out))
-            self.booking_table.setItem(row, 6, QTableWidgetItem(check_out_time))  #   Fixed "Out Time"
-            self.booking_table.setItem(row, 7, QTableWidgetItem(f"${total_price:.2f}"))  #   Fixed Price
-            self.booking_table.setItem(row, 8, QTableWidgetItem(price_type))
-            self.booking_table.setItem(row, 9, QTableWidgetItem(status))
-
-            #   Add Action Buttons (Edit & Delete)
-            action_widget = QWidget()
-            action_layout = QHBoxLayout(action_widget)
-            action_layout.setContentsMargins(0, 0, 0, 0)
-
-            edit_button = QPushButton()
-            edit_button.setIcon(QIcon("icons/ic_edit.png"))
-            edit_button.setFixedSize(30, 30)
-            edit_button.setStyleSheet("border: none;")
-            edit_button.clicked.connect(lambda _, b_id=booking_id: self.edit_booking(b_id))
-            action_layout.addWidget(edit_button)
-
-            delete_button = QPushButton()
-            delete_button.setIcon(QIcon("icons/ic_delete.png"))
-            delete_button.setFixedSize(30, 30)
-            delete_button.setStyleSheet("border: none;")
-            delete_button.clicked.connect(lambda _, b_id=booking_id: self.delete_booking(b_id))
-            action_layout.addWidget(delete_button)
-            
-            # 🔥 **Check In Button**
-            check_in_button = QPushButton()
-            check_in_button.setIcon(QIcon("icons/ic_in.png"))  # Use an appropriate icon
-            check_in_button.setFixedSize(30, 30)
-            check_in_button.setStyleSheet("border: none;")
-            check_in_button.clicked.connect(lambda _, b_id=booking_id: self.confirm_checkin(b_id))
-            # check_in_button.setEnabled(status == "CHECKED-OUT")
-            action_layout.addWidget(check_in_button)
-            
-            #   Check-Out Button (Only enable if Checked-In)
-            check_out_button = QPushButton()
-            check_out_button.setIcon(QIcon("icons/ic_out.png"))  # Use your own icon
-            check_out_button.setFixedSize(30, 30)
-            check_out_button.setStyleSheet("border: none; color: white; border-radius: 5px;")
-            check_out_button.clicked.connect(lambda _, b_id=booking_id: self.confirm_checkout(b_id))
-            check_out_button.setEnabled(status == "CHECKED-IN")  #   Disable if not checked in
-            action_layout.addWidget(check_out_button)
-            
-             
-            action_widget.setLayout(action_layout)
-            self.booking_table.setCellWidget(row, 10, action_widget)  #   Action Column
-            
     def confirm_checkin(self, booking_id):
         """ Show confirmation popup before check-in with custom icon """
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
 
         # 🔍 Fetch booking details
@@ -342,14 +364,15 @@ class BookingManagement(QWidget):
             """, (guest_id, room_id, check_in_date, check_out_date))
 
             conn.commit()
-            conn.close()
+            release_connection(conn)
+            get_event_bus().publish("bookings", [booking_id])
 
             QMessageBox.information(self, "Success", "Guest has been checked in successfully!")
-            self.load_bookings()  # 🔄 Refresh UI
+            self.apply_changes()  # 🔄 Refresh UI
             
     def confirm_checkout(self, booking_id):
         """ Show confirmation popup before check-out with custom icon """
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
 
         # 🔍 Fetch booking details
@@ -389,15 +412,16 @@ class BookingManagement(QWidget):
         if confirm == QMessageBox.StandardButton.Yes:
             cursor.execute("UPDATE Bookings SET status = 'CHECKED-OUT' WHERE id = ?", (booking_id,))
             conn.commit()
-            conn.close()
+            release_connection(conn)
+            get_event_bus().publish("bookings", [booking_id])
 
             QMessageBox.information(self, "Success", "Guest has been checked out successfully!")
-            self.load_bookings() 
+            self.apply_changes()
 
 
     def edit_booking(self, booking_id):
         """ Load booking details into the form for editing """
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("""
             SELECT g.name, r.id, r.room_number, b.check_in_date, b.check_out_date, 
@@ -409,13 +433,14 @@ class BookingManagement(QWidget):
             WHERE b.id=?
         """, (booking_id,))
         booking = cursor.fetchone()
-        conn.close()
+        release_connection(conn)
 
         if not booking:
             QMessageBox.warning(self, "Error", "Booking not found!")
             return
 
         guest_name, room_id, room_number, check_in, check_out, check_in_time, check_out_time, total_price, price_type = booking
+        self.editing_booking_id = booking_id
 
         #   Load Guest
         guest_index = self.guest_dropdown.findText(guest_name)
@@ -491,24 +516,28 @@ class BookingManagement(QWidget):
         price_type = self.price_type_dropdown.currentText()
         custom_price_text = self.custom_price_input.text()
 
-        conn = sqlite3.connect("hotel_management.db")
+        #   Check the form before taking the write lock
+        custom_price = None
+        if price_type == "3 Hour" and custom_price_text:
+            try:
+                custom_price = float(custom_price_text)
+            except ValueError:
+                QMessageBox.warning(self, "Error", "Invalid custom price for '3 Hour' booking!")
+                return
+
+        conn = get_connection()
         cursor = conn.cursor()
 
         try:
-            #   Prevent room double booking (except for "3 Hour")
-            if price_type != "3 Hour":
-                cursor.execute("""
-                    SELECT id FROM Bookings 
-                    WHERE room_id = ? 
-                    AND check_in_date <= ? 
-                    AND check_out_date >= ?
-                    AND id != ?
-                """, (room_id, check_out_date, check_in_date, booking_id))
-
-                existing_booking = cursor.fetchone()
-                if existing_booking:
-                    QMessageBox.warning(self, "Booking Error", "This room is already booked for the selected date.")
-                    return
+            #   Prevent room double booking (overlapping nights or 3 hour slots); the write lock is held until commit,
+            #   so it is released before any dialog (a modal dialog would keep other terminals waiting on it)
+            conflict_id = lock_and_find_conflict(
+                conn, room_id, check_in_date, check_in_time, check_out_date, check_out_time, ignore_booking_id=booking_id
+            )
+            if conflict_id is not None:
+                release_connection(conn)
+                QMessageBox.warning(self, "Booking Error", f"This room is already booked for the selected date (booking #{conflict_id}).")
+                return
 
             #   Fetch base price from Rooms table
             cursor.execute("SELECT base_price, three_hour_price FROM Rooms WHERE id = ?", (room_id,))
@@ -525,12 +554,6 @@ class BookingManagement(QWidget):
                 calculated_price = base_price * 1.1  # Increase by 10%
             elif price_type == "3 Hour":
                 # Use custom price if provided; otherwise, fallback to three_hour_price
-                try:
-                    custom_price = float(custom_price_text) if custom_price_text else None
-                except ValueError:
-                    QMessageBox.warning(self, "Error", "Invalid custom price for '3 Hour' booking!")
-                    return
-
                 calculated_price = custom_price if custom_price else three_hour_price
 
             #   Update the booking details
@@ -552,9 +575,10 @@ class BookingManagement(QWidget):
 
             #   Check for existing payments & update payment balance
             cursor.execute("""
-                SELECT SUM(amount_paid) FROM Payments WHERE booking_id = ?
+                SELECT paid_total FROM BookingBalances WHERE booking_id = ?
             """, (booking_id,))
-            total_paid = cursor.fetchone()[0] or 0.0
+            paid_row = cursor.fetchone()
+            total_paid = (paid_row[0] if paid_row else 0.0) or 0.0
             remaining_balance = calculated_price - total_paid
 
             #   Update `payment_status` in Bookings
@@ -566,14 +590,17 @@ class BookingManagement(QWidget):
             """, (new_payment_status, booking_id))
 
             conn.commit()
+            get_availability_index().update_booking(booking_id, room_id, check_in_date, check_in_time, check_out_date, check_out_time)
+            get_event_bus().publish("bookings", [booking_id])
             QMessageBox.information(self, "Success", "Booking updated successfully!")
         except sqlite3.Error as e:
+            release_connection(conn)
             QMessageBox.critical(self, "Database Error", f"Error updating booking: {str(e)}")
         finally:
-            conn.close()
+            release_connection(conn)
 
             #   Refresh UI
-            self.load_bookings()
+            self.apply_changes()
             self.reset_form()
 
 
@@ -587,24 +614,26 @@ class BookingManagement(QWidget):
                                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
 
         if confirm == QMessageBox.StandardButton.Yes:
-            conn = sqlite3.connect("hotel_management.db")
+            conn = get_connection()
             cursor = conn.cursor()
             cursor.execute("DELETE FROM Bookings WHERE id=?", (booking_id,))
             cursor.execute("UPDATE Rooms SET status='Available' WHERE id IN (SELECT room_id FROM Bookings WHERE id=?)", (booking_id,))
             conn.commit()
-            conn.close()
+            release_connection(conn)
+            get_availability_index().remove_booking(booking_id)
+            get_event_bus().publish("bookings", [booking_id])
             QMessageBox.information(self, "Success", "Booking deleted successfully!")
-            self.load_bookings()
+            self.apply_changes()
 
     def load_guests(self):
         """ Load guests into the dropdown with a default empty option """
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
         
         # Fetch guest names
         cursor.execute("SELECT id, name FROM Guests")
         guests = cursor.fetchall()
-        conn.close()
+        release_connection(conn)
 
         #   Clear the dropdown first
         self.guest_dropdown.clear()
@@ -622,36 +651,32 @@ class BookingManagement(QWidget):
 
 
     def load_available_rooms(self, selected_room=None):
-        """ Load rooms including booked ones for editing """
-
-        conn = sqlite3.connect("hotel_management.db")
-        cursor = conn.cursor()
+        """ Load rooms free for the dates in the form (keeping the edited booking's room) """
+        self.availability_generation += 1  #   A lookup still in flight must not overwrite this list
+        rooms = get_availability_index().free_rooms(
+            *self.requested_stay(), include_room=selected_room, ignore_booking_id=self.editing_booking_id
+        )
+        self.populate_room_dropdown(rooms)
 
-        if selected_room:
-            #   If editing a booking, ensure the selected room appears in the list
-            cursor.execute("""
-                SELECT id, room_number FROM Rooms 
-                WHERE id=? OR id NOT IN (SELECT room_id FROM Bookings)
-            """, (selected_room,))
-        else:
-            #   Only show available rooms for new bookings
-            cursor.execute("""
-                SELECT id, room_number FROM Rooms 
-                WHERE id NOT IN (SELECT room_id FROM Bookings)
-            """)
+        #   Ensure first item (empty) is selected
+        self.room_dropdown.setCurrentIndex(0)
 
-        rooms = cursor.fetchall()
-        conn.close()
+    def requested_stay(self):
+        """ (check_in_date, check_in_time, check_out_date, check_out_time) currently in the form """
+        return (
+            self.check_in_date.date().toString("yyyy-MM-dd"),
+            self.check_in_time.time().toString("HH:mm"),
+            self.check_out_date.date().toString("yyyy-MM-dd"),
+            self.check_out_time.time().toString("HH:mm"),
+        )
 
+    def populate_room_dropdown(self, rooms):
+        """ Fill the room dropdown with (room_id, room_number) pairs """
         self.room_dropdown.clear()
         self.room_dropdown.addItem("-- Select Room --", None)
-
         for room_id, room_number in rooms:
             self.room_dropdown.addItem(room_number, room_id)
 
-        #   Ensure first item (empty) is selected
-        self.room_dropdown.setCurrentIndex(0)
-
         
     def validate_booking(self, check_in_date, check_out_date, check_in_time, check_out_time, price_type):
         """ Validate booking dates and times before adding or updating """
@@ -728,68 +753,32 @@ class BookingManagement(QWidget):
             self.check_out_time_label.setVisible(False)
             self.check_out_time.setVisible(False)
             
-    def filter_available_rooms(self):
-        """ Fetch and display available rooms based on check-in/out date and time """
-
-        check_in_date = self.check_in_date.date().toString("yyyy-MM-dd")
-        check_out_date = self.check_out_date.date().toString("yyyy-MM-dd")
-        check_in_time = self.check_in_time.time().toString("HH:mm")
-        check_out_time = self.check_out_time.time().toString("HH:mm")
-        price_type = self.price_type_dropdown.currentText()
+    def schedule_room_refresh(self):
+        """ Restart the debounce window; only the last change in a burst triggers a lookup """
+        self.availability_timer.start()
 
-        conn = sqlite3.connect("hotel_management.db")
-        cursor = conn.cursor()
+    def filter_available_rooms(self):
+        """ Fetch available rooms for the check-in/out date and time on a worker thread """
+        self.availability_generation += 1
+
+        #   One interval lookup per room covers both nightly stays and "3 Hour" slots
+        worker = Worker(lookup_free_rooms, self.availability_generation, self.requested_stay(), self.editing_booking_id)
+        worker.signals.result.connect(self.show_available_rooms)  #   Queued back to the GUI thread
+        QThreadPool.globalInstance().start(worker)
+
+    def show_available_rooms(self, result):
+        """ Display a lookup result unless the form has changed since it was requested """
+        generation, rooms = result
+        if generation != self.availability_generation:
+            return
 
-        #   For "3 Hour" bookings → Ensure no **overlapping** time slots.
-        if price_type == "3 Hour":
-            query = """
-                SELECT r.id, r.room_number 
-                FROM Rooms r
-                WHERE r.id NOT IN (
-                    SELECT b.room_id 
-                    FROM Bookings b
-                    WHERE b.check_in_date = ?
-                    AND (
-                        (TIME(?) >= b.check_in_time AND TIME(?) < b.check_out_time)
-                        OR (TIME(?) > b.check_in_time AND TIME(?) <= b.check_out_time)
-                        OR (b.check_in_time >= TIME(?) AND b.check_out_time <= TIME(?))
-                        OR (b.check_in_time <= TIME(?) AND b.check_out_time >= TIME(?))
-                    )
-                )
-            """
-            cursor.execute(query, (
-                check_in_date, check_in_time, check_in_time, check_out_time, check_out_time,
-                check_in_time, check_out_time, check_in_time, check_out_time
-            ))
-
-        #   For "Normal" bookings → Fix: Exclude **only rooms with overlapping bookings**.
-        else:
-            query = """
-                SELECT r.id, r.room_number 
-                FROM Rooms r
-                WHERE r.id NOT IN (
-                    SELECT b.room_id 
-                    FROM Bookings b
-                    WHERE (
-                        --   Exclude rooms where new check-in is inside an existing booking period
-                        (b.check_in_date <= ? AND b.check_out_date >= ?) 
-                        AND NOT (
-                            --   Allow rooms that have already checked out **before** the new check-in time
-                            b.check_out_date = ? AND TIME(b.check_out_time) <= TIME(?)
-                        )
-                    )
-                )
-            """
-            cursor.execute(query, (check_in_date, check_in_date, check_in_date, check_in_time))
-
-        rooms = cursor.fetchall()
-        conn.close()
-
-        #   Update the Dropdown with Available Rooms
-        self.room_dropdown.clear()
-        self.room_dropdown.addItem("-- Select Room --", None)
-        for room_id, room_number in rooms:
-            self.room_dropdown.addItem(room_number, room_id)
+        #   Keep the room the user already picked if it is still free
+        selected_room = self.room_dropdown.currentData()
+        self.populate_room_dropdown(rooms)
+        if selected_room is not None:
+            room_index = self.room_dropdown.findData(selected_room)
+            if room_index != -1:
+                self.room_dropdown.setCurrentIndex(room_index)
 
     
     def add_booking(self):
@@ -807,7 +796,7 @@ class BookingManagement(QWidget):
             QMessageBox.warning(self, "Error", "Guest and Room must be selected!")
             return
 
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
 
         #   Determine calculated price based on price type
@@ -844,6 +833,19 @@ class BookingManagement(QWidget):
                     QMessageBox.warning(self, "Error", "Invalid custom price for '3 Hour' booking!")
                     return
 
+        #   Prevent room double booking (overlapping nights or 3 hour slots); the write lock is held until commit,
+        #   so it is released before any dialog (a modal dialog would keep other terminals waiting on it)
+        try:
+            conflict_id = lock_and_find_conflict(conn, room_id, check_in_date, check_in_time, check_out_date, check_out_time)
+        except sqlite3.Error as e:
+            release_connection(conn)
+            QMessageBox.warning(self, "Booking failed", f"Error: {e}")
+            return
+        if conflict_id is not None:
+            release_connection(conn)
+            QMessageBox.warning(self, "Booking Error", f"This room is already booked for the selected date (booking #{conflict_id}).")
+            return
+
         # 🔍 Print debug logs before inserting
         print("\n🔍 Attempting to add booking:")
         print(f"Guest ID: {guest_id}, Room ID: {room_id}")
@@ -859,15 +861,18 @@ class BookingManagement(QWidget):
             """, (guest_id, room_id, check_in_date, check_out_date, check_in_time, check_out_time, price_type, calculated_price, "PENDING", "BOOKING"))
 
             conn.commit()
+            get_availability_index().add_booking(cursor.lastrowid, room_id, check_in_date, check_in_time, check_out_date, check_out_time)
+            get_event_bus().publish("bookings", [cursor.lastrowid])
             QMessageBox.information(self, "Success", "Booking added successfully!")
 
         except sqlite3.IntegrityError as e:
             print(f" Database Integrity Error: {e}")
+            release_connection(conn)
             QMessageBox.warning(self, "Booking failed", f"Error: {e}")
 
         finally:
-            conn.close()
-            self.load_bookings()
+            release_connection(conn)
+            self.apply_changes()
             self.clear_form()
 
 
@@ -934,21 +939,49 @@ class BookingManagement(QWidget):
 
 
 
+    def import_bookings(self):
+        """ Import a CSV/JSON file of bookings on a worker thread; rejected rows are listed afterwards """
+        file_path, _ = QFileDialog.getOpenFileName(self, "Import Bookings", "", "Booking Files (*.csv *.json)")
+        if not file_path:
+            return
+
+        self.import_button.setEnabled(False)
+        worker = Worker(import_booking_file, file_path)
+        worker.signals.result.connect(self.show_import_result)
+        worker.signals.error.connect(lambda message: QMessageBox.critical(self, "Import failed", f"Error: {message}"))
+        worker.signals.finished.connect(lambda: self.import_button.setEnabled(True))
+        QThreadPool.globalInstance().start(worker)
+
+    def show_import_result(self, result):
+        if result.guest_ids:
+            get_event_bus().publish("guests", result.guest_ids)
+        if result.booking_ids:
+            get_event_bus().publish("bookings", result.booking_ids)
+        self.apply_changes()
+
+        message = result.summary()
+        if result.problems:
+            message += "\n\n" + "\n".join(f"Line {line}: {problem}" for line, problem in result.problems[:15])
+            if len(result.problems) > 15:
+                message += f"\n... and {len(result.problems) - 15} more"
+            QMessageBox.warning(self, "Import finished", message)
+        else:
+            QMessageBox.information(self, "Import finished", message)
+
     def cancel_booking(self):
         """ Cancel a selected booking and free the room """
-        selected_row = self.booking_table.currentRow()
+        selected_row = self.booking_table.currentIndex().row()
         
         if selected_row == -1:
             QMessageBox.warning(self, "Error", "Please select a booking to cancel!")
             return
 
         #   Fetch the booking ID from the selected row
-        booking_id_item = self.booking_table.item(selected_row, 0)  
-        if not booking_id_item:
+        booking_id = self.booking_model.booking_id(selected_row)
+        if booking_id is None:
             QMessageBox.warning(self, "Error", "Booking ID not found!")
             return
-        
-        booking_id = booking_id_item.text()
+        room_id = self.booking_model.room_id(selected_row)
 
         #   Ask for confirmation before canceling
         confirm = QMessageBox.question(
@@ -957,7 +990,7 @@ class BookingManagement(QWidget):
         )
 
         if confirm == QMessageBox.StandardButton.Yes:
-            conn = sqlite3.connect("hotel_management.db")
+            conn = get_connection()
             cursor = conn.cursor()
             
             try:
@@ -972,22 +1005,26 @@ class BookingManagement(QWidget):
                 """, (booking_id,))
 
                 conn.commit()
+                get_availability_index().remove_booking(booking_id)
+                get_event_bus().publish("bookings", [booking_id])
+                get_event_bus().publish("rooms", [room_id])  #   Status is back to 'Available'
 
                 #   Refresh the UI after canceling
                 QMessageBox.information(self, "Success", "Booking cancelled successfully!")
-                self.load_bookings()
+                self.apply_changes()
 
             except sqlite3.Error as e:
                 QMessageBox.warning(self, "Error", f"Failed to cancel booking: {e}")
             
             finally:
-                conn.close()
+                release_connection(conn)
 
 
 
 
     def reset_form(self):
         """ Reset the form fields to default state after adding or updating a booking """
+        self.editing_booking_id = None
         
         #   Reset dropdowns to default placeholder selection
         self.guest_dropdown.setCurrentIndex(0)  # Select "-- Select Guest --"
@@ -0,0 +1,121 @@
+from util.database import get_connection
+from util.lazy_table_model import LazyTableModel
+from util.search import booking_filter
+
+BOOKING_HEADERS = [
+    "ID", "Guest", "Room", "Check-in", "In Time", "Check-out", "Out Time", "Price", "Price Type", "Status", "Actions"
+]
+ACTIONS_COLUMN = 10
+
+#   Trailing columns (not shown) used to find the rows a guest or room change touches
+GUEST_ID_FIELD = 10
+ROOM_ID_FIELD = 11
+
+#   Ids per IN (...) when re-reading changed bookings
+PATCH_CHUNK = 500
+
+BOOKING_SELECT = """
+    SELECT b.id, g.name, r.room_number,
+        b.check_in_date,
+        IFNULL(b.check_in_time, '12:00'),
+        b.check_out_date,
+        IFNULL(b.check_out_time, '10:00'),
+        IFNULL(bd.calculated_price, 0),
+        b.price_type,
+        b.status,
+        b.guest_id,
+        b.room_id
+    FROM Bookings b
+    JOIN Guests g ON b.guest_id = g.id
+    JOIN Rooms r ON b.room_id = r.id
+    LEFT JOIN BookingDetails bd ON b.id = bd.booking_id
+"""
+
+
+def booking_page_query(search_text, after_key=None, limit=200):
+    """ (SQL, params) for one page of the booking list, newest check-in first.
+
+    `after_key` is the (check_in_date, id) of the last row already loaded, or None for the first page.
+    """
+    #   Search first: SQLite starts from the index matches instead of walking every booking
+    search_condition, params = booking_filter(search_text)
+    conditions = [search_condition] if search_condition else []
+    if after_key is not None:
+        #   Keyset pagination: continue strictly after the last loaded (check_in_date, id);
+        #   the row-value comparison lets SQLite seek idx_bookings_check_in instead of scanning it
+        conditions.append("(b.check_in_date, b.id) < (?, ?)")
+        params = params + list(after_key)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return BOOKING_SELECT + f"""
+        {where}
+        ORDER BY b.check_in_date DESC, b.id DESC
+        LIMIT ?
+    """, params + [limit]
+
+
+class BookingTableModel(LazyTableModel):
+    """ Booking list (newest check-in first) loaded one page at a time """
+
+    descending = True
+
+    def __init__(self, page_size=200, parent=None):
+        super().__init__(BOOKING_HEADERS, page_size, parent)
+        self.search_text = ""
+
+    def set_search(self, text):
+        """ Show only bookings whose guest, room or id matches `text` ("" shows all) """
+        self.search_text = text.strip()
+        self.reload()
+
+    def sort_key(self, row):
+        return (row[3], row[0])
+
+    def search_conditions(self):
+        """ ([conditions], [params]) for the current search, meant to be ANDed together """
+        search_condition, search_params = booking_filter(self.search_text)
+        return ([search_condition], search_params) if search_condition else ([], [])
+
+    def fetch_page(self, after_row, limit):
+        after_key = None if after_row is None else (after_row[3], after_row[0])
+        sql, params = booking_page_query(self.search_text, after_key, limit)
+        return get_connection().execute(sql, params).fetchall()
+
+    def fetch_rows(self, keys):
+        keys = list(keys)
+        rows = []
+        for start in range(0, len(keys), PATCH_CHUNK):
+            chunk = keys[start:start + PATCH_CHUNK]
+            conditions, params = self.search_conditions()
+            conditions.append(f"b.id IN ({', '.join('?' * len(chunk))})")
+            rows += get_connection().execute(
+                BOOKING_SELECT + f"WHERE {' AND '.join(conditions)}", params + chunk
+            ).fetchall()
+        return rows
+
+    def loaded_ids(self, guest_ids=(), room_ids=()):
+        """ Ids of loaded bookings that belong to any of the given guests or rooms """
+        guest_ids, room_ids = set(guest_ids), set(room_ids)
+        return {
+            row[0] for row in self.rows
+            if row[GUEST_ID_FIELD] in guest_ids or row[ROOM_ID_FIELD] in room_ids
+        }
+
+    def display_value(self, row, column):
+        if column == 7:
+            return f"${row[7]:.2f}"
+        if column == ACTIONS_COLUMN:
+            return None
+        return row[column]
+
+    def booking_id(self, row):
+        data = self.row_data(row)
+        return data[0] if data else None
+
+    def status(self, row):
+        data = self.row_data(row)
+        return data[9] if data else None
+
+    def room_id(self, row):
+        data = self.row_data(row)
+        return data[ROOM_ID_FIELD] if data else None
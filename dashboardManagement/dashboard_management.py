@@ -1,19 +1,22 @@
 
 
-import sqlite3
+from util.database import get_connection, release_connection
+from dashboardManagement.dashboard_stats import read_dashboard_stats
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout
+from PyQt6.QtCore import QDate
 from util.dashboard_header import DashboardHeader
 from util.dashborad_crad import DashboardCard
 from util.custom_table_widget import TableWidget
-import matplotlib.pyplot as plt
+from util.event_bus import DirtySet
 
 class DashboardManagement(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Dashboard Management")
         self.setGeometry(100, 100, 1000, 600)
+        self.dirty = DirtySet(["guests", "bookings", "rooms", "payments"], self)
+        self.loaded_day = QDate.currentDate()  #   Today's check-ins/outs change at midnight without any write
         self.initUI()
-        plt.ioff()  
 
     def initUI(self):
         """ Initialize Dashboard Layout """
@@ -30,13 +33,14 @@ class DashboardManagement(QWidget):
         # self.stats_grid.setSpacing(20)
         self.main_layout.addLayout(self.stats_grid)
 
-        # Cards Data
+        # Cards Data (values come from the trigger-maintained DashboardStats row)
         self.stats_data = [
-            ("Total Bookings", "SELECT COUNT(*) FROM Bookings", "#FF6F61", "icons/ic_calendar.png"),
-            ("Total Guests", "SELECT COUNT(*) FROM Guests", "#6A5ACD", "icons/ic_guests.png"),
-            ("Total Revenue ($)", "SELECT SUM(amount_paid) FROM Payments", "#2E8B57", "icons/ic_revenue.png"),
-            ("Available Rooms", "SELECT COUNT(*) FROM Rooms WHERE status = 'Available'", "#FFA500", "icons/ic_hotel.png")
+            ("Total Bookings", "total_bookings", "#FF6F61", "icons/ic_calendar.png"),
+            ("Total Guests", "total_guests", "#6A5ACD", "icons/ic_guests.png"),
+            ("Total Revenue ($)", "total_revenue", "#2E8B57", "icons/ic_revenue.png"),
+            ("Available Rooms", "available_rooms", "#FFA500", "icons/ic_hotel.png")
         ]
+        self.cards = {}
         self.load_cards()
 
         #   Table Section (2 Column Layout)
@@ -57,27 +61,33 @@ class DashboardManagement(QWidget):
         self.load_checkin_data()
         self.load_checkout_data()
 
-    ##""" Dynamically generate cards and adjust layout based on screen size """
+    ##""" Create the cards once; later refreshes only change their values """
     def load_cards(self):
-        for title, query, color, icon in self.stats_data:
-            value = self.fetch_data(query)
-            card = DashboardCard(title, value, color, icon)
+        stats = self.fetch_stats()
+        for title, column, color, icon in self.stats_data:
+            card = DashboardCard(title, stats[column], color, icon)
+            self.cards[column] = card
             self.stats_grid.addWidget(card)
 
-    ##""" Fetch a single value from the database, return 0 if None """
-    def fetch_data(self, query):
-        conn = sqlite3.connect("hotel_management.db")
-        cursor = conn.cursor()
-        cursor.execute(query)
-        result = cursor.fetchone()
-        conn.close()
+    def refresh_cards(self):
+        """ Update every card from a single-row read """
+        stats = self.fetch_stats()
+        for column, card in self.cards.items():
+            card.set_value(stats[column])
+
+    ##""" Fetch the dashboard totals, rounding revenue to cents """
+    def fetch_stats(self):
+        conn = get_connection()
+        stats = read_dashboard_stats(conn)
+        release_connection(conn)
 
-        return result[0] if result and result[0] is not None else 0 
+        stats["total_revenue"] = round(stats["total_revenue"], 2)
+        return stats
 
     ## Load checkout in Table
     def load_checkin_data(self):
         """ Load check-in data for today with room number instead of room ID """
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("""
             SELECT b.id, COALESCE(r.room_number, 'N/A'), 
@@ -88,7 +98,7 @@ class DashboardManagement(QWidget):
             WHERE b.check_in_date = DATE('now')
         """)
         records = cursor.fetchall()
-        conn.close()
+        release_connection(conn)
 
         #If empty, avoid crashing
         if not records:  
@@ -99,7 +109,7 @@ class DashboardManagement(QWidget):
     ## Load checkout out Table
     def load_checkout_data(self):
         """ Load check-out data for today with room number instead of room ID """
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("""
             SELECT b.id, COALESCE(r.room_number, 'N/A'), 
@@ -110,7 +120,7 @@ class DashboardManagement(QWidget):
             WHERE b.check_out_date = DATE('now')
         """)
         records = cursor.fetchall()
-        conn.close()
+        release_connection(conn)
         
         # If empty, avoid crashing
         if not records:  
@@ -120,16 +130,11 @@ class DashboardManagement(QWidget):
 
         
     def load_dashboard_data(self):
-        """ Refresh the dashboard by reloading all cards and table data. """
-    
-        #Remove existing cards before reloading
-        while self.stats_grid.count():
-            item = self.stats_grid.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-        
-        #Reload Cards and data
-        self.load_cards()
+        """ Refresh the dashboard card values and table data (skipped when nothing changed since the last visit). """
+        if not self.dirty.take() and self.loaded_day == QDate.currentDate():
+            return
+        self.loaded_day = QDate.currentDate()
+        self.refresh_cards()
         self.load_checkin_data()
         self.load_checkout_data()
 
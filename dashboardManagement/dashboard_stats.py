@@ -0,0 +1,26 @@
+""" Dashboard card totals kept in a single-row table by triggers.
+
+DashboardStats always holds the current booking, guest, revenue and available-room
+totals, so refreshing the dashboard is one primary-key read instead of four scans.
+"""
+
+STATS_COLUMNS = ("total_bookings", "total_guests", "total_revenue", "available_rooms")
+
+
+def rebuild_dashboard_stats(conn):
+    """ Recount every total from the base tables """
+    with conn:
+        conn.execute("""
+            UPDATE DashboardStats SET
+                total_bookings = (SELECT COUNT(*) FROM Bookings),
+                total_guests = (SELECT COUNT(*) FROM Guests),
+                total_revenue = (SELECT IFNULL(SUM(amount_paid), 0) FROM Payments),
+                available_rooms = (SELECT COUNT(*) FROM Rooms WHERE status = 'Available')
+            WHERE id = 1
+        """)
+
+
+def read_dashboard_stats(conn):
+    """ {column: value} for the four dashboard totals """
+    row = conn.execute(f"SELECT {', '.join(STATS_COLUMNS)} FROM DashboardStats WHERE id = 1").fetchone()
+    return dict(zip(STATS_COLUMNS, row or (0,) * len(STATS_COLUMNS)))
@@ -1,4 +1,5 @@
 import sqlite3
+from util.database import get_connection, release_connection
 from PyQt6.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
     QHBoxLayout, QComboBox, QLineEdit, QMessageBox, QFrame, QSizePolicy, QSpacerItem
@@ -104,7 +105,7 @@ class EmployeeManagement(QWidget):
             QMessageBox.warning(self, "Input Error", "Please enter a username, password, and select a role.")
             return
 
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
 
         try:
@@ -128,15 +129,15 @@ class EmployeeManagement(QWidget):
         except sqlite3.IntegrityError as e:
             QMessageBox.warning(self, "Error", f"Failed to save employee: {str(e)}")
         finally:
-            conn.close()
+            release_connection(conn)
             
     def refresh_data(self):
         """ Load all employees from the database and clear the form """
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT id, username, role FROM Employees")  #   Exclude password for security
         employees = cursor.fetchall()
-        conn.close()
+        release_connection(conn)
 
         self.employee_table.setRowCount(len(employees))
         self.employee_table.setColumnCount(4)
@@ -177,11 +178,11 @@ class EmployeeManagement(QWidget):
 
     def load_employee_for_edit(self, emp_id):
         """ Load an employee's data into the form for editing """
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT username, role, password FROM Employees WHERE id = ?", (emp_id,))
         employee = cursor.fetchone()
-        conn.close()
+        release_connection(conn)
 
         if not employee:
             QMessageBox.warning(self, "Error", "Employee not found.")
@@ -206,11 +207,11 @@ class EmployeeManagement(QWidget):
                                      QMessageBox.StandardButton.No)
 
         if reply == QMessageBox.StandardButton.Yes:
-            conn = sqlite3.connect("hotel_management.db")
+            conn = get_connection()
             cursor = conn.cursor()
             cursor.execute("DELETE FROM Employees WHERE id = ?", (emp_id,))
             conn.commit()
-            conn.close()
+            release_connection(conn)
             QMessageBox.information(self, "Deleted", "Employee deleted successfully.")
             self.refresh_data()
 
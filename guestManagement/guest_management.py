@@ -1,26 +1,24 @@
 import os
-import shutil
-import time
-import sqlite3
+from util.database import get_connection, release_connection
 from PyQt6.QtWidgets import (
-    QWidget, QLabel, QVBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
-    QHBoxLayout, QMessageBox, QFrame, QScrollArea, QGridLayout, QFileDialog, QDialog
+    QWidget, QLabel, QVBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, QTableView, QAbstractItemView,
+    QHBoxLayout, QMessageBox, QFrame, QScrollArea, QGridLayout, QFileDialog, QDialog, QLineEdit, QComboBox
 )
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QIcon, QPixmap
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QIcon
 
 from guestManagement.guest_preview_dialog import GuestPreviewDialog
+from guestManagement.guest_table_model import GuestTableModel, ACTIONS_COLUMN
+from util.action_delegate import ActionButtonDelegate
 from util.custom_btn import CustomButton
 from util.custom_input import CustomInput
 from util.custom_label_title import CustomLabelTitle
+from util.event_bus import DirtySet, get_event_bus
 from util.image_carousel import ImageCarousel
+from util.image_store import GUEST_IMAGE_DIR, forget_images, image_file, store_image
 from util.imgpop import ImagePopup
-
-#   Define Guest Image Directory
-GUEST_IMAGE_DIR = os.path.join(os.path.expanduser("~"), "documents/hotel-room-images/guest_img")
-
-#   Ensure directory exists
-os.makedirs(GUEST_IMAGE_DIR, exist_ok=True)
+from util.search import SEARCH_DEBOUNCE_MS
+from util.thumbnail_cache import get_thumbnail_cache
 
 
 class GuestManagement(QWidget):
@@ -28,6 +26,15 @@ class GuestManagement(QWidget):
         super().__init__()
         self.current_guest_id = None
         self.temporary_images = []
+
+        #   Typing restarts the timer; the list reloads once the user pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.load_guests)
+
+        self.dirty = DirtySet(["guests"], self)
+
         self.initUI()
 
     def initUI(self):
@@ -42,9 +49,50 @@ class GuestManagement(QWidget):
         table_title.setStyleSheet("font-size: 16px; font-weight: bold; margin-bottom: 10px;")
         table_layout.addWidget(table_title)
 
-        self.guest_table = QTableWidget()
-        self.guest_table.setColumnCount(5)
-        self.guest_table.setHorizontalHeaderLabels(["ID", "Name", "Contact", "Email", "Actions"])
+        #   Search and Sort in the Same Row
+        search_sort_layout = QHBoxLayout()
+
+        #   Search Input
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search by Name, Contact, or Email")
+        self.search_input.textChanged.connect(self.schedule_search)
+        search_sort_layout.addWidget(self.search_input)
+
+        sort_label = QLabel("Sort by:")
+        sort_label.setStyleSheet("font-size: 14px; font-weight: bold;")
+        search_sort_layout.addWidget(sort_label)
+
+        self.sort_dropdown = QComboBox()
+        self.sort_dropdown.addItems(["ID", "Name"])
+        self.sort_dropdown.currentTextChanged.connect(lambda text: self.guest_model.set_order(text.lower()))
+        search_sort_layout.addWidget(self.sort_dropdown)
+        table_layout.addLayout(search_sort_layout)
+
+        #   Model/view table: rows are fetched page by page while scrolling and kept between visits
+        self.guest_model = GuestTableModel()
+        self.guest_table = QTableView()
+        self.guest_table.setModel(self.guest_model)
+        self.guest_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.guest_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.guest_table.verticalHeader().setDefaultSectionSize(34)
+
+        #   Set fixed column widths
+        self.guest_table.setColumnWidth(0, 50)   # ID Column
+        self.guest_table.setColumnWidth(1, 150)  # Name Column
+        self.guest_table.setColumnWidth(2, 120)  # Contact Column
+        self.guest_table.setColumnWidth(3, 200)  # Email Column
+        self.guest_table.setColumnWidth(4, 130)  # Actions Column
+        self.guest_table.horizontalHeader().setStretchLastSection(True)
+
+        #   Edit, delete, print and history icons are painted by one delegate instead of four buttons per row
+        self.action_delegate = ActionButtonDelegate([
+            ("edit", "icons/ic_edit.png", None),
+            ("delete", "icons/ic_delete.png", None),
+            ("print", "icons/ic_printer.png", None),
+            ("history", "icons/ic_history.png", None),
+        ], button_size=25, parent=self.guest_table)
+        self.action_delegate.action_triggered.connect(self.handle_guest_action)
+        self.guest_table.setItemDelegateForColumn(ACTIONS_COLUMN, self.action_delegate)
         table_layout.addWidget(self.guest_table)
 
         #   Right Section (Add/Edit Guest Form)
@@ -106,78 +154,27 @@ class GuestManagement(QWidget):
         self.setLayout(main_layout)
         self.load_guests()
 
-    def load_guests(self):
-        """ Load all guests into the table """
-        conn = sqlite3.connect("hotel_management.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, name, contact, email FROM Guests")
-        guests = cursor.fetchall()
-        conn.close()
-
-        self.guest_table.setRowCount(len(guests))
-        self.guest_table.setColumnCount(5)  
-        self.guest_table.setHorizontalHeaderLabels(["ID", "Name", "Contact", "Email", "Actions"])
-
-        #   Hide row numbers
-        self.guest_table.verticalHeader().setVisible(True)
-
-        #   Set fixed column widths
-        self.guest_table.setColumnWidth(0, 50)   # ID Column
-        self.guest_table.setColumnWidth(1, 150)  # Name Column
-        self.guest_table.setColumnWidth(2, 120)  # Contact Column
-        self.guest_table.setColumnWidth(3, 200)  # Email Column
-        self.guest_table.setColumnWidth(4, 80)   # Actions Column
-
-        #   Make last column non-expandable
-        self.guest_table.horizontalHeader().setStretchLastSection(True)
-
-        for row, (guest_id, name, contact, email) in enumerate(guests):
-            self.guest_table.setItem(row, 0, QTableWidgetItem(str(guest_id)))
-            self.guest_table.setItem(row, 1, QTableWidgetItem(name))
-            self.guest_table.setItem(row, 2, QTableWidgetItem(contact))
-            self.guest_table.setItem(row, 3, QTableWidgetItem(email or "N/A"))
-
-            #   Add Edit & Delete Buttons
-            action_widget = QWidget()
-            action_layout = QHBoxLayout(action_widget)
-            action_layout.setContentsMargins(0, 0, 0, 0)
-            action_layout.setSpacing(5)  # Reduce spacing between buttons
-
-            edit_button = QPushButton()
-            edit_button.setIcon(QIcon("icons/ic_edit.png"))
-            edit_button.setStyleSheet("border: none;")
-            edit_button.setFixedSize(25, 25)  # Adjust button size
-            edit_button.clicked.connect(lambda _, g_id=guest_id: self.edit_guest(g_id))
-            action_layout.addWidget(edit_button)
-
-            delete_button = QPushButton()
-            delete_button.setIcon(QIcon("icons/ic_delete.png"))
-            delete_button.setFixedSize(25, 25)  
-            delete_button.setStyleSheet("border: none;")
-            delete_button.clicked.connect(lambda _, g_id=guest_id: self.delete_guest(g_id))
-            action_layout.addWidget(delete_button)
-
-            # 🖨 Print/Preview PDF Button
-            print_button = QPushButton()
-            print_button.setIcon(QIcon("icons/ic_printer.png"))  # Ensure you have an icon named "ic_print.png"
-            print_button.setFixedSize(25, 25)
-            print_button.setStyleSheet("border: none;")
-            print_button.clicked.connect(lambda _, g_id=guest_id: self.print_guest_details(g_id))
-            action_layout.addWidget(print_button)
-            
-             # 🔥 **History Button**
-            history_button = QPushButton()
-            history_button.setIcon(QIcon("icons/ic_history.png"))  # Use an appropriate icon
-            history_button.setFixedSize(25, 25)
-            history_button.setStyleSheet("border: none;")
-            history_button.clicked.connect(lambda _, g_id=guest_id: self.show_guest_history(g_id))
-            action_layout.addWidget(history_button)
-
-            action_widget.setLayout(action_layout)
-            self.guest_table.setCellWidget(row, 4, action_widget)
-
+    def schedule_search(self):
+        """ Restart the debounce window; only the last keystroke in a burst reloads the list """
+        self.search_timer.start()
 
+    def load_guests(self):
+        """ Reload the guest list (or the best matches for the search text); the view pulls rows as it scrolls """
+        self.guest_model.set_search(self.search_input.text())
 
+    def handle_guest_action(self, action, row):
+        """ Dispatch a click on one of the painted action icons """
+        guest_id = self.guest_model.guest_id(row)
+        if guest_id is None:
+            return
+        if action == "edit":
+            self.edit_guest(guest_id)
+        elif action == "delete":
+            self.delete_guest(guest_id)
+        elif action == "print":
+            self.print_guest_details(guest_id)
+        elif action == "history":
+            self.show_guest_history(guest_id)
 
     def add_guest(self):
         """ Add a new guest and display images in the image carousel immediately. """
@@ -189,7 +186,7 @@ class GuestManagement(QWidget):
             QMessageBox.warning(self, "Input Error", "Name and Contact are required!")
             return
 
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
 
         #   Insert guest first and get the new guest ID
@@ -197,32 +194,27 @@ class GuestManagement(QWidget):
         conn.commit()
         self.current_guest_id = cursor.lastrowid  #   Assign guest ID immediately
 
-        #   Copy all stored images for this guest
-        saved_image_paths = []  #   Store image filenames for loading them later
+        #   Store all images for this guest (a scan seen before is not copied again)
+        saved_image_paths = []  #   Store image paths for loading them later
         for file_path in self.temporary_images:
-            file_extension = os.path.splitext(file_path)[1].lower()
-            original_filename = os.path.basename(file_path)
-            timestamp = int(time.time() * 1000000)  # Use microseconds for uniqueness
-            new_filename = f"guest_{self.current_guest_id}_{timestamp}_{original_filename}"
-            new_path = os.path.join(GUEST_IMAGE_DIR, new_filename)
-
             try:
-                shutil.copy(file_path, new_path)  #   Copy image
-                cursor.execute("INSERT INTO GuestImages (guest_id, image_path) VALUES (?, ?)", (self.current_guest_id, new_filename))
-                saved_image_paths.append(new_filename)  #   Save filenames for later use
+                stored_path = store_image(conn, file_path)
+                cursor.execute("INSERT INTO GuestImages (guest_id, image_path) VALUES (?, ?)", (self.current_guest_id, stored_path))
+                saved_image_paths.append(stored_path)  #   Save paths for later use
             except Exception as e:
                 QMessageBox.warning(self, "Error", f"Failed to save image: {str(e)}")
 
         conn.commit()
-        conn.close()
+        release_connection(conn)
+        get_event_bus().publish("guests", [self.current_guest_id])
 
         #   Clear temporary images
         self.temporary_images.clear()
 
         QMessageBox.information(self, "Success", "Guest added successfully with images!")
 
-        #   Refresh UI
-        self.load_guests()
+        #   Refresh UI (only the new row is read)
+        self.apply_changes()
         self.clear_form()
 
         #   Load images into carousel AFTER guest ID is assigned and images are saved
@@ -233,11 +225,11 @@ class GuestManagement(QWidget):
 
     def edit_guest(self, guest_id):
         """ Load guest details and images into the form """
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT name, contact, email FROM Guests WHERE id=?", (guest_id,))
         guest = cursor.fetchone()
-        conn.close()
+        release_connection(conn)
 
         if not guest:
             QMessageBox.warning(self, "Error", "Guest not found!")
@@ -265,16 +257,17 @@ class GuestManagement(QWidget):
             QMessageBox.warning(self, "Input Error", "Name and Contact are required!")
             return
 
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("UPDATE Guests SET name=?, contact=?, email=? WHERE id=?", (name, contact, email, guest_id))
         conn.commit()
-        conn.close()
+        release_connection(conn)
+        get_event_bus().publish("guests", [guest_id])
 
         QMessageBox.information(self, "Success", "Guest updated successfully!")
 
-        #   Refresh guest list
-        self.load_guests()
+        #   Refresh guest list (only the edited row is read)
+        self.apply_changes()
 
         #   Clear all fields and reset image carousel
         self.clear_form()
@@ -283,7 +276,7 @@ class GuestManagement(QWidget):
 
     def delete_guest(self, guest_id):
         """ Delete a guest only if they have no active bookings """
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT COUNT(*) FROM Bookings WHERE guest_id=?", (guest_id,))
         active_bookings = cursor.fetchone()[0]
@@ -292,12 +285,18 @@ class GuestManagement(QWidget):
             QMessageBox.warning(self, "Error", "Cannot delete guest with active bookings!")
             return
 
+        cursor.execute("SELECT image_path FROM GuestImages WHERE guest_id=?", (guest_id,))
+        image_paths = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute("DELETE FROM GuestImages WHERE guest_id=?", (guest_id,))
         cursor.execute("DELETE FROM Guests WHERE id=?", (guest_id,))
         conn.commit()
-        conn.close()
+        forget_images(conn, image_paths, GUEST_IMAGE_DIR)
+        release_connection(conn)
+        get_event_bus().publish("guests", [guest_id])
 
         QMessageBox.information(self, "Success", "Guest deleted successfully!")
-        self.load_guests()
+        self.apply_changes()
 
     def upload_images(self):
         """ Allow users to select multiple images and store them correctly based on guest status. """
@@ -319,32 +318,26 @@ class GuestManagement(QWidget):
 
         else:
             #   Edit flow (DO NOT CLEAR IMAGES)
-            conn = sqlite3.connect("hotel_management.db")
+            conn = get_connection()
             cursor = conn.cursor()
 
             for file_path in files:
                 file_extension = os.path.splitext(file_path)[1].lower()
-                original_filename = os.path.basename(file_path)
                 valid_extensions = {".png", ".jpg", ".jpeg", ".bmp"}
 
                 if file_extension not in valid_extensions:
                     QMessageBox.warning(self, "Error", "Invalid file type! Please upload an image.")
                     continue
 
-                #   Generate a unique filename using guest ID, timestamp, and original filename
-                timestamp = int(time.time() * 1000000)  # Use microseconds to ensure uniqueness
-                new_filename = f"guest_{self.current_guest_id}_{timestamp}_{original_filename}"
-                new_path = os.path.join(GUEST_IMAGE_DIR, new_filename)
-
                 try:
-                    shutil.copy(file_path, new_path)  #   Copy image to the correct directory
-                    cursor.execute("INSERT INTO GuestImages (guest_id, image_path) VALUES (?, ?)", (self.current_guest_id, new_filename))
-                    self.image_carousel.add_image_to_carousel(new_path, is_temporary=False)  #   Load into UI
+                    stored_path = store_image(conn, file_path)  #   Named by content, so uploads never collide
+                    cursor.execute("INSERT INTO GuestImages (guest_id, image_path) VALUES (?, ?)", (self.current_guest_id, stored_path))
+                    self.image_carousel.add_image_to_carousel(image_file(stored_path, GUEST_IMAGE_DIR), is_temporary=False)  #   Load into UI
                 except Exception as e:
                     QMessageBox.warning(self, "Error", f"Failed to save image: {str(e)}")
 
             conn.commit()
-            conn.close()
+            release_connection(conn)
 
             QMessageBox.information(self, "Success", f"{len(files)} images uploaded!")
 
@@ -360,11 +353,11 @@ class GuestManagement(QWidget):
     
     def load_guest_images(self, guest_id):
         """ Load and display guest images with delete buttons properly aligned """
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT id, image_path FROM GuestImages WHERE guest_id=?", (guest_id,))
         images = cursor.fetchall()
-        conn.close()
+        release_connection(conn)
 
         #   Clear existing images before adding new ones
         self.image_carousel.clear_images()
@@ -374,7 +367,7 @@ class GuestManagement(QWidget):
             return
 
         for image_id, image_filename in images:
-            image_path = os.path.join(GUEST_IMAGE_DIR, image_filename)
+            image_path = image_file(image_filename, GUEST_IMAGE_DIR)
 
             if os.path.exists(image_path):
                 #   Create image display container
@@ -400,9 +393,8 @@ class GuestManagement(QWidget):
 
                 #   Create Clickable Image Label
                 image_label = QLabel()
-                pixmap = QPixmap(image_path).scaled(200, 150, Qt.AspectRatioMode.KeepAspectRatio)
-                image_label.setPixmap(pixmap)
                 image_label.setFixedSize(200, 150)
+                get_thumbnail_cache().load_into(image_label, image_path, 200, 150)
                 image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
                 image_label.setCursor(Qt.CursorShape.PointingHandCursor)  
                 image_label.mousePressEvent = lambda event, img=image_path: self.view_image(img)  
@@ -428,7 +420,7 @@ class GuestManagement(QWidget):
         )
 
         if confirm == QMessageBox.StandardButton.Yes:
-            conn = sqlite3.connect("hotel_management.db")
+            conn = get_connection()
             cursor = conn.cursor()
             
             #   Get the image path before deleting
@@ -437,20 +429,14 @@ class GuestManagement(QWidget):
 
             if not image:
                 QMessageBox.warning(self, "Error", "Image not found!")
-                conn.close()
+                release_connection(conn)
                 return
 
-            image_path = image[0]
-
-            #   Delete the image from the database
+            #   Delete the image from the database, then the file once no other row uses it
             cursor.execute("DELETE FROM GuestImages WHERE id=?", (image_id,))
             conn.commit()
-            conn.close()
-
-            #   Remove the image file (Optional: Only if you want to delete the file from disk)
-            import os
-            if os.path.exists(image_path):
-                os.remove(image_path)
+            forget_images(conn, [image[0]], GUEST_IMAGE_DIR)
+            release_connection(conn)
 
             QMessageBox.information(self, "Success", "Image deleted successfully!")
             self.load_guest_images(self.current_guest_id)  # Refresh images
@@ -461,24 +447,19 @@ class GuestManagement(QWidget):
                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
 
         if confirm == QMessageBox.StandardButton.Yes:
-            conn = sqlite3.connect("hotel_management.db")
+            conn = get_connection()
             cursor = conn.cursor()
 
             #   Get Image Path Before Deleting
             cursor.execute("SELECT image_path FROM GuestImages WHERE id=?", (image_id,))
             image_path = cursor.fetchone()
 
-            if image_path:
-                try:
-                    import os
-                    os.remove(image_path[0])  #   Remove the physical file from storage
-                except FileNotFoundError:
-                    print("⚠️ Image file not found, but removing from database")
-
-            #   Delete from Database
+            #   Delete from Database, then the physical file if nothing else refers to it
             cursor.execute("DELETE FROM GuestImages WHERE id=?", (image_id,))
             conn.commit()
-            conn.close()
+            if image_path:
+                forget_images(conn, [image_path[0]], GUEST_IMAGE_DIR)
+            release_connection(conn)
 
             QMessageBox.information(self, "Success", "Image deleted successfully!")
             self.load_guest_images(self.current_guest_id)  
@@ -492,7 +473,7 @@ class GuestManagement(QWidget):
 
     def print_guest_details(self, guest_id):
         """ Show a pop-up with guest details including images """
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT name, contact, email FROM Guests WHERE id=?", (guest_id,))
         guest = cursor.fetchone()
@@ -507,7 +488,7 @@ class GuestManagement(QWidget):
         #   Load guest images from database
         cursor.execute("SELECT image_path FROM GuestImages WHERE guest_id=?", (guest_id,))
         images = [row[0] for row in cursor.fetchall()]
-        conn.close()
+        release_connection(conn)
 
         #   Open the pop-up window
         self.guest_preview_dialog = GuestPreviewDialog(guest_name, guest_contact, guest_email, images)
@@ -516,21 +497,22 @@ class GuestManagement(QWidget):
     ##Show gurest Hoistory
     def show_guest_history(self, guest_id):
         """ Show a popup dialog with the booking history of the selected guest, including total amount paid """
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
 
         cursor.execute("""
             SELECT B.id, R.room_number, B.check_in_date, B.check_out_date, 
                 B.payment_status, 
-                COALESCE((SELECT SUM(amount_paid) FROM Payments WHERE booking_id = B.id), 0) AS total_amount
+                COALESCE(bal.paid_total, 0) AS total_amount
             FROM GuestHistory B
             JOIN Rooms R ON B.room_id = R.id
+            LEFT JOIN BookingBalances bal ON bal.booking_id = B.id
             WHERE B.guest_id = ?
             ORDER BY B.check_in_date DESC
         """, (guest_id,))
         
         history_data = cursor.fetchall()
-        conn.close()
+        release_connection(conn)
 
         #   Create a pop-up dialog
         dialog = QDialog(self)
@@ -585,9 +567,14 @@ class GuestManagement(QWidget):
         self.add_guest_button.clicked.connect(self.add_guest)
         
     def refresh_guest_list(self):
-        """ Refresh the guest list and update the UI """
-        self.load_guests() 
-        self.clear_form()   
+        """ Bring the guest list up to date; only guests changed since the last visit are read again """
+        self.apply_changes()
+        self.clear_form()
+
+    def apply_changes(self):
+        """ Re-read changed guests, but only if a guest change was published (no change: no query) """
+        if self.dirty.take():
+            self.guest_model.refresh()   
 
 
 
@@ -7,12 +7,8 @@ from PyQt6.QtGui import QPixmap, QPainter, QFont, QPageLayout, QPageSize
 from PyQt6.QtPrintSupport import QPrinter
 from PyQt6.QtCore import Qt, QMarginsF
 
-
-#   Define Guest Image Directory
-GUEST_IMAGE_DIR = os.path.join(os.path.expanduser("~"), "Documents/hotel-room-images/guest_img")
-
-#   Ensure directory exists
-os.makedirs(GUEST_IMAGE_DIR, exist_ok=True)
+from util.image_store import GUEST_IMAGE_DIR, image_file
+from util.thumbnail_cache import get_thumbnail_cache
 
 
 class GuestPreviewDialog(QDialog):
@@ -60,8 +56,8 @@ class GuestPreviewDialog(QDialog):
 
             if os.path.exists(image_path):
                 image_label = QLabel()
-                pixmap = QPixmap(image_path).scaled(100, 80, Qt.AspectRatioMode.KeepAspectRatio)  # Slightly larger
-                image_label.setPixmap(pixmap)
+                image_label.setFixedSize(104, 84)  # Thumbnail plus the 2px padding
+                get_thumbnail_cache().load_into(image_label, image_path, 100, 80)  # Slightly larger
                 image_label.setStyleSheet("border: 1px solid gray; background-color: lightgray; padding: 2px;")
                 image_layout.addWidget(image_label)
             # else:
@@ -95,7 +91,7 @@ class GuestPreviewDialog(QDialog):
 
     def get_image_path(self, image_filename):
         """ Returns the absolute path for a guest image """
-        return os.path.join(GUEST_IMAGE_DIR, image_filename)
+        return image_file(image_filename, GUEST_IMAGE_DIR)
 
     def export_to_pdf(self):
         """ Export guest details as a PDF file """
@@ -0,0 +1,110 @@
+from util.change_tracking import change_seq
+from util.database import get_connection
+from util.lazy_table_model import LazyTableModel
+from util.search import search_guests
+
+GUEST_HEADERS = ["ID", "Name", "Contact", "Email", "Actions"]
+ACTIONS_COLUMN = 4
+
+#   More changed rows than this many pages since the last look: reload instead of patching
+RELOAD_AFTER_PAGES = 5
+
+
+class GuestTableModel(LazyTableModel):
+    """ Guest list (by id or by name) loaded one page at a time.
+
+    Loaded rows are kept when the page is left. refresh() re-reads only the guests
+    whose change_seq is newer than the last one seen, and nothing at all when the
+    Guests counter in ChangeSequence has not moved.
+    """
+
+    def __init__(self, page_size=200, parent=None):
+        super().__init__(GUEST_HEADERS, page_size, parent)
+        self.order = "id"
+        self.search_text = ""
+        self.synced_seq = None  #   ChangeSequence value the loaded rows reflect (None: nothing loaded yet)
+
+    def set_order(self, order):
+        """ Sort by "id" or "name" """
+        self.order = order
+        self.reload()
+
+    def set_search(self, text):
+        """ Show the best matches for `text` instead of the full list ("" shows all) """
+        self.search_text = text.strip()
+        self.reload()
+
+    def reload(self):
+        self.synced_seq = None
+        super().reload()
+
+    def sort_key(self, row):
+        return (row[1], row[0]) if self.order == "name" else row[0]
+
+    def fetch_page(self, after_row, limit):
+        conn = get_connection()
+        if self.synced_seq is None:
+            #   Read before the rows: a change that lands in between is simply applied twice
+            self.synced_seq = change_seq(conn, "Guests")
+
+        if self.search_text:
+            #   Ranked results come in one batch
+            return [] if after_row is not None else search_guests(conn, self.search_text, limit)
+
+        if self.order == "name":
+            last_name, last_id = (after_row[1], after_row[0]) if after_row else ("", 0)
+            return conn.execute("""
+                SELECT id, name, contact, email FROM Guests
+                WHERE (name, id) > (?, ?)
+                ORDER BY name, id
+                LIMIT ?
+            """, (last_name, last_id, limit)).fetchall()
+
+        return conn.execute("""
+            SELECT id, name, contact, email FROM Guests
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        """, (after_row[0] if after_row else 0, limit)).fetchall()
+
+    def refresh(self):
+        """ Apply guest inserts, edits and deletes made since the rows were loaded; returns the rows re-read """
+        if self.synced_seq is None:
+            return 0  #   Nothing loaded yet; the view fetches fresh pages anyway
+
+        conn = get_connection()
+        seq = change_seq(conn, "Guests")
+        if seq == self.synced_seq:
+            return 0
+
+        if self.search_text:
+            self.reload()  #   Edits can change the ranking, so search again
+            return 0
+
+        changed = conn.execute(
+            "SELECT id, name, contact, email FROM Guests WHERE change_seq > ?", (self.synced_seq,)
+        ).fetchall()
+        deleted = [row[0] for row in conn.execute(
+            "SELECT guest_id FROM GuestTombstones WHERE change_seq > ?", (self.synced_seq,)
+        )]
+        if len(changed) + len(deleted) > self.page_size * RELOAD_AFTER_PAGES:
+            self.reload()
+            return 0
+
+        for guest_id in deleted:
+            self.remove_key(guest_id)
+        for row in changed:
+            self.apply_row(row)
+        self.synced_seq = seq
+        return len(changed)
+
+    def display_value(self, row, column):
+        if column == 3:
+            return row[3] or "N/A"
+        if column == ACTIONS_COLUMN:
+            return None
+        return row[column]
+
+    def guest_id(self, row):
+        data = self.row_data(row)
+        return data[0] if data else None
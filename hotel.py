@@ -1,18 +1,34 @@
 
+import os
 import sys
+from util.startup_timer import startup_timer
 from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QStackedWidget, QLabel, QMessageBox, QFrame, QDialog, QSpacerItem, QSizePolicy
 from PyQt6.QtGui import QIcon
 from PyQt6.QtCore import QDateTime, QTimer
-from dashboardManagement.dashboard_management import DashboardManagement
 from loginManagement.login_management import LoginDialog
-from paymentManagement.payment_billing import PaymentBilling
-from reportManagement.report_management import ReportManagement
-from roomManagement.room_management import RoomManagement
-from bookingManagement.booking_management import BookingManagement
-from guestManagement.guest_management import GuestManagement
-from employeeManagement.employee_management import EmployeeManagement
 from PyQt6.QtCore import Qt
-import matplotlib.pyplot as plt
+from util.database import get_connection, print_stats
+from util.event_bus import get_event_bus
+from util.migrations import migrate
+
+#   Print where start-up time goes (imports vs. widget construction) when HOTEL_STARTUP_TIMING=1
+SHOW_STARTUP_TIMING = bool(os.environ.get("HOTEL_STARTUP_TIMING"))
+
+#   Pages are imported and built the first time they are opened and kept across logins:
+#   key -> (module, class, method that brings an already built page up to date, method that clears its form on logout)
+#   The refresh methods only touch what the page's DirtySet collected (see util.event_bus)
+PAGES = {
+    "dashboard": ("dashboardManagement.dashboard_management", "DashboardManagement", "load_dashboard_data", None),
+    "rooms": ("roomManagement.room_management", "RoomManagement", "refresh_room_list", "clear_form"),
+    "bookings": ("bookingManagement.booking_management", "BookingManagement", "refresh_data", "clear_form"),
+    "guests": ("guestManagement.guest_management", "GuestManagement", "refresh_guest_list", "clear_form"),
+    "payments": ("paymentManagement.payment_billing", "PaymentBilling", "refresh_data", "clear_form"),
+    "reports": ("reportManagement.report_management", "ReportManagement", "refresh_report", None),
+    "employees": ("employeeManagement.employee_management", "EmployeeManagement", "refresh_data", "clear_form"),
+}
+
+#   Pages only admins may open
+ADMIN_PAGES = {"employees"}
 
 class HotelManagement(QWidget):
     def __init__(self):
@@ -20,24 +36,24 @@ class HotelManagement(QWidget):
         self.setWindowTitle("Hotel Management System")
         self.setGeometry(100, 100, 1200, 700)
         self.setWindowIcon(QIcon("icons/paste.png"))
-        plt.ioff() 
 
         # Login Dialog
-        self.login_dialog = LoginDialog()
-        if self.login_dialog.exec() == QDialog.DialogCode.Accepted:
+        with startup_timer.measure("build", "LoginDialog"):
+            self.login_dialog = LoginDialog()
+        with startup_timer.measure("wait", "Login (user input)"):
+            accepted = self.login_dialog.exec() == QDialog.DialogCode.Accepted
+        if accepted:
             self.user_role = self.login_dialog.role
         else:
             sys.exit()
 
         self.initUI()
         self.init_timer()
+        get_event_bus().start_watching()  #   Notice writes from other terminals
         
 
     def initUI(self):
-        """ Initialize UI Layout """
-
-        if self.layout():
-            QWidget().setLayout(self.layout())  # Detach existing layout properly
+        """ Initialize UI Layout (built once; logging in again only rebuilds the sidebar) """
 
         main_layout = QVBoxLayout()
 
@@ -66,33 +82,32 @@ class HotelManagement(QWidget):
         self.sidebar.setMaximumWidth(220)  # Optional: Set max width
         self.sidebar.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Expanding)
 
-        sidebar_layout = QVBoxLayout(self.sidebar)
-        sidebar_layout.setContentsMargins(5, 5, 5, 5)
+        self.sidebar_layout = QVBoxLayout(self.sidebar)
+        self.sidebar_layout.setContentsMargins(5, 5, 5, 5)
 
         self.nav_buttons = []
         self.stacked_widget = QStackedWidget()
 
-        while self.stacked_widget.count() > 0:
-            widget = self.stacked_widget.widget(0)
-            self.stacked_widget.removeWidget(widget)
-            widget.deleteLater()  #   Prevent memory leak
-
-        # 📌 Pages
-        self.dashboard_page = DashboardManagement()
-        self.room_management_page = RoomManagement()
-        self.booking_management_page = BookingManagement()
-        self.guest_management_page = GuestManagement()
-        self.payment_billing_page = PaymentBilling()
-        self.employee_management_page = EmployeeManagement()
-        self.reports_analytics_page = ReportManagement()
-
-        #   Add Pages Based on Role
-        self.stacked_widget.addWidget(self.dashboard_page)
-        self.stacked_widget.addWidget(self.room_management_page)
-        self.stacked_widget.addWidget(self.booking_management_page)
-        self.stacked_widget.addWidget(self.guest_management_page)
-        self.stacked_widget.addWidget(self.payment_billing_page)
-        self.stacked_widget.addWidget(self.reports_analytics_page)
+        # 📌 Pages (only the dashboard is built now; the rest on first visit)
+        self.pages = {}
+        self.get_page("dashboard")
+
+        self.build_nav()
+
+        #   Add Sidebar & Main Content
+        content_layout.addWidget(self.sidebar)  # Sidebar stays fixed
+        content_layout.addWidget(self.stacked_widget, 5)  # Main content expands
+
+        main_layout.addLayout(content_layout)
+        self.setLayout(main_layout)
+
+    def build_nav(self):
+        """ (Re)create the sidebar buttons allowed for the current role """
+        while self.sidebar_layout.count():
+            item = self.sidebar_layout.takeAt(0)
+            if item.widget():
+                item.widget().deleteLater()
+        self.nav_buttons.clear()
 
         nav_items = [
             ("Dashboard", "icons/ic_dashboard.png", self.show_dashboard),
@@ -105,7 +120,6 @@ class HotelManagement(QWidget):
         ]
 
         if self.user_role == "admin":
-            self.stacked_widget.addWidget(self.employee_management_page)  #   Add Employee Management
             nav_items.insert(6, ("Employee Management", "icons/ic_user.png", self.show_employee_management))  #   Add to nav
 
         # 🖌️ Sidebar Button Style
@@ -130,18 +144,11 @@ class HotelManagement(QWidget):
             button.setIcon(QIcon(icon))
             button.setStyleSheet(button_style)
             button.clicked.connect(func)
-            sidebar_layout.addWidget(button)
+            self.sidebar_layout.addWidget(button)
             self.nav_buttons.append(button)
 
-        sidebar_layout.addStretch()
-        sidebar_layout.addSpacerItem(QSpacerItem(10, 40, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding))
-
-        #   Add Sidebar & Main Content
-        content_layout.addWidget(self.sidebar)  # Sidebar stays fixed
-        content_layout.addWidget(self.stacked_widget, 5)  # Main content expands
-
-        main_layout.addLayout(content_layout)
-        self.setLayout(main_layout)
+        self.sidebar_layout.addStretch()
+        self.sidebar_layout.addSpacerItem(QSpacerItem(10, 40, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding))
 
         #   Highlight the Dashboard button on first load
         self.highlight_selected_button(self.nav_buttons[0])
@@ -173,55 +180,70 @@ class HotelManagement(QWidget):
                 sys.exit()
 
     def reload_ui(self):
-        """ Reload the UI when a user logs in again with a new role. """
-        for i in reversed(range(self.stacked_widget.count())):
-            widget = self.stacked_widget.widget(i)
-            self.stacked_widget.removeWidget(widget)
-            widget.deleteLater()
+        """ Prepare the existing pages for the user who just logged in, without rebuilding them. """
+        #   Drop anything the previous user left half-typed
+        for key, page in self.pages.items():
+            reset = PAGES[key][3]
+            if reset:
+                getattr(page, reset)()
+
+        #   Pages the new role may not see are discarded, not just hidden
+        for key in [key for key in self.pages if key in ADMIN_PAGES and self.user_role != "admin"]:
+            page = self.pages.pop(key)
+            self.stacked_widget.removeWidget(page)
+            page.deleteLater()
+
+        self.build_nav()
+        self.show_dashboard()  #   Cheap: one counters row plus today's check-ins/outs
 
-        for button in self.nav_buttons:
-            button.deleteLater()
-        self.nav_buttons.clear()
+    ### 📌 Navigation Functions ###
 
-        self.initUI()
+    def get_page(self, key):
+        """ Return (page, created): import and build the page on first use """
+        page = self.pages.get(key)
+        if page is not None:
+            return page, False
+
+        module_name, class_name, _, _ = PAGES[key]
+        module = startup_timer.import_module(module_name)
+        with startup_timer.measure("build", class_name):
+            page = getattr(module, class_name)()
+        if SHOW_STARTUP_TIMING and startup_timer.reported:
+            import_step, build_step = startup_timer.steps[-2:]
+            print(f"⏱️ {class_name} first opened: import {import_step[2] * 1000:.1f} ms, build {build_step[2] * 1000:.1f} ms")
+
+        self.pages[key] = page
+        self.stacked_widget.addWidget(page)
+        return page, True
+
+    def show_page(self, key, button_index):
+        """ Switch to a page; pages built just now already hold fresh data """
+        page, created = self.get_page(key)
+        if not created:
+            getattr(page, PAGES[key][2])()
+        self.stacked_widget.setCurrentWidget(page)
+        self.highlight_selected_button(self.nav_buttons[button_index])
 
-    ### 📌 Navigation Functions ###
-    
     def show_dashboard(self):
-        self.dashboard_page.load_dashboard_data() 
-        self.stacked_widget.setCurrentWidget(self.dashboard_page)
-        self.highlight_selected_button(self.nav_buttons[0]) 
-
+        self.show_page("dashboard", 0)
 
     def show_booking_management(self):
-        self.booking_management_page.refresh_data()
-        self.stacked_widget.setCurrentWidget(self.booking_management_page)
-        self.highlight_selected_button(self.nav_buttons[1])
+        self.show_page("bookings", 1)
 
     def show_room_management(self):
-        self.room_management_page.refresh_room_list()
-        self.stacked_widget.setCurrentWidget(self.room_management_page)
-        self.highlight_selected_button(self.nav_buttons[2])
+        self.show_page("rooms", 2)
 
     def show_guest_management(self):
-        self.guest_management_page.refresh_guest_list()
-        self.stacked_widget.setCurrentWidget(self.guest_management_page)
-        self.highlight_selected_button(self.nav_buttons[3])
+        self.show_page("guests", 3)
 
     def show_payment_billing(self):
-        self.payment_billing_page.refresh_data()
-        self.stacked_widget.setCurrentWidget(self.payment_billing_page)
-        self.highlight_selected_button(self.nav_buttons[4])
+        self.show_page("payments", 4)
 
     def show_reports_analytics(self):
-        self.reports_analytics_page.refresh_report()
-        self.stacked_widget.setCurrentWidget(self.reports_analytics_page)
-        self.highlight_selected_button(self.nav_buttons[5])
+        self.show_page("reports", 5)
 
     def show_employee_management(self):
-        self.employee_management_page.refresh_data()
-        self.stacked_widget.setCurrentWidget(self.employee_management_page)
-        self.highlight_selected_button(self.nav_buttons[6])
+        self.show_page("employees", 6)
 
     def highlight_selected_button(self, selected_button):
         """ Update sidebar button styles to highlight the active button """
@@ -266,6 +288,14 @@ class HotelManagement(QWidget):
 if __name__ == "__main__":
     app = QApplication([])
     app.setWindowIcon(QIcon("icons/paste.png"))
+    with startup_timer.measure("build", "Schema migrations"):
+        migrate(get_connection())  #   Upgrade databases created by older versions in place
     window = HotelManagement()
     window.show()
+    if SHOW_STARTUP_TIMING:
+        QTimer.singleShot(0, startup_timer.report)  #   Once the first frame has been drawn
     app.exec()
+
+    #   Print connection/query timings when HOTEL_DB_STATS=1
+    if os.environ.get("HOTEL_DB_STATS"):
+        print_stats()
@@ -5,7 +5,7 @@ from PyQt6.QtGui import QFont, QPixmap, QIcon
 from PyQt6.QtCore import Qt
 from util.custom_input import CustomInput
 from util.custom_btn import CustomButton
-import sqlite3
+from util.database import get_connection, release_connection
 import os
 
 
@@ -107,11 +107,11 @@ class LoginDialog(QDialog):
         username = self.username_input.text().strip()
         password = self.password_input.text().strip()
 
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT role FROM Employees WHERE username=? AND password=?", (username, password))
         user = cursor.fetchone()
-        conn.close()
+        release_connection(conn)
 
         if user:
             self.accept()  #   Close login dialog and allow access
@@ -0,0 +1,81 @@
+""" Per-booking paid totals kept next to Payments by triggers.
+
+BookingBalances holds one row per booking that has payments, so screens read the
+amount paid (and remaining balance) with a primary-key lookup instead of summing
+Payments for every row.
+
+Check or repair the ledger from the project root:
+    python -m paymentManagement.balance_ledger             # report mismatches
+    python -m paymentManagement.balance_ledger --rebuild   # recompute from Payments
+"""
+import argparse
+
+from util.database import get_connection, release_connection
+
+#   Amounts are REAL; anything closer than half a cent counts as equal
+TOLERANCE = 0.005
+
+#   Ledger rows that disagree with Payments (either side may be missing)
+MISMATCH_QUERY = """
+    WITH actual AS (
+        SELECT booking_id, SUM(amount_paid) AS paid_total, COUNT(*) AS payment_count
+        FROM Payments
+        GROUP BY booking_id
+    )
+    SELECT a.booking_id, IFNULL(l.paid_total, 0), a.paid_total
+    FROM actual a
+    LEFT JOIN BookingBalances l ON l.booking_id = a.booking_id
+    WHERE l.booking_id IS NULL
+        OR ABS(l.paid_total - a.paid_total) > ?
+        OR l.payment_count != a.payment_count
+    UNION ALL
+    SELECT l.booking_id, l.paid_total, 0
+    FROM BookingBalances l
+    WHERE l.payment_count != 0
+        AND NOT EXISTS (SELECT 1 FROM Payments p WHERE p.booking_id = l.booking_id)
+"""
+
+
+def rebuild_balance_ledger(conn):
+    """ Recompute every paid total from Payments in one transaction """
+    with conn:
+        conn.execute("DELETE FROM BookingBalances")
+        conn.execute("""
+            INSERT INTO BookingBalances (booking_id, paid_total, payment_count)
+            SELECT booking_id, SUM(amount_paid), COUNT(*)
+            FROM Payments
+            GROUP BY booking_id
+        """)
+
+
+def check_balance_ledger(conn):
+    """ [(booking_id, ledger_paid_total, actual_paid_total)] for every booking that is out of step """
+    return conn.execute(MISMATCH_QUERY, (TOLERANCE,)).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check or rebuild the BookingBalances ledger")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the ledger from Payments")
+    args = parser.parse_args()
+
+    from util.migrations import migrate
+
+    conn = get_connection()
+    migrate(conn)
+    mismatches = check_balance_ledger(conn)
+    for booking_id, ledger_paid, actual_paid in mismatches:
+        print(f"⚠️ Booking {booking_id}: ledger ${ledger_paid:.2f}, payments ${actual_paid:.2f}")
+
+    if not mismatches:
+        print("  Ledger matches Payments.")
+    elif args.rebuild:
+        rebuild_balance_ledger(conn)
+        print(f"  Rebuilt ledger ({len(mismatches)} bookings corrected).")
+    else:
+        print(f"{len(mismatches)} bookings out of step; run with --rebuild to repair.")
+    release_connection(conn)
+    return 1 if mismatches and not args.rebuild else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,211 @@
+""" PDF invoice rendering shared by the Payments page and month-end batch runs.
+
+All room lookups are resolved with one batched query, tables split across pages
+with the header repeated, and every invoice gets its own file name. No Qt here, so
+batches run in a process pool:
+    python -m paymentManagement.invoice_engine --from 2025-01-01 --to 2025-01-31
+    python -m paymentManagement.invoice_engine --from 2025-01-01 --to 2025-01-31 --workers 8 --out /tmp/invoices
+"""
+import argparse
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import LongTable, Paragraph, SimpleDocTemplate, Spacer, TableStyle
+
+from util.database import get_connection, release_connection
+
+INVOICE_DIR = os.environ.get(
+    "HOTEL_INVOICE_DIR", os.path.join(os.path.expanduser("~"), "documents/hotel-invoices")
+)
+
+HEADER = ["B.ID", "Guest", "Room", "Room Type", "Check-in", "In Time", "Check-out", "Out Time", "Room Price", "Remain"]
+COLUMN_WIDTHS = [50, 100, 40, 70, 55, 45, 55, 45, 60, 60]
+
+#   SQLite allows 999 bound parameters per statement on older builds
+LOOKUP_CHUNK = 500
+
+#   One row per booking, grouped into one invoice per guest by the batch run
+BATCH_QUERY = """
+    SELECT b.id, g.id, g.name, TRIM(r.room_number), r.room_type, r.base_price,
+        b.check_in_date, IFNULL(b.check_in_time, '12:00'),
+        b.check_out_date, IFNULL(b.check_out_time, '10:00'),
+        (bd.calculated_price - IFNULL(bal.paid_total, 0))
+    FROM Bookings b
+    JOIN Guests g ON b.guest_id = g.id
+    JOIN Rooms r ON b.room_id = r.id
+    JOIN BookingDetails bd ON b.id = bd.booking_id
+    LEFT JOIN BookingBalances bal ON bal.booking_id = b.id
+    WHERE b.check_out_date BETWEEN ? AND ?
+    ORDER BY g.id, b.check_in_date, b.id
+"""
+
+
+def lookup_rooms(conn, room_numbers):
+    """ {trimmed room number: (room_type, base_price)} with one query per LOOKUP_CHUNK rooms """
+    room_numbers = sorted({str(number).strip() for number in room_numbers})
+    rooms = {}
+    for start in range(0, len(room_numbers), LOOKUP_CHUNK):
+        chunk = room_numbers[start:start + LOOKUP_CHUNK]
+        rows = conn.execute(
+            f"SELECT TRIM(room_number), room_type, base_price FROM Rooms "
+            f"WHERE TRIM(room_number) IN ({', '.join('?' * len(chunk))})",
+            chunk,
+        ).fetchall()
+        for number, room_type, base_price in rows:
+            rooms[number] = (room_type, base_price)
+    return rooms
+
+
+def invoice_rows(selected_rooms, rooms=None):
+    """ (table rows, total remaining) for {booking_id: details} as kept by the Payments page """
+    rooms = rooms or {}
+    rows = []
+    total_price = 0
+    for booking_id, details in selected_rooms.items():
+        room_number = str(details["room"]).strip()
+        known_type, known_price = rooms.get(room_number, (None, None))
+
+        room_type = details.get("room_type", "Unknown")
+        if room_type == "Unknown":
+            room_type = known_type.strip() if known_type else "Unknown"
+
+        room_price = details.get("room_price", "--")
+        if room_price == "--":
+            room_price = float(known_price) if known_price else 0.0
+
+        remaining_balance = details["price"]
+        rows.append([
+            booking_id,
+            details["guest"],
+            details["room"],
+            room_type,
+            details["check_in"],
+            details["check_in_time"],
+            details["check_out"],
+            details["check_out_time"],
+            f"${room_price:.2f}",
+            "PAID" if remaining_balance == 0 else f"${remaining_balance:.2f}",
+        ])
+        total_price += remaining_balance
+    return rows, total_price
+
+
+def invoice_path(booking_ids, directory=INVOICE_DIR):
+    """ Unique file name that still says which bookings the invoice covers """
+    booking_ids = [str(booking_id) for booking_id in booking_ids]
+    span = booking_ids[0] if len(booking_ids) == 1 else f"{booking_ids[0]}-{booking_ids[-1]}"
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(directory, f"invoice_{span}_{stamp}_{uuid.uuid4().hex[:8]}.pdf")
+
+
+def render_invoice(job):
+    """ Write one invoice PDF; `job` is (path, rows, total) so it can be sent to a worker process """
+    path, rows, total_price = job
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    data = [HEADER] + rows + [["", "", "", "", "", "", "", "", "Total:", f"${total_price:.2f}"]]
+    total_row = len(data) - 1  #   Positive index: negative ones would restyle the last row of every page
+
+    table = LongTable(data, colWidths=COLUMN_WIDTHS, repeatRows=1)
+    table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.black),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("GRID", (0, 0), (-1, -1), 1, colors.white),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica"),
+        ("FONTSIZE", (0, 0), (-1, 0), 9),
+        ("BACKGROUND", (0, 1), (-1, total_row), colors.grey),
+        ("TEXTCOLOR", (0, 1), (-1, total_row), colors.black),
+        ("FONTNAME", (0, 1), (-1, total_row), "Helvetica"),
+        ("FONTSIZE", (0, 1), (-1, total_row), 8),
+        ("FONTSIZE", (-2, total_row), (-1, total_row), 9),
+        ("BACKGROUND", (-2, total_row), (-1, total_row), colors.lightgrey),
+    ]))
+
+    title_style = ParagraphStyle(name="Title", fontSize=18, alignment=1)
+    elements = [Paragraph("Invoice", title_style), Spacer(1, 13), table, Spacer(1, 12)]
+
+    #   Build next to the target and rename, so a reader never sees half a PDF
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    SimpleDocTemplate(temporary_path, pagesize=A4, leftMargin=50, rightMargin=50).build(elements)
+    os.replace(temporary_path, path)
+    return path
+
+
+def generate_invoice_file(selected_rooms, directory=INVOICE_DIR):
+    """ Render the invoice for the Payments page selection and return its path """
+    missing = [
+        details["room"] for details in selected_rooms.values()
+        if details.get("room_type", "Unknown") == "Unknown" or details.get("room_price", "--") == "--"
+    ]
+    rooms = {}
+    if missing:
+        conn = get_connection()
+        rooms = lookup_rooms(conn, missing)
+        release_connection(conn)
+
+    rows, total_price = invoice_rows(selected_rooms, rooms)
+    return render_invoice((invoice_path(list(selected_rooms), directory), rows, total_price))
+
+
+def batch_jobs(conn, date_from, date_to, directory=INVOICE_DIR):
+    """ One (path, rows, total) job per guest with a check-out between the two dates """
+    guests = {}
+    for (booking_id, guest_id, guest, room, room_type, base_price,
+         check_in, check_in_time, check_out, check_out_time, remaining) in conn.execute(BATCH_QUERY, (date_from, date_to)):
+        guests.setdefault(guest_id, {})[booking_id] = {
+            "guest": guest,
+            "room": room,
+            "room_type": room_type.strip() if room_type else "Unknown",
+            "room_price": float(base_price or 0),
+            "price": remaining,
+            "check_in": check_in,
+            "check_in_time": check_in_time,
+            "check_out": check_out,
+            "check_out_time": check_out_time,
+        }
+
+    jobs = []
+    for selected_rooms in guests.values():
+        rows, total_price = invoice_rows(selected_rooms)
+        jobs.append((invoice_path(list(selected_rooms), directory), rows, total_price))
+    return jobs
+
+
+def generate_batch(jobs, workers=None):
+    """ Render every job in a process pool; returns the written paths """
+    if workers == 1 or len(jobs) < 2:
+        return [render_invoice(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render_invoice, jobs, chunksize=4))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate one invoice per guest for a check-out date range")
+    parser.add_argument("--from", dest="date_from", required=True, help="First check-out date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", required=True, help="Last check-out date (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--out", default=INVOICE_DIR, help="Output folder")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    jobs = batch_jobs(conn, args.date_from, args.date_to, args.out)
+    release_connection(conn)
+    if not jobs:
+        print("  No bookings check out in that range.")
+        return 0
+
+    start = time.perf_counter()
+    paths = generate_batch(jobs, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"  {len(paths)} invoices in {elapsed:.2f} s ({len(paths) / elapsed:.1f} invoices/sec) -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,171 @@
+""" Split one payment across several bookings in a single transaction.
+
+pay_all_bookings() used to run a balance SELECT, a Payments INSERT and two status
+UPDATEs per booking (about 160 statements for a 40-room group checkout). Here every
+balance is read with one query, the split is computed in Python, and all rows are
+written with executemany inside one transaction: either every booking is paid or
+none is.
+
+Compare with the old per-booking loop on a throwaway database:
+    python -m paymentManagement.payment_allocation --sizes 1 10 40 100 500
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from paymentManagement.balance_ledger import TOLERANCE
+from util.database import begin_immediate
+
+#   Selections larger than this are read in several IN (...) chunks
+BALANCE_CHUNK = 500
+
+
+class AllocationError(Exception):
+    """ The payment cannot be applied (unknown booking, bad amount or overpayment); nothing was written """
+
+
+def read_balances(conn, booking_ids):
+    """ {booking_id: remaining balance} for the given bookings, one query per BALANCE_CHUNK ids """
+    balances = {}
+    for start in range(0, len(booking_ids), BALANCE_CHUNK):
+        chunk = booking_ids[start:start + BALANCE_CHUNK]
+        rows = conn.execute(f"""
+            SELECT bd.booking_id, (bd.calculated_price - IFNULL(bal.paid_total, 0))
+            FROM BookingDetails bd
+            LEFT JOIN BookingBalances bal ON bal.booking_id = bd.booking_id
+            WHERE bd.booking_id IN ({', '.join('?' * len(chunk))})
+        """, chunk).fetchall()
+        balances.update(rows)
+    return balances
+
+
+def allocate(booking_ids, balances, amount):
+    """ [(booking_id, payment, new_status)] paying bookings in selection order until `amount` is used up """
+    if amount <= 0:
+        raise AllocationError("Invalid payment amount!")
+
+    missing = [booking_id for booking_id in booking_ids if booking_id not in balances]
+    if missing:
+        raise AllocationError(f"Booking ID {missing[0]} not found!")
+
+    #   Prevent Overpayment
+    if amount > sum(balances[booking_id] for booking_id in booking_ids) + TOLERANCE:
+        raise AllocationError("Payment exceeds total remaining balance for selected bookings!")
+
+    allocations = []
+    remaining_amount = amount
+    for booking_id in booking_ids:
+        if remaining_amount <= 0:
+            break
+        remaining_balance = balances[booking_id]
+        payment_amount = min(remaining_balance, remaining_amount)
+        new_status = "PAID" if remaining_balance - payment_amount <= TOLERANCE else "HALF PAID"
+        allocations.append((booking_id, payment_amount, new_status))
+        remaining_amount -= payment_amount
+    return allocations
+
+
+def apply_payment(conn, booking_ids, amount, payment_method):
+    """ Record `amount` against the bookings (in order) as one transaction; returns the allocations.
+
+    Raises AllocationError, with nothing written, if the payment does not fit, and
+    sqlite3.ProgrammingError if `conn` is already in a transaction.
+    """
+    booking_ids = list(dict.fromkeys(int(booking_id) for booking_id in booking_ids))
+    begin_immediate(conn)  #   Balances cannot change between the read and the writes
+    try:
+        allocations = allocate(booking_ids, read_balances(conn, booking_ids), amount)
+        conn.executemany("""
+            INSERT INTO Payments (booking_id, amount_paid, payment_method, payment_date)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        """, [(booking_id, payment, payment_method) for booking_id, payment, _ in allocations])
+        #   update_booking_details copies payment_status to BookingDetails
+        conn.executemany(
+            "UPDATE Bookings SET payment_status = ? WHERE id = ?",
+            [(status, booking_id) for booking_id, _, status in allocations],
+        )
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    return allocations
+
+
+def legacy_apply_payment(conn, booking_ids, amount, payment_method):
+    """ The old per-booking statements, kept only for the benchmark """
+    cursor = conn.cursor()
+    details = []
+    for booking_id in booking_ids:
+        cursor.execute("""
+            SELECT bd.calculated_price, (bd.calculated_price - IFNULL(bal.paid_total, 0))
+            FROM BookingDetails bd
+            LEFT JOIN BookingBalances bal ON bal.booking_id = bd.booking_id
+            WHERE bd.booking_id = ?
+        """, (booking_id,))
+        details.append((booking_id, cursor.fetchone()[1]))
+
+    remaining_amount = amount
+    for booking_id, remaining_balance in details:
+        if remaining_amount <= 0:
+            break
+        payment_amount = min(remaining_balance, remaining_amount)
+        cursor.execute("""
+            INSERT INTO Payments (booking_id, amount_paid, payment_method, payment_date)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        """, (booking_id, payment_amount, payment_method))
+        new_status = "PAID" if remaining_balance - payment_amount == 0 else "HALF PAID"
+        cursor.execute("UPDATE BookingDetails SET payment_status = ? WHERE booking_id = ?", (new_status, booking_id))
+        cursor.execute("UPDATE Bookings SET payment_status = ? WHERE id = ?", (new_status, booking_id))
+        remaining_amount -= payment_amount
+    conn.commit()
+
+
+def build_benchmark_db(path, bookings):
+    from util.database import open_connection
+    from util.migrations import migrate
+
+    conn = open_connection(path)
+    migrate(conn)
+    conn.execute("INSERT INTO Guests (name, contact) VALUES ('Group', '0')")
+    conn.executemany(
+        "INSERT INTO Rooms (room_number, room_type, capacity, base_price) VALUES (?, 'Double', 2, 1.0)",
+        [(str(number),) for number in range(bookings)],
+    )
+    conn.executemany("""
+        INSERT INTO Bookings (guest_id, room_id, check_in_date, check_out_date, price_type, payment_status, status)
+        VALUES (1, ?, '2025-01-01', '2025-01-02', 'Normal', 'PENDING', 'BOOKING')
+    """, [(room_id,) for room_id in range(1, bookings + 1)])
+    conn.commit()
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk payment allocation against the per-booking loop")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 40, 100, 250, 500], help="Group sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Payments per size and method")
+    args = parser.parse_args()
+
+    #   Every payment settles its own fresh bookings in full (each owes 1.00)
+    bookings = sum(args.sizes) * args.repeat * 2
+    with tempfile.TemporaryDirectory() as directory:
+        conn = build_benchmark_db(os.path.join(directory, "allocation.db"), bookings)
+        print(f"  {'group':>6} {'per-booking':>12} {'bulk':>10} {'speed-up':>9}")
+        next_id = 1
+        for size in args.sizes:
+            timings = []
+            for pay in (legacy_apply_payment, apply_payment):
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    pay(conn, list(range(next_id, next_id + size)), float(size), "Cash")
+                    next_id += size
+                timings.append((time.perf_counter() - start) / args.repeat)
+            legacy, bulk = timings
+            print(f"  {size:>6} {legacy * 1000:>10.2f}ms {bulk * 1000:>8.2f}ms {legacy / bulk:>8.1f}x")
+        unpaid = conn.execute("SELECT COUNT(*) FROM BookingDetails WHERE payment_status != 'PAID'").fetchone()[0]
+        print(f"  {bookings - unpaid}/{bookings} bookings marked PAID")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
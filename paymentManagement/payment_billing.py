@@ -1,25 +1,105 @@
-import sqlite3
+from util.database import get_connection, release_connection
 from PyQt6.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
     QHBoxLayout, QFrame, QMessageBox, QComboBox, QLineEdit,QListWidget
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QDate, QTimer, QThreadPool
 from PyQt6.QtGui import QIcon
 
 from util.custom_btn import CustomButton
 from util.custom_input import CustomInput
 from util.custom_label_title import CustomLabelTitle
-from .generate_invoice import generate_invoice
-from paymentManagement.generate_qr_payment import generate_qr_payment
-from util.qr_dialog import QRCodeDialog
+from util.event_bus import DirtySet, get_event_bus
+from util.worker import Worker
+from util.search import SEARCH_DEBOUNCE_MS, booking_filter
+from paymentManagement.payment_allocation import AllocationError, apply_payment
+import os
 import time
 
+#   Request the KHQR code for the selection total in the background while the cashier is still selecting.
+#   Off unless HOTEL_KHQR_PREFETCH=1: every prefetch creates an order at the bank, paid or not
+QR_PREFETCH = os.environ.get("HOTEL_KHQR_PREFETCH", "0") == "1"
+QR_PREFETCH_DELAY_MS = 400
+QR_CURRENCY = "USD"
+
+
+def prefetch_qr(generation, amount, currency):
+    """ Runs on a worker thread: (generation, {amount, currency, order_no, image, created}) """
+    #   Imported on demand: requests is only needed for KHQR payments
+    from paymentManagement.payment_gateway import get_gateway_client, new_order_no
+
+    order_no = new_order_no()
+    image = get_gateway_client().request_qr(amount, currency, order_no)
+    return generation, {
+        "amount": amount, "currency": currency, "order_no": order_no, "image": image, "created": time.monotonic()
+    }
+
+
+def payment_grid_query(selected_filter, search_text, extra_condition=None, extra_params=()):
+    """ (SQL, params) for the grid rows: the last 30 days under a status filter ("All", "Paid", "Unpaid") and search """
+    #   Base SQL query
+    sql_query = """
+        SELECT b.id, g.name, r.room_number, b.check_in_date, 
+            IFNULL(b.check_in_time, '12:00') AS check_in_time,  
+            b.check_out_date, 
+            IFNULL(b.check_out_time, '10:00') AS check_out_time, 
+            r.base_price, 
+            (bd.calculated_price - IFNULL(bal.paid_total, 0)) AS remaining_balance,
+            b.payment_status
+        FROM Bookings b
+        JOIN Guests g ON b.guest_id = g.id
+        JOIN Rooms r ON b.room_id = r.id
+        JOIN BookingDetails bd ON b.id = bd.booking_id
+        LEFT JOIN BookingBalances bal ON bal.booking_id = b.id
+        WHERE b.check_in_date >= DATE('now', '-30 days')
+    """
+    
+    params = []
+
+    #   Apply Payment Status Filter
+    if selected_filter == "Paid":
+        sql_query += " AND b.payment_status = 'PAID'"
+    elif selected_filter == "Unpaid":
+        sql_query += " AND b.payment_status IN ('PENDING', 'HALF PAID')"
+
+    #   Apply Search Filter (full-text index on guest name/contact/email and room number, or the booking ID)
+    search_condition, search_params = booking_filter(search_text)
+    if search_condition:
+        sql_query += f" AND {search_condition}"
+        params.extend(search_params)
+
+    if extra_condition:
+        sql_query += f" AND {extra_condition}"
+        params.extend(extra_params)
+
+    sql_query += " ORDER BY b.check_in_date DESC"
+    return sql_query, params
+
+
 class PaymentBilling(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Payment Billing Management")
         self.setGeometry(100, 100, 1000, 600)
         self.selected_rooms = {}
+        self.prefetched_qr = None  #   QR requested ahead of "Pay" for the selection total
+        self.qr_generation = 0  #   Bumped per prefetch; older results are dropped
+
+        self.qr_prefetch_timer = QTimer(self)
+        self.qr_prefetch_timer.setSingleShot(True)
+        self.qr_prefetch_timer.setInterval(QR_PREFETCH_DELAY_MS)
+        self.qr_prefetch_timer.timeout.connect(self.start_qr_prefetch)
+
+        #   Typing restarts the timer; the grid reloads once the cashier pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.load_payments)
+
+        #   "payments" ids are booking ids (the bookings whose payments changed)
+        self.dirty = DirtySet(["bookings", "payments", "guests", "rooms"], self)
+        self.loaded_day = None  #   The grid shows the last 30 days as of this date
+
         self.initUI()
 
     def initUI(self):
@@ -40,7 +120,7 @@ class PaymentBilling(QWidget):
         #   Search Input
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search by Guest, Room, or Booking ID")
-        self.search_input.textChanged.connect(self.load_payments)
+        self.search_input.textChanged.connect(self.schedule_search)
         search_filter_layout.addWidget(self.search_input)
 
         #   Filter Label (Title)
@@ -95,6 +175,7 @@ class PaymentBilling(QWidget):
 
         self.payment_method_input = QComboBox()
         self.payment_method_input.addItems(["Cash", "KHQR"])
+        self.payment_method_input.currentIndexChanged.connect(self.schedule_qr_prefetch)
         form_layout.addWidget(CustomLabelTitle("Payment Method:"))
         form_layout.addWidget(self.payment_method_input)
 
@@ -124,6 +205,7 @@ class PaymentBilling(QWidget):
             return
 
         # Generate PDF invoice
+        from paymentManagement.generate_invoice import generate_invoice  #   Imported on demand: reportlab is slow to load
         generate_invoice(self.selected_rooms)
     
     def update_selected_rooms(self, row, column):
@@ -135,11 +217,11 @@ class PaymentBilling(QWidget):
             room_number = self.payment_table.item(row, 3).text().strip()  # Room Number
 
             #   Fetch `room_type` and `room_price` from Database using `room_number`
-            conn = sqlite3.connect("hotel_management.db")
+            conn = get_connection()
             cursor = conn.cursor()
             cursor.execute("SELECT room_type, base_price FROM Rooms WHERE TRIM(room_number) = ?", (room_number,))
             room_data = cursor.fetchone()
-            conn.close()
+            release_connection(conn)
 
             #   Ensure room_type and room_price are assigned properly
             room_type = room_data[0].strip() if room_data and room_data[0] else "Unknown"
@@ -179,6 +261,10 @@ class PaymentBilling(QWidget):
 
 
 
+    def schedule_search(self):
+        """ Restart the debounce window; only the last keystroke in a burst reloads the grid """
+        self.search_timer.start()
+
     def load_payments(self):
         """ Load payments from the database into the table with search functionality and filter options """
         
@@ -189,47 +275,13 @@ class PaymentBilling(QWidget):
         self.amount_paid_input.clear()
 
 
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
-
-        search_text = self.search_input.text().strip()
-        selected_filter = self.payment_filter.currentText()  #   Get Selected Filter
-
-        #   Base SQL query
-        sql_query = """
-            SELECT b.id, g.name, r.room_number, b.check_in_date, 
-                IFNULL(b.check_in_time, '12:00') AS check_in_time,  
-                b.check_out_date, 
-                IFNULL(b.check_out_time, '10:00') AS check_out_time, 
-                r.base_price, 
-                (bd.calculated_price - IFNULL((SELECT SUM(amount_paid) FROM Payments WHERE booking_id = b.id), 0)) AS remaining_balance,
-                b.payment_status
-            FROM Bookings b
-            JOIN Guests g ON b.guest_id = g.id
-            JOIN Rooms r ON b.room_id = r.id
-            JOIN BookingDetails bd ON b.id = bd.booking_id
-            WHERE b.check_in_date >= DATE('now', '-30 days')
-        """
-        
-        params = []
-
-        #   Apply Payment Status Filter
-        if selected_filter == "Paid":
-            sql_query += " AND b.payment_status = 'PAID'"
-        elif selected_filter == "Unpaid":
-            sql_query += " AND b.payment_status IN ('PENDING', 'HALF PAID')"
-
-        #   Apply Search Filter
-        if search_text:
-            sql_query += " AND (g.name LIKE ? OR r.room_number LIKE ? OR b.id LIKE ?)"
-            params.extend([f"%{search_text}%", f"%{search_text}%", f"%{search_text}%"])
-
-        sql_query += " ORDER BY b.check_in_date DESC"
-
-        #   Execute Query
+        sql_query, params = self.payment_query()
         cursor.execute(sql_query, params)
         payments = cursor.fetchall()
-        conn.close()
+        release_connection(conn)
+        self.loaded_day = QDate.currentDate()
 
         #   Populate the Table
         self.payment_table.clearContents()
@@ -247,22 +299,83 @@ class PaymentBilling(QWidget):
             self.payment_table.setColumnWidth(i, width)
 
         #   Loop Through Data and Populate Table
-        for row_idx, (booking_id, guest, room, check_in, check_in_time, check_out, check_out_time, room_price, remaining_balance, payment_status) in enumerate(payments):
+        for row_idx, payment in enumerate(payments):
+            self.fill_payment_row(row_idx, payment)
+
+    def payment_query(self, extra_condition=None, extra_params=()):
+        """ (SQL, params) for the grid rows under the current filter and search, optionally narrowed further """
+        return payment_grid_query(self.payment_filter.currentText(), self.search_input.text().strip(),
+                                  extra_condition, extra_params)
+
+    def fill_payment_row(self, row_idx, payment):
+        """ Write one grid row; a row that already has a checkbox keeps it (and its state) """
+        booking_id, guest, room, check_in, check_in_time, check_out, check_out_time, room_price, remaining_balance, payment_status = payment
+        if self.payment_table.item(row_idx, 0) is None:
             check_box = QTableWidgetItem()
             check_box.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled)
             check_box.setCheckState(Qt.CheckState.Unchecked)  #   Ensure Unchecked
             self.payment_table.setItem(row_idx, 0, check_box)
 
-            self.payment_table.setItem(row_idx, 1, QTableWidgetItem(str(booking_id)))  # Booking ID
-            self.payment_table.setItem(row_idx, 2, QTableWidgetItem(guest))  # Guest Name
-            self.payment_table.setItem(row_idx, 3, QTableWidgetItem(str(room)))  # Room Number
-            self.payment_table.setItem(row_idx, 4, QTableWidgetItem(f"${room_price:.2f}"))  #   Room Price
-            self.payment_table.setItem(row_idx, 5, QTableWidgetItem(check_in))  # Check-in Date
-            self.payment_table.setItem(row_idx, 6, QTableWidgetItem(check_in_time))  #   Check-in Time
-            self.payment_table.setItem(row_idx, 7, QTableWidgetItem(check_out))  # Check-out Date
-            self.payment_table.setItem(row_idx, 8, QTableWidgetItem(check_out_time))  #   Check-out Time
-            self.payment_table.setItem(row_idx, 9, QTableWidgetItem(f"${remaining_balance:.2f}"))  #   Remaining Balance
-            self.payment_table.setItem(row_idx, 10, QTableWidgetItem(payment_status))  # Payment Status
+        self.payment_table.setItem(row_idx, 1, QTableWidgetItem(str(booking_id)))  # Booking ID
+        self.payment_table.setItem(row_idx, 2, QTableWidgetItem(guest))  # Guest Name
+        self.payment_table.setItem(row_idx, 3, QTableWidgetItem(str(room)))  # Room Number
+        self.payment_table.setItem(row_idx, 4, QTableWidgetItem(f"${room_price:.2f}"))  #   Room Price
+        self.payment_table.setItem(row_idx, 5, QTableWidgetItem(check_in))  # Check-in Date
+        self.payment_table.setItem(row_idx, 6, QTableWidgetItem(check_in_time))  #   Check-in Time
+        self.payment_table.setItem(row_idx, 7, QTableWidgetItem(check_out))  # Check-out Date
+        self.payment_table.setItem(row_idx, 8, QTableWidgetItem(check_out_time))  #   Check-out Time
+        self.payment_table.setItem(row_idx, 9, QTableWidgetItem(f"${remaining_balance:.2f}"))  #   Remaining Balance
+        self.payment_table.setItem(row_idx, 10, QTableWidgetItem(payment_status))  # Payment Status
+
+    def patch_payments(self, booking_ids, guest_ids=(), room_ids=()):
+        """ Re-read only the bookings given (or belonging to the given guests/rooms) and patch their rows """
+        booking_ids, guest_ids, room_ids = list(booking_ids), list(guest_ids), list(room_ids)
+        conditions = [
+            f"{column} IN ({', '.join('?' * len(ids))})"
+            for column, ids in (("b.id", booking_ids), ("b.guest_id", guest_ids), ("b.room_id", room_ids)) if ids
+        ]
+        if not conditions:
+            return
+        conn = get_connection()
+        sql_query, params = self.payment_query("(" + " OR ".join(conditions) + ")", booking_ids + guest_ids + room_ids)
+        fresh = {payment[0]: payment for payment in conn.execute(sql_query, params)}
+        release_connection(conn)
+
+        positions = {int(self.payment_table.item(row, 1).text()): row for row in range(self.payment_table.rowCount())}
+        for booking_id, payment in fresh.items():
+            if booking_id in positions:
+                self.fill_payment_row(positions[booking_id], payment)
+        #   Bookings that left the grid (deleted, or no longer matching the filter)
+        for row in sorted((positions[booking_id] for booking_id in booking_ids
+                           if booking_id in positions and booking_id not in fresh), reverse=True):
+            self.payment_table.removeRow(row)
+        #   Bookings that joined it go where ORDER BY b.check_in_date DESC puts them
+        for booking_id, payment in fresh.items():
+            if booking_id not in positions:
+                row_idx = next((row for row in range(self.payment_table.rowCount())
+                                if self.payment_table.item(row, 5).text() < payment[3]), self.payment_table.rowCount())
+                self.payment_table.insertRow(row_idx)
+                self.fill_payment_row(row_idx, payment)
+
+    def apply_changes(self):
+        """ Patch the rows changed since the last look; nothing changed (and same day) means no query """
+        changes = self.dirty.take()
+        if self.loaded_day != QDate.currentDate() or any(ids is None for ids in changes.values()):
+            self.load_payments()
+            return
+        if self.search_input.text().strip() and ("guests" in changes or "rooms" in changes):
+            self.load_payments()  #   A renamed guest or room can start or stop matching the search
+            return
+        self.patch_payments(
+            set(changes.get("bookings", ())) | set(changes.get("payments", ())),
+            guest_ids=changes.get("guests", ()), room_ids=changes.get("rooms", ()),
+        )
+
+    def uncheck_all(self):
+        for row in range(self.payment_table.rowCount()):
+            check_box = self.payment_table.item(row, 0)
+            if check_box and check_box.checkState() == Qt.CheckState.Checked:
+                check_box.setCheckState(Qt.CheckState.Unchecked)
 
 
 
@@ -316,6 +429,49 @@ class PaymentBilling(QWidget):
             self.selected_rooms_list.addItem(f"Room {data['room']} - Remaining: ${data['price']:.2f}")
 
         self.total_price_label.setText(f"Total Price: ${total_price:.2f}")  #   Shows correct total price
+        self.schedule_qr_prefetch()
+
+    def qr_amount(self):
+        """ Selection total a KHQR payment would most likely be for, or None.
+
+        Typed amounts are not prefetched: each keystroke would create another order at the bank.
+        """
+        if self.payment_method_input.currentText() != "KHQR" or not self.selected_rooms:
+            return None
+        amount = round(sum(room["price"] for room in self.selected_rooms.values()), 2)
+        return amount if amount > 0 else None
+
+    def schedule_qr_prefetch(self):
+        """ Restart the debounce window; the QR is requested once the selection settles """
+        if QR_PREFETCH:
+            self.qr_prefetch_timer.start()
+
+    def start_qr_prefetch(self):
+        """ Request the QR for the selection total on a worker thread """
+        amount = self.qr_amount()
+        if amount is None or self.usable_prefetched_qr(amount):
+            return
+
+        self.qr_generation += 1
+        worker = Worker(prefetch_qr, self.qr_generation, amount, QR_CURRENCY)
+        worker.signals.result.connect(self.on_qr_prefetched)  #   Queued back to the GUI thread
+        QThreadPool.globalInstance().start(worker)
+
+    def on_qr_prefetched(self, result):
+        generation, qr = result
+        if generation == self.qr_generation and qr["image"]:
+            self.prefetched_qr = qr
+
+    def usable_prefetched_qr(self, amount):
+        """ The prefetched QR if it is for `amount` and has not expired, else None """
+        from paymentManagement.payment_gateway import QR_EXPIRE_MINUTES
+
+        qr = self.prefetched_qr
+        if qr is None or qr["amount"] != amount or qr["currency"] != QR_CURRENCY:
+            return None
+        if time.monotonic() - qr["created"] > (QR_EXPIRE_MINUTES - 1) * 60:  #   Leave the guest a minute to scan
+            return None
+        return qr
 
     
     def pay_all_bookings(self):
@@ -351,18 +507,29 @@ class PaymentBilling(QWidget):
 
 
         if payment_method == "KHQR":
-            currency = "USD"
-
-            timestamp = int(time.time())
-
-            #   Prefix with "py" to make it unique
-            trans_order_no = f"py{timestamp}"
-            
-            qr_image_data = generate_qr_payment(total_amount_paid, currency, trans_order_no)
+            currency = QR_CURRENCY
+
+            #   Imported on demand: requests/cryptography are only needed for KHQR payments
+            from paymentManagement.generate_qr_payment import generate_qr_payment
+            from paymentManagement.payment_gateway import QR_EXPIRE_MINUTES, new_order_no
+            from util.qr_dialog import QRCodeDialog
+
+            #   Usually the QR was already requested while the bookings were being ticked
+            prefetched = self.usable_prefetched_qr(total_amount_paid)
+            self.prefetched_qr = None  #   One QR per payment
+            self.qr_generation += 1
+            if prefetched:
+                trans_order_no, qr_image_data = prefetched["order_no"], prefetched["image"]
+                #   The bank's expiry clock started when the QR was prefetched
+                expire_minutes = QR_EXPIRE_MINUTES - (time.monotonic() - prefetched["created"]) / 60
+            else:
+                trans_order_no = new_order_no()
+                qr_image_data = generate_qr_payment(total_amount_paid, currency, trans_order_no)
+                expire_minutes = QR_EXPIRE_MINUTES
 
             if qr_image_data:
                 order_id = trans_order_no  #   Replace with actual order ID from response
-                dialog = QRCodeDialog(qr_image_data, order_id, self.refresh_data)  #   Pass `update_ui`
+                dialog = QRCodeDialog(qr_image_data, order_id, self.refresh_data, expire_minutes)  #   Pass `update_ui`
                 dialog.exec()  #   Show QR Code Dialog
             else:
                 QMessageBox.warning(self, "Error", "Failed to generate QR Code!")
@@ -370,75 +537,18 @@ class PaymentBilling(QWidget):
             return  #   Stop further execution after QR generation
 
         
-        #   Fetch Remaining Balances for Selected Bookings
-        conn = sqlite3.connect("hotel_management.db")
-        cursor = conn.cursor()
-
-        booking_details = []
-        total_remaining_balance = 0.0
-
-        for booking_id in selected_booking_ids:
-            cursor.execute("""
-                SELECT calculated_price, 
-                    (calculated_price - IFNULL((SELECT SUM(amount_paid) FROM Payments WHERE booking_id = ?), 0)) AS remaining_balance
-                FROM BookingDetails
-                WHERE booking_id = ?
-            """, (booking_id, booking_id))
-
-            result = cursor.fetchone()
-            if not result:
-                QMessageBox.warning(self, "Error", f"Booking ID {booking_id} not found!")
-                conn.close()
-                return
-
-            calculated_price, remaining_balance = result
-            booking_details.append((booking_id, calculated_price, remaining_balance))
-            total_remaining_balance += remaining_balance
-
-        #   Prevent Overpayment
-        if total_amount_paid > total_remaining_balance:
-            QMessageBox.warning(self, "Error", "Payment exceeds total remaining balance for selected bookings!")
-            conn.close()
+        #   Read every balance, split the amount and write all rows in one transaction
+        conn = get_connection()
+        try:
+            allocations = apply_payment(conn, selected_booking_ids, total_amount_paid, payment_method)
+        except AllocationError as e:
+            QMessageBox.warning(self, "Error", str(e))
             return
-
-        #   Distribute Payments Proportionally
-        remaining_amount = total_amount_paid
-        for booking_id, calculated_price, remaining_balance in booking_details:
-            if remaining_amount <= 0:
-                break
-
-            #   Calculate how much to pay for this booking
-            payment_amount = min(remaining_balance, remaining_amount)
-
-            #   Insert Payment Record
-            cursor.execute("""
-                INSERT INTO Payments (booking_id, amount_paid, payment_method, payment_date)
-                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-            """, (booking_id, payment_amount, payment_method))
-
-            #   Calculate New Remaining Balance & Status
-            new_remaining_balance = max(remaining_balance - payment_amount, 0)  
-            new_status = "PAID" if new_remaining_balance == 0 else "HALF PAID"
-
-            #   Update Payment Status in `BookingDetails`
-            cursor.execute("""
-                UPDATE BookingDetails
-                SET payment_status = ?
-                WHERE booking_id = ?
-            """, (new_status, booking_id))
-
-            #   Update Payment Status in `Bookings`
-            cursor.execute("""
-                UPDATE Bookings
-                SET payment_status = ?
-                WHERE id = ?
-            """, (new_status, booking_id))
-
-            #   Reduce Remaining Amount
-            remaining_amount -= payment_amount
-
-        conn.commit()  #   Commit all changes
-        conn.close()
+        finally:
+            release_connection(conn)
+        paid_ids = [booking_id for booking_id, _, _ in allocations]
+        get_event_bus().publish("payments", paid_ids)
+        get_event_bus().publish("bookings", paid_ids)  #   payment_status moved too
 
         QMessageBox.information(self, "Success", "Payments processed successfully!")
         self.refresh_data()  #   Refresh UI after payment
@@ -446,9 +556,16 @@ class PaymentBilling(QWidget):
 
 
     def refresh_data(self):
-        """ Refresh the payment table and reset selected rooms """
-        self.load_payments()  #   Reload payments from the database
+        """ Patch the payment table with what changed and reset selected rooms """
+        self.apply_changes()
+        self.uncheck_all()
+        self.clear_form()
+
+    def clear_form(self):
+        """ Forget the selected bookings and the typed amount (the table is left as is) """
         self.selected_rooms.clear()  #   Clear selected room data
         self.selected_rooms_list.clear()  #   Clear the UI list
         self.total_price_label.setText("Total Price: $0.00")  #   Reset total price
         self.amount_paid_input.clear()  #   Clear payment input field
+        self.prefetched_qr = None  #   Drop any QR requested for the old selection
+        self.qr_generation += 1
@@ -0,0 +1,172 @@
+""" Client for the KHQR bank gateway (QR generation and payment status).
+
+One keep-alive requests.Session is shared by QR requests and the status poller, so
+only the first request pays for the TCP/TLS handshake. The session sends the Basic
+auth header built once. Every request has a connect/read timeout, and failed
+connections (plus 502/503/504 on status checks) are retried with backoff.
+
+Compare against fresh-connection requests with a local stand-in gateway:
+    python -m paymentManagement.payment_gateway --stub --count 50
+"""
+import argparse
+import base64
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+QR_URL = os.environ.get("HOTEL_KHQR_QR_URL", "https://UAL_API_GENERATE_QR")
+NOTIFY_URL = os.environ.get("HOTEL_KHQR_NOTIFY_URL", "https://NOTIFY_URL_TO_YOUR_CURRENT_BANK_REGISTER")
+USERNAME = os.environ.get("HOTEL_KHQR_USERNAME", "YOUR_USER_NAME")
+PASSWORD = os.environ.get("HOTEL_KHQR_PASSWORD", "YOUR_PASSWORD")
+
+#   How long a generated QR code stays payable (the status poller stops at the same time)
+QR_EXPIRE_MINUTES = 15
+
+TIMEOUT = (3.05, 10)  # (connect, read) seconds
+RETRIES = Retry(
+    total=3,
+    connect=3,
+    read=0,                                 # a POST that reached the bank is never sent twice
+    status=2,
+    status_forcelist=(502, 503, 504),       # only for GET (status checks), the urllib3 default
+    backoff_factor=0.3,
+)
+
+
+_last_order_second = 0
+_order_lock = threading.Lock()
+
+
+def new_order_no():
+    """ transOrderNo for a new QR payment (never repeats, even for a prefetch and a payment in the same second) """
+    global _last_order_second
+    with _order_lock:
+        _last_order_second = max(int(time.time()), _last_order_second + 1)
+        #   Prefix with "py" to make it unique
+        return f"py{_last_order_second}"
+
+
+class PaymentGatewayClient:
+    """ Keep-alive session to the bank gateway """
+
+    def __init__(self, qr_url=QR_URL, username=USERNAME, password=PASSWORD, session=None):
+        self.qr_url = qr_url
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(max_retries=RETRIES, pool_connections=2, pool_maxsize=4)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        #   Encode username and password in Base64 for Basic Auth (once, not per request)
+        auth_string = base64.b64encode(f"{username}:{password}".encode()).decode()
+        self.qr_headers = {"Authorization": f"Basic {auth_string}", "Content-Type": "application/json"}
+
+    def request_qr(self, amount, currency, trans_order_no, expire_minutes=QR_EXPIRE_MINUTES):
+        """ QR code image bytes for a new payment, or None if the gateway refused """
+        data = {
+            "transOrderNo": trans_order_no,
+            "amt": amount,
+            "currency": currency,
+            "remark": "",
+            "expireMinutes": expire_minutes,
+            "notifyUrl": NOTIFY_URL,
+        }
+
+        try:
+            response = self.session.post(self.qr_url, headers=self.qr_headers, json=data, timeout=TIMEOUT)
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ Error making request: {e}")
+            return None
+
+        if response.status_code != 200:
+            print("QR Code generation failed. Please contact developer.")
+            return None
+
+        if "image" in response.headers.get("Content-Type", ""):
+            #   Return QR Code image data
+            return response.content
+
+        #   Handle JSON response
+        try:
+            message = response.json().get("message", "⚠️ QR Code generation failed. Please try again.")
+        except ValueError:
+            message = "⚠️ QR Code generation failed. Please try again."
+        print(message)
+        return None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_gateway_client():
+    """ Shared client (QR requests may come from a worker thread, so creation is locked) """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = PaymentGatewayClient()
+        return _client
+
+
+class _StubGateway(BaseHTTPRequestHandler):
+    """ Local stand-in: answers every POST with a tiny PNG over a keep-alive connection """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  #   Headers and body go out as separate writes
+    connections = set()
+    PNG = base64.b64decode(
+        "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+    )
+
+    def do_POST(self):
+        _StubGateway.connections.add(self.client_address)
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(self.PNG)))
+        self.end_headers()
+        self.wfile.write(self.PNG)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time QR requests against the gateway")
+    parser.add_argument("--stub", action="store_true", help="Use a local stand-in gateway")
+    parser.add_argument("--url", default=QR_URL, help="QR endpoint")
+    parser.add_argument("--count", type=int, default=20, help="Requests per run")
+    args = parser.parse_args()
+
+    server = None
+    if args.stub:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _StubGateway)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        args.url = f"http://127.0.0.1:{server.server_address[1]}/qr"
+
+    start = time.perf_counter()
+    for i in range(args.count):
+        requests.post(args.url, json={"transOrderNo": f"py{i}"}, timeout=TIMEOUT)
+    fresh = time.perf_counter() - start
+    fresh_connections = len(_StubGateway.connections)
+
+    _StubGateway.connections.clear()
+    client = PaymentGatewayClient(qr_url=args.url)
+    start = time.perf_counter()
+    ok = sum(client.request_qr(1.0, "USD", f"py{i}") is not None for i in range(args.count))
+    pooled = time.perf_counter() - start
+
+    print(f"  fresh connection per request: {fresh / args.count * 1000:7.2f} ms/request")
+    print(f"  keep-alive session:           {pooled / args.count * 1000:7.2f} ms/request ({ok}/{args.count} QR images)")
+    if server is not None:
+        print(f"  connections opened: {fresh_connections} fresh vs {len(_StubGateway.connections)} pooled")
+        server.shutdown()
+    return 0 if ok == args.count else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
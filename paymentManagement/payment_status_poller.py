@@ -0,0 +1,172 @@
+""" KHQR payment-status polling off the GUI thread.
+
+QRCodeDialog used to call requests.get(..., timeout=0.3) from a QTimer, which froze
+the dialog on every poll and reported a slow gateway as a failure. The poller runs
+in its own QThread, reuses the gateway client's keep-alive session, backs off exponentially
+between polls and gives up when the QR code expires; it reports the outcome with a
+signal.
+
+The loop itself (poll_until_final) has no Qt in it. To try it against a local stub
+gateway that answers "pending" a few times and then "success":
+    python -m paymentManagement.payment_status_poller --stub
+    python -m paymentManagement.payment_status_poller --url http://127.0.0.1:8000/status --order py123
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from paymentManagement.payment_gateway import QR_EXPIRE_MINUTES, TIMEOUT, get_gateway_client
+
+#   Status endpoint; the order id is appended as the last path segment
+STATUS_URL = os.environ.get("HOTEL_KHQR_STATUS_URL", "https://URL_FOR_RETURN_CHECK_IT_SUCCESS_OR_FAIL")
+STATUS_TOKEN = os.environ.get("HOTEL_KHQR_STATUS_TOKEN", "TOKEN_FOR_AUTH")
+
+FIRST_DELAY = 2.0        # seconds before the second poll
+MAX_DELAY = 15.0         # the old fixed poll interval is now the ceiling
+BACKOFF_FACTOR = 2.0
+
+#   Gateway statuses that end polling
+FINAL_STATUSES = ("success", "closed")
+
+
+def get_session():
+    """ Keep-alive session shared with QR requests (one TLS handshake instead of one per poll) """
+    return get_gateway_client().session
+
+
+def fetch_status(session, url, headers, timeout):
+    """ Gateway status string for one poll, or None if the reply was empty or malformed """
+    response = session.get(url, headers=headers, timeout=timeout)
+    response.raise_for_status()  # Raise an error for 4xx or 5xx responses
+
+    data = response.json()
+    if not data or not isinstance(data.get("data"), dict):
+        print("⚠️ Error: Empty or invalid response received!")
+        return None
+    return data["data"].get("status", "")
+
+
+def poll_until_final(session, url, headers, deadline, stop_event, on_status=None,
+                     first_delay=FIRST_DELAY, max_delay=MAX_DELAY):
+    """ Poll until the gateway reports a final status, `deadline` (time.monotonic()) passes or `stop_event` is set.
+
+    Returns "success", "closed", "expired" or "cancelled".
+    """
+    delay = first_delay
+    while not stop_event.is_set():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return "expired"
+
+        try:
+            status = fetch_status(session, url, headers, (TIMEOUT[0], min(TIMEOUT[1], remaining)))
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"⚠️ Error checking payment status: {e}")
+            status = None
+
+        if on_status is not None and status is not None:
+            on_status(status)
+        if status in FINAL_STATUSES:
+            return status
+
+        #   Wait, but wake at once if cancelled and never sleep past the deadline
+        stop_event.wait(min(delay, max(0.0, deadline - time.monotonic())))
+        delay = min(delay * BACKOFF_FACTOR, max_delay)
+    return "cancelled"
+
+
+class PaymentStatusPoller(QThread):
+    """ Polls the status of one KHQR order in the background """
+
+    status_changed = pyqtSignal(str)  # every status the gateway reports
+    completed = pyqtSignal(str)       # "success", "closed", "expired" or "cancelled"
+
+    _active = set()  #   Running pollers, kept alive until their thread has finished
+
+    def __init__(self, order_id, expire_minutes=QR_EXPIRE_MINUTES, base_url=STATUS_URL,
+                 token=STATUS_TOKEN, session=None, parent=None):
+        super().__init__(parent)
+        self.url = f"{base_url.rstrip('/')}/{order_id}"
+        self.headers = {"Authorization": token, "Content-Type": "application/json"}
+        self.expire_seconds = expire_minutes * 60
+        self.session = session or get_session()
+        self.stop_event = threading.Event()
+        self.finished.connect(self.forget)
+
+    def start(self):
+        PaymentStatusPoller._active.add(self)
+        super().start()
+
+    def stop(self):
+        """ Ask the thread to finish; returns immediately """
+        self.stop_event.set()
+
+    def forget(self):
+        PaymentStatusPoller._active.discard(self)
+
+    def run(self):
+        deadline = time.monotonic() + self.expire_seconds
+        outcome = poll_until_final(
+            self.session, self.url, self.headers, deadline, self.stop_event, self.status_changed.emit
+        )
+        self.completed.emit(outcome)
+
+
+class _StubGateway(BaseHTTPRequestHandler):
+    """ Answers "pending" for the first `pending_polls` requests, then "success" """
+
+    pending_polls = 3
+    polls = 0
+
+    def do_GET(self):
+        _StubGateway.polls += 1
+        status = "pending" if _StubGateway.polls <= self.pending_polls else "success"
+        body = json.dumps({"data": {"status": status}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll a KHQR order until it is paid, closed or expired")
+    parser.add_argument("--url", default=STATUS_URL, help="Status endpoint (order id is appended)")
+    parser.add_argument("--order", default="py0", help="Order id (transOrderNo)")
+    parser.add_argument("--expire-minutes", type=float, default=QR_EXPIRE_MINUTES)
+    parser.add_argument("--stub", action="store_true", help="Poll a local stub gateway instead")
+    args = parser.parse_args()
+
+    server = None
+    first_delay = FIRST_DELAY
+    if args.stub:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _StubGateway)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        args.url = f"http://127.0.0.1:{server.server_address[1]}/status"
+        first_delay = 0.1
+
+    start = time.monotonic()
+    outcome = poll_until_final(
+        get_session(), f"{args.url.rstrip('/')}/{args.order}",
+        {"Authorization": STATUS_TOKEN, "Content-Type": "application/json"},
+        start + args.expire_minutes * 60, threading.Event(),
+        on_status=lambda status: print(f"  {time.monotonic() - start:6.2f} s  {status}"),
+        first_delay=first_delay,
+    )
+    print(f"  Outcome: {outcome} after {time.monotonic() - start:.2f} s")
+    if server is not None:
+        server.shutdown()
+    return 0 if outcome == "success" else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,139 @@
+""" Chart aggregation for the report page, done with NumPy instead of a per-row Python loop.
+
+Report rows are turned into two columns: dates as datetime64[D] and amounts as float64.
+The dates are truncated to the chosen bucket (day, week starting Monday, or month) and
+summed with np.unique(return_inverse=True) plus np.bincount, so a year of payments costs
+a few array operations rather than one strptime call and dict update per row.
+
+Compare with the old strptime/dict loop on synthetic rows:
+    python -m reportManagement.report_aggregation --rows 500000
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+BUCKETS = ("Day", "Week", "Month")
+
+#   Bar width in days for each bucket, so bars do not overlap or shrink to lines
+BAR_WIDTHS = {"Day": 0.8, "Week": 5, "Month": 25}
+
+#   Report type -> (date column, value column or None to count rows)
+REPORT_COLUMNS = {
+    "Revenue Report": (0, -1),
+    "Payment Management": (-1, 2),
+    "Booking Management": (3, None),
+    "Guest Management": (-2, -1),  #   Last stay, weighted by the number of stays
+}
+
+
+def parse_dates(texts):
+    """ datetime64[D] array for 'YYYY-MM-DD' texts; anything else becomes NaT """
+    try:
+        return np.array(texts, dtype="datetime64[D]")
+    except ValueError:
+        #   Only reached when some value is not a date (e.g. "No Stay"); sort them out one by one
+        parsed = np.empty(len(texts), dtype="datetime64[D]")
+        for index, text in enumerate(texts):
+            try:
+                parsed[index] = np.datetime64(text, "D")
+            except ValueError:
+                parsed[index] = np.datetime64("NaT")
+        return parsed
+
+
+def report_columns(report_type, rows):
+    """ (dates datetime64[D], values float64) for the chart of `report_type`, skipping rows without a date """
+    date_column, value_column = REPORT_COLUMNS[report_type]
+    if not rows:
+        return np.array([], dtype="datetime64[D]"), np.array([], dtype=np.float64)
+
+    dates = parse_dates([row[date_column] for row in rows])
+    if value_column is None:
+        values = np.ones(len(rows), dtype=np.float64)
+    else:
+        values = np.array([row[value_column] for row in rows], dtype=np.float64)
+    np.nan_to_num(values, copy=False)  #   NULL amounts count as 0
+
+    keep = ~np.isnat(dates)
+    return dates[keep], values[keep]
+
+
+def bucket_starts(dates, bucket):
+    """ First day of the day/week/month each date falls in """
+    if bucket == "Week":
+        #   Day 0 (1970-01-01) was a Thursday, so +3 counts days since Monday
+        return dates - (dates.astype(np.int64) + 3) % 7
+    if bucket == "Month":
+        return dates.astype("datetime64[M]").astype("datetime64[D]")
+    return dates
+
+
+def aggregate(dates, values, bucket="Day"):
+    """ (bucket start dates, totals), sorted by date """
+    if len(dates) == 0:
+        return dates, values
+    starts, inverse = np.unique(bucket_starts(dates, bucket), return_inverse=True)
+    return starts, np.bincount(inverse.ravel(), weights=values, minlength=len(starts))
+
+
+def aggregate_report(report_type, rows, bucket="Day"):
+    """ (bucket start dates, totals) ready to plot for a report's rows """
+    return aggregate(*report_columns(report_type, rows), bucket)
+
+
+def legacy_aggregate(rows):
+    """ The old update_graph loop (payments per day), kept only for the benchmark """
+    date_counts = {}
+    for row in rows:
+        day = datetime.strptime(row[-1], "%Y-%m-%d").date()
+        amount = float(row[2])
+        if day in date_counts:
+            date_counts[day] += amount
+        else:
+            date_counts[day] = amount
+    return zip(*sorted(date_counts.items()))
+
+
+def payment_rows(count):
+    """ Synthetic Payment report rows spread over one year """
+    generator = random.Random(7)
+    first = date(2025, 1, 1)
+    return [
+        (number, number, round(generator.uniform(10, 200), 2), "Cash",
+         (first + timedelta(days=generator.randrange(365))).isoformat())
+        for number in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NumPy chart aggregation against the per-row loop")
+    parser.add_argument("--rows", type=int, default=500000, help="Payment rows to aggregate")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per method")
+    args = parser.parse_args()
+
+    rows = payment_rows(args.rows)
+    timings = {}
+    for name, run in (("loop", lambda: legacy_aggregate(rows)),
+                      *((f"numpy {bucket.lower()}", lambda bucket=bucket: aggregate_report("Payment Management", rows, bucket))
+                        for bucket in BUCKETS)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            run()
+        timings[name] = (time.perf_counter() - start) / args.repeat
+
+    print(f"  {args.rows} payment rows")
+    for name, seconds in timings.items():
+        print(f"  {name:<12} {seconds * 1000:>9.1f} ms  {timings['loop'] / seconds:>6.1f}x")
+
+    #   Same totals either way
+    days, totals = aggregate_report("Payment Management", rows)
+    legacy_days, legacy_totals = legacy_aggregate(rows)
+    assert len(days) == len(legacy_days) and np.allclose(totals, legacy_totals)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
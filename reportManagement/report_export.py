@@ -0,0 +1,161 @@
+""" Export a report straight from the database, without going through the report table.
+
+Rows are read in fetchmany() batches (see report_queries.stream_report) and written as they
+arrive, so memory stays flat however many rows the report has. CSV needs nothing extra;
+Parquet and Arrow IPC (.arrow) need pyarrow, which is optional:
+    pip install pyarrow
+
+The file is written next to the target as "<name>.part" and renamed when complete, so a
+scheduled job never leaves a half-written report under the real name.
+
+Headless, e.g. from cron:
+    python -m reportManagement.report_export payments --from 2025-01-01 --to 2025-12-31 -o payments.parquet
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import time
+
+from util.database import get_connection, release_connection
+from reportManagement.report_queries import FETCH_BATCH, REPORT_HEADERS, REPORT_NAMES, stream_report
+
+FORMATS = ("csv", "parquet", "arrow")
+
+#   Rows buffered per Parquet row group / Arrow record batch (fetch batches are much smaller)
+COLUMNAR_BATCH = 65536
+
+#   Column types for columnar output, per report (fixed, so a NULL-only batch cannot change the schema)
+COLUMN_TYPES = {
+    "Guest Management": ("int64", "string", "string", "string", "string", "int64"),
+    "Booking Management": ("int64", "string", "string", "string", "string", "float64"),
+    "Payment Management": ("int64", "int64", "float64", "string", "string"),
+    "Revenue Report": ("string", "int64", "int64", "int64", "float64"),
+}
+
+
+def columnar_available():
+    """ True if pyarrow is installed (Parquet / Arrow IPC output) """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def export_format(path, fmt=None):
+    """ The output format: `fmt` if given, otherwise from the file extension (default csv) """
+    if fmt is None:
+        fmt = os.path.splitext(path)[1].lstrip(".").lower()
+        fmt = {"pq": "parquet", "ipc": "arrow", "feather": "arrow"}.get(fmt, fmt)
+        if fmt not in FORMATS:
+            fmt = "csv"
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return fmt
+
+
+def write_csv(path, headers, batches, on_progress=None):
+    total = 0
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(headers)
+        for rows in batches:
+            writer.writerows(rows)
+            total += len(rows)
+            if on_progress is not None:
+                on_progress(total)
+    return total
+
+
+def write_columnar(path, fmt, headers, types, batches, on_progress=None):
+    """ Write Parquet or Arrow IPC in COLUMNAR_BATCH-row chunks """
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError(f"{fmt} export needs pyarrow (pip install pyarrow)") from e
+
+    schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in zip(headers, types)])
+    if fmt == "parquet":
+        writer = pa.parquet.ParquetWriter(path, schema)
+    else:
+        writer = pa.ipc.new_file(path, schema)
+
+    def flush(buffer):
+        columns = list(zip(*buffer))
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+        ))
+
+    total = 0
+    buffer = []
+    try:
+        for rows in batches:
+            buffer.extend(rows)
+            total += len(rows)
+            if len(buffer) >= COLUMNAR_BATCH:
+                flush(buffer)
+                buffer = []
+            if on_progress is not None:
+                on_progress(total)
+        if buffer:
+            flush(buffer)
+    finally:
+        writer.close()
+    return total
+
+
+def export_report(conn, report_type, from_date, to_date, path, fmt=None,
+                  batch_size=FETCH_BATCH, cancel=None, on_progress=None):
+    """ Write one report to `path`; returns the number of rows.
+
+    `on_progress(rows written so far)` is called after every batch. If `cancel` is
+    cancelled, ReportCancelled is raised and nothing is left at `path`.
+    """
+    fmt = export_format(path, fmt)
+    headers = REPORT_HEADERS[report_type]
+    batches = stream_report(conn, report_type, from_date, to_date, batch_size=batch_size, cancel=cancel)
+
+    part_path = path + ".part"
+    try:
+        if fmt == "csv":
+            total = write_csv(part_path, headers, batches, on_progress)
+        else:
+            total = write_columnar(part_path, fmt, headers, COLUMN_TYPES[report_type], batches, on_progress)
+    except BaseException:
+        batches.close()
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    os.replace(part_path, path)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a report from the database to CSV, Parquet or Arrow IPC")
+    parser.add_argument("report", choices=sorted(REPORT_NAMES), help="Report to export")
+    parser.add_argument("--from", dest="from_date", required=True, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="to_date", required=True, help="Last day (YYYY-MM-DD)")
+    parser.add_argument("-o", "--output", required=True, help="File to write")
+    parser.add_argument("--format", choices=FORMATS, help="Output format (default: from the file extension)")
+    parser.add_argument("--batch-size", type=int, default=FETCH_BATCH, help="Rows per fetchmany() call")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    conn = get_connection()
+    try:
+        total = export_report(conn, REPORT_NAMES[args.report], args.from_date, args.to_date,
+                              args.output, args.format, args.batch_size)
+    except (RuntimeError, ValueError, sqlite3.Error) as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        release_connection(conn)
+    print(f"  Wrote {total} rows to {args.output} in {time.perf_counter() - start:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,22 +1,74 @@
+from collections import OrderedDict
 
-from datetime import datetime
-import sqlite3
-import csv
+from util.database import get_connection, release_connection
 from PyQt6.QtWidgets import (
-    QWidget, QLabel, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
-    QComboBox, QDateEdit, QFrame, QFileDialog, QMessageBox
+    QWidget, QLabel, QVBoxLayout, QHBoxLayout, QPushButton, QTableView, QAbstractItemView,
+    QComboBox, QDateEdit, QFrame, QFileDialog, QMessageBox, QProgressBar
 )
-from PyQt6.QtCore import Qt, QDate
+from PyQt6.QtCore import Qt, QDate, QThreadPool
+import numpy as np
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-from collections import Counter
 
 from util.custom_btn import CustomButton
+from util.event_bus import DirtySet
+from util.worker import Worker
+from reportManagement.report_export import columnar_available, export_report
+from reportManagement.report_aggregation import BAR_WIDTHS, BUCKETS, REPORT_COLUMNS, aggregate_report
+from reportManagement.report_queries import (
+    REPORT_HEADERS, REPORT_TYPES, CancelToken, ReportCancelled, data_version, stream_report
+)
+from reportManagement.report_table_model import ReportTableModel
+
+#   Rendered charts kept for switching back to a report or grouping without drawing it again
+CHART_CACHE_SIZE = 12
+
+
+def run_report(generation, report_type, from_date, to_date, cancel, on_progress):
+    """ Runs on a worker thread: stream the report's rows to `on_progress` in (generation, rows) chunks.
+
+    Returns (generation, row count, (report type, from, to, data version)), or (generation, None, None)
+    if cancelled; the key describes exactly the rows that were streamed, whatever the filters show now.
+    """
+    conn = get_connection()
+    total = 0
+    try:
+        version = data_version(conn, report_type)  #   Read first: a later write can only make it look older
+        for rows in stream_report(conn, report_type, from_date, to_date, cancel=cancel):
+            total += len(rows)
+            on_progress((generation, rows))
+    except ReportCancelled:
+        return generation, None, None
+    finally:
+        release_connection(conn)
+    return generation, total, (report_type, from_date, to_date, version)
+
+
+def run_export(report_type, from_date, to_date, path, on_progress):
+    """ Runs on a worker thread: write the report to `path` (see reportManagement.report_export) """
+    conn = get_connection()
+    try:
+        return export_report(conn, report_type, from_date, to_date, path, on_progress=on_progress)
+    finally:
+        release_connection(conn)
+
 
 class ReportManagement(QWidget):
     def __init__(self):
         super().__init__()
+        self.dirty = DirtySet(["guests", "bookings", "rooms", "payments"], self)
+        self.report_data = []  #   Rows of the last generated report (regrouping the chart needs no query)
+        self.report_generation = 0  #   Bumped per run; chunks and results of older runs are dropped
+        self.report_cancel = None  #   CancelToken of the running report, None when idle
+        self.exporting = False
+        self.report_key = None  #   (report type, from, to, data version) of report_data
+
+        #   Rendered charts by (report_key, bucket, canvas size), most recently used last
+        self.chart_cache = OrderedDict()
+        self.chart_key = None  #   Key of the chart on screen
+        self.chart_bars = None  #   (report type, bucket, bucket starts, BarContainer) of the chart on screen
+        self.unbuilt_chart = None  #   build_chart() arguments of a blitted chart whose artists are not on the axes
         self.initUI()
 
     def initUI(self):
@@ -31,9 +83,29 @@ class ReportManagement(QWidget):
         report_title.setStyleSheet("font-size: 16px; font-weight: bold; margin-bottom: 10px;")
         left_section.addWidget(report_title)
 
-        self.report_table = QTableWidget()
+        #   Rows stream into the model in chunks while the report runs on a worker thread
+        self.report_model = ReportTableModel(self)
+        self.report_table = QTableView()
+        self.report_table.setModel(self.report_model)
+        self.report_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         left_section.addWidget(self.report_table)
 
+        #   **Progress** (shown only while a report runs)
+        progress_layout = QHBoxLayout()
+        self.report_status = QLabel("")
+        progress_layout.addWidget(self.report_status)
+        self.report_progress = QProgressBar()
+        self.report_progress.setRange(0, 0)  #   Busy indicator: the row count is not known up front
+        self.report_progress.setMaximumHeight(12)
+        self.report_progress.setTextVisible(False)
+        self.report_progress.setVisible(False)
+        progress_layout.addWidget(self.report_progress)
+        self.cancel_button = CustomButton("Cancel", "#d32f2f", "icons/ic_cancel.png", height=30)
+        self.cancel_button.clicked.connect(self.cancel_report)
+        self.cancel_button.setVisible(False)
+        progress_layout.addWidget(self.cancel_button)
+        left_section.addLayout(progress_layout)
+
         # 📌 **RIGHT: Filters, Export & Graph**
         right_section = QVBoxLayout()
         right_frame = QFrame()
@@ -43,9 +115,7 @@ class ReportManagement(QWidget):
         #   **Report Selection Dropdown**
         right_layout.addWidget(QLabel("Select Report:"))
         self.report_dropdown = QComboBox()
-        self.report_dropdown.addItems([
-            "Guest Management", "Booking Management", "Payment Management", "Revenue Report"
-        ])
+        self.report_dropdown.addItems(REPORT_TYPES)
         self.report_dropdown.setStyleSheet(
             "background-color: 09122C; color: white; border-radius: 5px; padding: 4px; font-size: 14px;height : 20px;"
         )
@@ -71,19 +141,30 @@ class ReportManagement(QWidget):
         )
         right_layout.addWidget(self.to_date)
 
+        #   **Chart grouping** (day / week / month)
+        right_layout.addWidget(QLabel("Group Chart By:"))
+        self.bucket_dropdown = QComboBox()
+        self.bucket_dropdown.addItems(BUCKETS)
+        self.bucket_dropdown.setStyleSheet(
+            "background-color: 09122C; color: white; border-radius: 5px; padding: 4px; font-size: 14px;height : 20px;"
+        )
+        self.bucket_dropdown.currentIndexChanged.connect(self.regroup_chart)
+        right_layout.addWidget(self.bucket_dropdown)
+
         # #   **Generate & Export Buttons**
         self.generate_button = CustomButton("Generate Report", "#4CAF50", "icons/ic_graph.png", height=30)
         self.generate_button.clicked.connect(self.generate_report)
         right_layout.addWidget(self.generate_button)
         
-        self.export_button = CustomButton("Export as CSV", "#0277bd", "icons/documents.png", height=30)
-        self.export_button.clicked.connect(self.export_to_csv)
+        self.export_button = CustomButton("Export Report", "#0277bd", "icons/documents.png", height=30)
+        self.export_button.clicked.connect(self.export_report)
         right_layout.addWidget(self.export_button)
 
         #   **Graph Display**
         self.figure, self.ax = plt.subplots(figsize=(6, 4))
         self.canvas = FigureCanvas(self.figure)
         self.canvas.setMinimumSize(400, 250)
+        self.canvas.mpl_connect("resize_event", self.build_unbuilt_chart)
         right_layout.addWidget(self.canvas)
 
         right_layout.addStretch()
@@ -98,29 +179,19 @@ class ReportManagement(QWidget):
 
     def update_report_columns(self):
         """ Update table columns dynamically based on selected report type and clear previous data """
+        self.cancel_report()  #   A running report belongs to the previous type
         report_type = self.report_dropdown.currentText()
 
-        if report_type == "Guest Management":
-            headers = ["Guest ID", "Name", "Contact", "Email", "Last Stay"]
-        elif report_type == "Booking Management":
-            headers = ["Booking ID", "Guest Name", "Room No", "Check-in", "Check-out", "Room Price"]
-        elif report_type == "Payment Management":
-            headers = ["Payment ID", "Booking ID", "Amount Paid", "Payment Method", "Payment Date"]
-        elif report_type == "Revenue Report":
-            headers = ["Date", "Booking ID", "Room No", "Room Price", "Total Revenue"]
-        else:
-            headers = []
-
-        #   Set column headers
-        self.report_table.setColumnCount(len(headers))
-        self.report_table.setHorizontalHeaderLabels(headers)
-
-        #   Clear any existing table data when switching reports
-        self.report_table.setRowCount(0)
+        #   Set column headers and clear any existing rows when switching reports
+        self.report_model.set_headers(REPORT_HEADERS.get(report_type, []))
+        self.report_data = []  #   Old rows do not fit the new report's columns
+        self.report_key = None
+        self.report_status.setText("")
+        self.dirty.mark_all()  #   Nothing is shown now; the next visit generates it again
 
     
     def generate_report(self):
-        """ Generate the report based on selected filters """
+        """ Generate the report based on selected filters, on a worker thread """
         report_type = self.report_dropdown.currentText()
         from_date = self.from_date.date().toString("yyyy-MM-dd")
         to_date = self.to_date.date().toString("yyyy-MM-dd")
@@ -129,96 +200,190 @@ class ReportManagement(QWidget):
             QMessageBox.warning(self, "Input Error", "Please select valid From and To dates.")
             return
 
-        conn = sqlite3.connect("hotel_management.db")
-        cursor = conn.cursor()
-
-        data = []  # Initialize empty data list
-
-        try:
-            if report_type == "Guest Management":
-                #   FIX: Show all guests including those with upcoming stays
-                query = """SELECT G.id, G.name, G.contact, G.email, 
-                                COALESCE(MAX(B.check_out_date), 'No Stay') AS last_stay,
-                                COUNT(B.id) AS total_stays  --   Show total number of stays
-                        FROM Guests G
-                        LEFT JOIN Bookings B ON G.id = B.guest_id
-                        WHERE (B.check_in_date BETWEEN ? AND ? OR B.check_out_date BETWEEN ? AND ? OR B.id IS NULL)
-                        GROUP BY G.id, G.name, G.contact, G.email"""
-                
-                cursor.execute(query, (from_date, to_date, from_date, to_date))
-
-            elif report_type == "Booking Management":
-                query = """SELECT B.id AS booking_id, G.name AS guest_name, R.room_number, 
-                                B.check_in_date, B.check_out_date, R.base_price AS room_price
-                        FROM Bookings B
-                        JOIN Guests G ON B.guest_id = G.id
-                        JOIN Rooms R ON B.room_id = R.id
-                        WHERE (date(B.check_in_date) BETWEEN ? AND ? OR date(B.check_out_date) BETWEEN ? AND ?)"""
-                cursor.execute(query, (from_date, to_date, from_date, to_date))
-
-            elif report_type == "Payment Management":
-                query = """SELECT P.id AS payment_id, P.booking_id, P.amount_paid, 
-                                P.payment_method, date(P.payment_date)
-                        FROM Payments P
-                        WHERE date(P.payment_date) BETWEEN ? AND ?"""
-                cursor.execute(query, (from_date, to_date))
-
-            elif report_type == "Revenue Report":
-                query = """SELECT B.check_in_date AS date, B.id AS booking_id, 
-                                R.room_number, R.base_price AS room_price, SUM(P.amount_paid) AS total_amount
-                        FROM Bookings B
-                        JOIN Payments P ON B.id = P.booking_id
-                        JOIN Rooms R ON B.room_id = R.id
-                        WHERE date(B.check_in_date) BETWEEN ? AND ?
-                        GROUP BY B.check_in_date, B.id, R.room_number"""
-                cursor.execute(query, (from_date, to_date))
-
-            else:
-                QMessageBox.warning(self, "Invalid Report", "Please select a valid report type.")
-                return
-
-            data = cursor.fetchall()
-            self.report_table.setRowCount(len(data))
-
-            for row_idx, row_data in enumerate(data):
-                for col_idx, item in enumerate(row_data):
-                    self.report_table.setItem(row_idx, col_idx, QTableWidgetItem(str(item)))
-
-            #   Ensure the graph updates properly
-            self.update_graph(data)
-            self.canvas.draw_idle()
-
-        except sqlite3.Error as e:
-            QMessageBox.critical(self, "Database Error", f"Error generating report: {str(e)}")
-
-        finally:
-            conn.close()
-
-    def export_to_csv(self):
-        """ Export report data to CSV """
-        file_path, _ = QFileDialog.getSaveFileName(self, "Save Report", "", "CSV Files (*.csv)")
-        if not file_path:
+        if report_type not in REPORT_HEADERS:
+            QMessageBox.warning(self, "Invalid Report", "Please select a valid report type.")
+            return
+
+        self.cancel_report()  #   Generating again replaces a run that is still going
+        self.dirty.take()
+        self.report_generation += 1
+        self.report_cancel = CancelToken()
+        self.report_model.clear()
+        self.report_data = []
+        self.report_key = None
+        self.set_report_running(True)
+
+        worker = Worker(run_report, self.report_generation, report_type, from_date, to_date, self.report_cancel)
+        worker.kwargs["on_progress"] = worker.signals.progress.emit
+        worker.signals.progress.connect(self.show_report_rows)  #   Queued back to the GUI thread
+        worker.signals.result.connect(self.finish_report)
+        worker.signals.error.connect(
+            lambda message, generation=self.report_generation: self.report_failed(generation, message)
+        )
+        QThreadPool.globalInstance().start(worker)
+
+    def show_report_rows(self, chunk):
+        """ Append one fetched chunk to the table unless it belongs to an older run """
+        generation, rows = chunk
+        if generation != self.report_generation:
+            return
+        self.report_model.append_rows(rows)
+        self.report_status.setText(f"Loaded {self.report_model.rowCount()} rows…")
+
+    def finish_report(self, result):
+        """ All rows are in the table: draw the chart from them """
+        generation, total, report_key = result
+        if generation != self.report_generation:
+            return
+        self.set_report_running(False)
+        if total is None:
+            return  #   Cancelled; cancel_report() already updated the status
+
+        self.report_data = self.report_model.rows
+        self.report_key = report_key  #   The dates may have been edited while the report ran
+        self.report_status.setText(f"{total} rows")
+
+        #   Unchanged data redraws nothing (see update_graph)
+        self.update_graph(self.report_data)
+
+    def report_failed(self, generation, message):
+        if generation != self.report_generation:
+            return
+        self.set_report_running(False)
+        self.report_status.setText("")
+        self.dirty.mark_all()
+        QMessageBox.critical(self, "Database Error", f"Error generating report: {message}")
+
+    def cancel_report(self):
+        """ Stop the running report, if any; rows already shown stay in the table """
+        if self.report_cancel is None:
+            return
+        self.report_cancel.cancel()
+        self.report_generation += 1  #   Drop chunks that are already queued
+        self.set_report_running(False)
+        self.report_status.setText(f"Cancelled after {self.report_model.rowCount()} rows")
+        self.dirty.mark_all()  #   Incomplete; the next visit generates it again
+
+    def set_report_running(self, running):
+        if not running:
+            self.report_cancel = None
+        self.report_progress.setVisible(running)
+        self.cancel_button.setVisible(running)
+        self.export_button.setEnabled(not running and not self.exporting)
+
+    def regroup_chart(self):
+        """ Redraw the chart for the new grouping; a running report draws it when it finishes """
+        if self.report_cancel is None:
+            self.update_graph(self.report_data)
+
+    def export_report(self):
+        """ Export the selected report straight from the database (not from the table) on a worker thread """
+        report_type = self.report_dropdown.currentText()
+        from_date = self.from_date.date().toString("yyyy-MM-dd")
+        to_date = self.to_date.date().toString("yyyy-MM-dd")
+        if report_type not in REPORT_HEADERS:
+            QMessageBox.warning(self, "Invalid Report", "Please select a valid report type.")
             return
 
-        with open(file_path, "w", newline="") as file:
-            writer = csv.writer(file)
-            headers = [self.report_table.horizontalHeaderItem(i).text() for i in range(self.report_table.columnCount())]
-            writer.writerow(headers)
+        file_filter = "CSV Files (*.csv)"
+        if columnar_available():
+            file_filter += ";;Parquet Files (*.parquet);;Arrow IPC Files (*.arrow)"
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Report", "", file_filter)
+        if not file_path:
+            return
 
-            for row in range(self.report_table.rowCount()):
-                writer.writerow([self.report_table.item(row, col).text() for col in range(self.report_table.columnCount())])
+        self.exporting = True
+        self.export_button.setEnabled(False)
+        worker = Worker(run_export, report_type, from_date, to_date, file_path)
+        worker.kwargs["on_progress"] = worker.signals.progress.emit
+        worker.signals.progress.connect(lambda total: self.report_status.setText(f"Exported {total} rows…"))
+        worker.signals.result.connect(self.finish_export)
+        worker.signals.error.connect(
+            lambda message: QMessageBox.critical(self, "Export Error", f"Error exporting report: {message}")
+        )
+        worker.signals.finished.connect(self.export_done)
+        QThreadPool.globalInstance().start(worker)
 
+    def finish_export(self, total):
+        self.report_status.setText(f"Exported {total} rows")
         QMessageBox.information(self, "Export Success", "Report exported successfully!")
 
+    def export_done(self):
+        self.exporting = False
+        self.export_button.setEnabled(self.report_cancel is None)
+
     def update_graph(self, data):
-        """ Update the graph visualization based on the selected report data """
-        self.ax.clear()  # Clear previous graph
+        """ Show the chart for `data`, doing as little rendering as possible.
 
+        Same report, range, data version, grouping and canvas size as the chart on screen:
+        nothing to do. Rendered before: blit the cached pixels (the artists are rebuilt only
+        if the canvas is resized). Same bars with new heights: set_height on the existing
+        bars. Only anything else clears the axes and draws from scratch.
+        """
         report_type = self.report_dropdown.currentText()
+        bucket = self.bucket_dropdown.currentText()
+        key = None
+        if self.report_key is not None and data is self.report_data:
+            key = (self.report_key, bucket, tuple(self.figure.bbox.bounds))
+        if key is not None and key == self.chart_key:
+            return
+
+        cached = self.chart_cache.get(key) if key is not None else None
+        if cached is not None:
+            starts, totals, subplot_params, pixels = cached
+            self.chart_bars = None
+            self.unbuilt_chart = (report_type, bucket, data, starts, totals, subplot_params)
+            self.canvas.restore_region(pixels)
+            self.canvas.blit(self.figure.bbox)
+            self.chart_cache.move_to_end(key)
+            self.chart_key = key
+            return
+
+        starts, totals = (aggregate_report(report_type, data, bucket)
+                          if data and report_type in REPORT_COLUMNS else (None, None))
+        self.unbuilt_chart = None
+        if not self.update_bars(report_type, bucket, starts, totals):
+            self.build_chart(report_type, bucket, data, starts, totals)
+            #   Auto-adjust layout to prevent cut-offs
+            self.figure.tight_layout()
+        self.canvas.draw()
+        self.chart_key = key
+
+        if key is not None:
+            subplot_params = {name: getattr(self.figure.subplotpars, name)
+                              for name in ("left", "right", "bottom", "top", "wspace", "hspace")}
+            self.chart_cache[key] = (starts, totals, subplot_params, self.canvas.copy_from_bbox(self.figure.bbox))
+            while len(self.chart_cache) > CHART_CACHE_SIZE:
+                self.chart_cache.popitem(last=False)
+
+    def build_unbuilt_chart(self, event=None):
+        """ Before the canvas draws itself (on resize), give the axes the artists of the blitted chart """
+        if self.unbuilt_chart is not None:
+            *chart, subplot_params = self.unbuilt_chart
+            self.unbuilt_chart = None
+            self.build_chart(*chart)
+            self.figure.subplots_adjust(**subplot_params)  #   Layout the pixels were rendered with
+
+    def update_bars(self, report_type, bucket, starts, totals):
+        """ New heights on the bars already drawn, if the chart shows the same buckets """
+        if self.chart_bars is None or starts is None:
+            return False
+        drawn_type, drawn_bucket, drawn_starts, bars = self.chart_bars
+        if (drawn_type, drawn_bucket) != (report_type, bucket) or not np.array_equal(drawn_starts, starts):
+            return False
+        for bar, total in zip(bars, totals):
+            bar.set_height(total)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        return True
+
+    def build_chart(self, report_type, bucket, data, sorted_dates, sorted_counts):
+        """ Create the chart's artists (drawing is up to the caller) """
+        self.ax.clear()  # Clear previous graph
+        self.chart_bars = None
 
         if not data:  # No data to plot
             self.ax.set_title("No data available", fontsize=12, fontweight="bold", color="black")
-            self.canvas.draw()
             return
 
         #   Apply common styling (consistent for all graphs)
@@ -229,62 +394,15 @@ class ReportManagement(QWidget):
         self.ax.spines["bottom"].set_color("gray")
         self.ax.grid(True, linestyle="--", linewidth=0.5, color="gray")  # Improved grid
 
-        date_counts = {}
-
-        if report_type == "Revenue Report":
-            for row in data:
-                date = datetime.strptime(row[0], "%Y-%m-%d").date()
-                revenue = float(row[-1])  # Get the total revenue column
-
-                #   Aggregate revenue for the same date
-                if date in date_counts:
-                    date_counts[date] += revenue
-                else:
-                    date_counts[date] = revenue
-
-        elif report_type == "Payment Management":
-            for row in data:
-                date = datetime.strptime(row[-1], "%Y-%m-%d").date()
-                amount = float(row[2])
-
-                if date in date_counts:
-                    date_counts[date] += amount
-                else:
-                    date_counts[date] = amount
-
-        elif report_type == "Booking Management":
-            dates = [datetime.strptime(row[3], "%Y-%m-%d").date() for row in data]
-            date_counts = Counter(dates)  # Count number of bookings per date
-
-        elif report_type == "Guest Management":
-            dates = []
-            for row in data:
-                last_stay = row[-2]
-                total_stays = row[-1]
-
-                if isinstance(last_stay, str) and last_stay not in ["No Stay", ""]:
-                    try:
-                        parsed_date = datetime.strptime(last_stay, "%Y-%m-%d").date()
-                        dates.extend([parsed_date] * total_stays)
-                    except ValueError:
-                        print(f"⚠️ Skipping invalid date: {last_stay}")
-
-            date_counts = Counter(dates) if dates else {}
-
-        else:
+        if report_type not in REPORT_COLUMNS:
             self.ax.set_title("No numerical data available", fontsize=12, fontweight="bold", color="black")
-            self.canvas.draw()
             return
 
         #   Handle empty data after processing
-        if not date_counts:
+        if len(sorted_dates) == 0:
             self.ax.set_title("No data available for this report", fontsize=12, fontweight="bold", color="black")
-            self.canvas.draw()
             return
 
-        #   Sort and extract dates & values
-        sorted_dates, sorted_counts = zip(*sorted(date_counts.items()))
-
         #   Set graph colors & labels dynamically
         graph_colors = {
             "Revenue Report": "green",
@@ -293,9 +411,11 @@ class ReportManagement(QWidget):
             "Guest Management": "purple",
         }
 
-        self.ax.bar(sorted_dates, sorted_counts, color=graph_colors.get(report_type, "gray"), label=report_type)
+        bars = self.ax.bar(sorted_dates, sorted_counts, width=BAR_WIDTHS[bucket],
+                           color=graph_colors.get(report_type, "gray"), label=report_type)
+        self.chart_bars = (report_type, bucket, sorted_dates, bars)
         self.ax.set_title(f"{report_type} Trend", fontsize=12, fontweight="bold", color="black")
-        self.ax.set_xlabel("Date", fontsize=10, fontweight="bold", color="black")
+        self.ax.set_xlabel("Date" if bucket == "Day" else f"{bucket} starting", fontsize=10, fontweight="bold", color="black")
         self.ax.set_ylabel("Count" if report_type != "Revenue Report" else "Amount ($)", fontsize=10, fontweight="bold", color="black")
         self.ax.legend()
 
@@ -304,12 +424,9 @@ class ReportManagement(QWidget):
         self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
         self.ax.tick_params(axis="x", rotation=45, labelsize=8)
 
-        #   Auto-adjust layout to prevent cut-offs
-        self.figure.tight_layout()
-        self.canvas.draw()
-
 
         
     def refresh_report(self):
-        """ Refresh the report without changing filters """
-        self.generate_report()  
+        """ Refresh the report without changing filters, unless no data changed since it was last generated """
+        if self.dirty:
+            self.generate_report()  
@@ -0,0 +1,138 @@
+""" The report queries, without any Qt, shared by the report page and headless tools.
+
+stream_report() runs one report and yields its rows in fetchmany() batches, so a
+caller can show or write the first rows while SQLite is still producing the rest.
+A CancelToken stops it between batches and interrupts a query that is still running
+(cancel() may be called from any thread).
+"""
+import sqlite3
+import threading
+
+from util.change_tracking import change_counters
+from reportManagement.rollups import DAILY_REVENUE_QUERY, refresh_rollups
+
+REPORT_TYPES = ("Guest Management", "Booking Management", "Payment Management", "Revenue Report")
+
+#   Short names for the command-line tools
+REPORT_NAMES = {
+    "guests": "Guest Management",
+    "bookings": "Booking Management",
+    "payments": "Payment Management",
+    "revenue": "Revenue Report",
+}
+
+REPORT_HEADERS = {
+    "Guest Management": ["Guest ID", "Name", "Contact", "Email", "Last Stay", "Total Stays"],
+    "Booking Management": ["Booking ID", "Guest Name", "Room No", "Check-in", "Check-out", "Room Price"],
+    "Payment Management": ["Payment ID", "Booking ID", "Amount Paid", "Payment Method", "Payment Date"],
+    "Revenue Report": ["Date", "Bookings", "Check-ins", "Room Nights", "Total Revenue"],
+}
+
+#   Tables each report reads (the Revenue rollups are derived from these); their ChangeSequence
+#   counters make up the report's data version
+REPORT_TABLES = {
+    "Guest Management": ("Guests", "Bookings"),
+    "Booking Management": ("Bookings", "Guests", "Rooms"),
+    "Payment Management": ("Payments",),
+    "Revenue Report": ("Bookings", "Payments", "Rooms"),
+}
+
+#   Rows per fetchmany() batch
+FETCH_BATCH = 500
+
+GUEST_REPORT_QUERY = """
+    SELECT G.id, G.name, G.contact, G.email,
+        COALESCE(MAX(B.check_out_date), 'No Stay') AS last_stay,
+        COUNT(B.id) AS total_stays
+    FROM Guests G
+    LEFT JOIN Bookings B ON G.id = B.guest_id
+    WHERE (B.check_in_date BETWEEN ? AND ? OR B.check_out_date BETWEEN ? AND ? OR B.id IS NULL)
+    GROUP BY G.id, G.name, G.contact, G.email
+"""
+
+BOOKING_REPORT_QUERY = """
+    SELECT B.id AS booking_id, G.name AS guest_name, R.room_number,
+        B.check_in_date, B.check_out_date, R.base_price AS room_price
+    FROM Bookings B
+    JOIN Guests G ON B.guest_id = G.id
+    JOIN Rooms R ON B.room_id = R.id
+    WHERE (B.check_in_date BETWEEN ? AND ? OR B.check_out_date BETWEEN ? AND ?)
+"""
+
+#   Range form keeps idx_payments_date usable
+PAYMENT_REPORT_QUERY = """
+    SELECT P.id AS payment_id, P.booking_id, P.amount_paid,
+        P.payment_method, date(P.payment_date)
+    FROM Payments P
+    WHERE P.payment_date >= ? AND P.payment_date < date(?, '+1 day')
+"""
+
+
+class ReportCancelled(Exception):
+    """ The report was cancelled before all rows were read """
+
+
+class CancelToken:
+    """ Shared between the thread that runs a report and the one that may cancel it """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.conn = None  #   Connection running the report right now, if any
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+    def cancel(self):
+        self.event.set()
+        conn = self.conn
+        if conn is not None:
+            conn.interrupt()  #   Safe from another thread; a finished query is not affected
+
+
+def report_query(report_type, from_date, to_date):
+    """ (sql, parameters) for one report over from_date..to_date ('YYYY-MM-DD', inclusive) """
+    if report_type == "Guest Management":
+        return GUEST_REPORT_QUERY, (from_date, to_date, from_date, to_date)
+    if report_type == "Booking Management":
+        return BOOKING_REPORT_QUERY, (from_date, to_date, from_date, to_date)
+    if report_type == "Payment Management":
+        return PAYMENT_REPORT_QUERY, (from_date, to_date)
+    if report_type == "Revenue Report":
+        #   One pre-aggregated row per day (see reportManagement.rollups)
+        return DAILY_REVENUE_QUERY, (from_date, to_date)
+    raise ValueError(f"Unknown report type: {report_type}")
+
+
+def data_version(conn, report_type):
+    """ Change numbers of the tables behind a report; equal versions mean equal report rows """
+    counters = change_counters(conn)
+    return tuple(counters.get(table_name, 0) for table_name in REPORT_TABLES[report_type])
+
+
+def stream_report(conn, report_type, from_date, to_date, batch_size=FETCH_BATCH, cancel=None):
+    """ Yield the report's rows in lists of up to `batch_size`.
+
+    Raises ReportCancelled if `cancel` is cancelled before the last batch.
+    """
+    sql, parameters = report_query(report_type, from_date, to_date)
+    if cancel is not None:
+        cancel.conn = conn
+    try:
+        if report_type == "Revenue Report":
+            refresh_rollups(conn)
+        cursor = conn.execute(sql, parameters)
+        while True:
+            if cancel is not None and cancel.cancelled:
+                raise ReportCancelled()
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+    except sqlite3.OperationalError as e:
+        if cancel is not None and cancel.cancelled:
+            raise ReportCancelled() from e  #   conn.interrupt() stopped the query
+        raise
+    finally:
+        if cancel is not None:
+            cancel.conn = None
@@ -0,0 +1,133 @@
+""" Run reports from the command line, without the GUI (and without importing Qt).
+
+The date range is split into partitions (one file per report and period) and the
+partitions run in parallel, each on its own pooled connection. SQLite in WAL mode
+lets the readers run side by side, and the sqlite3 module releases the GIL while
+a query runs, so threads are enough.
+
+Finance's nightly pull, for example:
+    python -m reportManagement.report_runner --from 2025-01-01 --to 2025-12-31 --partition month -o reports/
+writes reports/payments_2025-01-01_2025-01-31.csv and so on for every report.
+
+A partition is the report as if it had been generated for that period alone. A booking
+that spans two months therefore appears in both months' Booking files.
+"""
+import argparse
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from util.database import get_connection, release_connection
+from reportManagement.report_export import FORMATS, export_report
+from reportManagement.report_queries import REPORT_NAMES
+from reportManagement.rollups import refresh_rollups
+
+PERIODS = ("none", "year", "month", "week", "day")
+
+#   Parallel partitions (the default leaves a core for the GUI terminals sharing the database)
+DEFAULT_WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
+
+
+def next_period_start(day, period):
+    if period == "year":
+        return date(day.year + 1, 1, 1)
+    if period == "month":
+        return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+    if period == "week":
+        return day + timedelta(days=7 - day.weekday())  #   Weeks start on Monday
+    if period == "day":
+        return day + timedelta(days=1)
+    raise ValueError(f"Unknown period: {period}")
+
+
+def partitions(from_date, to_date, period="month"):
+    """ [(first day, last day)] as 'YYYY-MM-DD' covering from_date..to_date, split on period boundaries """
+    first, last = date.fromisoformat(from_date), date.fromisoformat(to_date)
+    if first > last:
+        raise ValueError(f"--from {from_date} is after --to {to_date}")
+    if period == "none":
+        return [(first.isoformat(), last.isoformat())]
+
+    ranges = []
+    while first <= last:
+        end = min(next_period_start(first, period) - timedelta(days=1), last)
+        ranges.append((first.isoformat(), end.isoformat()))
+        first = end + timedelta(days=1)
+    return ranges
+
+
+def run_partition(name, from_date, to_date, path, fmt):
+    """ Runs on a pool thread: write one report partition; returns (path, rows, seconds) """
+    start = time.perf_counter()
+    conn = get_connection()
+    try:
+        rows = export_report(conn, REPORT_NAMES[name], from_date, to_date, path, fmt)
+    finally:
+        release_connection(conn)
+    return path, rows, time.perf_counter() - start
+
+
+def run_reports(names, from_date, to_date, out_dir, period="month", fmt="csv", workers=DEFAULT_WORKERS):
+    """ Write every (report, partition) file under out_dir; returns [(path, rows, seconds or error)] """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [
+        (name, first, last, os.path.join(out_dir, f"{name}_{first}_{last}.{fmt}"))
+        for name in names
+        for first, last in partitions(from_date, to_date, period)
+    ]
+
+    if "revenue" in names:
+        #   Bring the rollups up to date once, instead of every partition queueing for the write lock
+        conn = get_connection()
+        try:
+            refresh_rollups(conn)
+        finally:
+            release_connection(conn)
+
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_partition, name, first, last, path, fmt): path for name, first, last, path in jobs}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except (RuntimeError, ValueError, sqlite3.Error) as e:
+                results.append((futures[future], None, e))
+    return sorted(results, key=lambda result: result[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run reports without the GUI and write them to files")
+    parser.add_argument("reports", nargs="*", help=f"Reports to run: {', '.join(sorted(REPORT_NAMES))} (default: all)")
+    parser.add_argument("--from", dest="from_date", required=True, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="to_date", required=True, help="Last day (YYYY-MM-DD)")
+    parser.add_argument("--partition", choices=PERIODS, default="month", help="One file per report and period")
+    parser.add_argument("-o", "--out-dir", default="reports", help="Directory for the files")
+    parser.add_argument("--format", choices=FORMATS, default="csv", help="Output format")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Partitions run in parallel")
+    args = parser.parse_args()
+    unknown = sorted(set(args.reports) - set(REPORT_NAMES))
+    if unknown:
+        parser.error(f"unknown report: {', '.join(unknown)}")
+
+    start = time.perf_counter()
+    try:
+        results = run_reports(args.reports or sorted(REPORT_NAMES), args.from_date, args.to_date,
+                              args.out_dir, args.partition, args.format, max(1, args.workers))
+    except ValueError as e:
+        parser.error(str(e))
+
+    failed = 0
+    for path, rows, outcome in results:
+        if rows is None:
+            failed += 1
+            print(f"❌ {path}: {outcome}")
+        else:
+            print(f"  {path}  {rows} rows  {outcome * 1000:.0f} ms")
+    print(f"  {len(results) - failed} files in {time.perf_counter() - start:.2f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
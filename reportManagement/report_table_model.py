@@ -0,0 +1,53 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class ReportTableModel(QAbstractTableModel):
+    """ Read-only report rows, appended in chunks while the report is still running.
+
+    Unlike a QTableWidget there is no item per cell: a chunk of rows is one
+    beginInsertRows/endInsertRows pair and cells are formatted only when painted.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.headers = []
+        self.rows = []
+
+    def set_headers(self, headers):
+        """ Switch to another report's columns (drops the rows) """
+        self.beginResetModel()
+        self.headers = list(headers)
+        self.rows = []
+        self.endResetModel()
+
+    def clear(self):
+        if self.rows:
+            self.beginResetModel()
+            self.rows = []
+            self.endResetModel()
+
+    def append_rows(self, rows):
+        if not rows:
+            return
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+    #   Qt model interface
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section] if section < len(self.headers) else None
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        row = self.rows[index.row()]
+        return str(row[index.column()]) if index.column() < len(row) else None
@@ -0,0 +1,242 @@
+""" Day-level report totals kept in rollup tables and refreshed from a queue of dirty dates.
+
+DailyRoomStats holds, per day and room type, the bookings arriving that day, how many
+of them actually checked in, the payments received for them (revenue) and the
+room-nights occupied that night. DailyPaymentStats holds the payments taken per day and
+method. A report over any range reads one row per day (and type or method) instead of
+joining Bookings, Payments and Rooms row by row.
+
+The triggers do not maintain the totals themselves: a booking spans several nights
+and its revenue moves with every payment. They only queue the affected date range in
+RollupDirtyRanges, and refresh_rollups() recomputes just those days before a report
+reads them.
+
+Read, check or rebuild from the project root:
+    python -m reportManagement.rollups --from 2025-01-01 --to 2025-01-31
+    python -m reportManagement.rollups --from 2025-01-01 --to 2025-12-31 --by room_type
+    python -m reportManagement.rollups --check     # compare with the base tables
+    python -m reportManagement.rollups --rebuild   # recompute every day
+"""
+import argparse
+import math
+from datetime import date, timedelta
+
+from util.database import begin_immediate, get_connection, release_connection
+
+
+#   Totals for the days :first_day..:last_day, written into {table}
+ROOM_STATS_SQL = """
+    WITH RECURSIVE nights(room_id, day, check_out_date) AS (
+        --   Walk each booking's own nights, so the cost is the nights in range, not days x bookings.
+        --   "+" keeps SQLite on the bounded check-in range rather than every later check-out
+        SELECT room_id, max(check_in_date, :first_day), check_out_date
+        FROM Bookings
+        WHERE check_in_date BETWEEN :earliest_check_in AND :last_day AND +check_out_date > :first_day
+            AND check_in_date < check_out_date
+            AND IFNULL(status, '') != 'Cancelled'
+        UNION ALL
+        SELECT room_id, date(day, '+1 day'), check_out_date
+        FROM nights
+        WHERE date(day, '+1 day') < check_out_date AND date(day, '+1 day') <= :last_day
+    )
+    INSERT INTO {table} (day, room_type, bookings, check_ins, room_nights, revenue)
+    SELECT day, room_type, SUM(bookings), SUM(check_ins), SUM(room_nights), SUM(revenue)
+    FROM (
+        --   Arrivals and the money paid for them
+        SELECT b.check_in_date AS day, r.room_type,
+            IFNULL(b.status, '') != 'Cancelled' AS bookings,
+            IFNULL(b.status, '') IN ('CHECKED-IN', 'CHECKED-OUT') AS check_ins,
+            0 AS room_nights,
+            IFNULL(bal.paid_total, 0) AS revenue
+        FROM Bookings b
+        JOIN Rooms r ON r.id = b.room_id
+        LEFT JOIN BookingBalances bal ON bal.booking_id = b.id
+        WHERE b.check_in_date BETWEEN :first_day AND :last_day
+        UNION ALL
+        --   One room-night per night a booking covers
+        SELECT n.day, r.room_type, 0, 0, 1, 0
+        FROM nights n
+        JOIN Rooms r ON r.id = n.room_id
+    )
+    GROUP BY day, room_type
+"""
+
+PAYMENT_STATS_SQL = """
+    INSERT INTO {table} (day, payment_method, payments, amount)
+    SELECT date(payment_date), IFNULL(payment_method, 'Unknown'), COUNT(*), SUM(amount_paid)
+    FROM Payments
+    WHERE payment_date >= :first_day AND payment_date < date(:last_day, '+1 day')
+    GROUP BY date(payment_date), IFNULL(payment_method, 'Unknown')
+"""
+
+#   Revenue report: one row per day
+DAILY_REVENUE_QUERY = """
+    SELECT day, SUM(bookings), SUM(check_ins), SUM(room_nights), ROUND(SUM(revenue), 2)
+    FROM DailyRoomStats
+    WHERE day BETWEEN ? AND ?
+    GROUP BY day
+    ORDER BY day
+"""
+
+ROOM_TYPE_QUERY = """
+    SELECT room_type, SUM(bookings), SUM(check_ins), SUM(room_nights), ROUND(SUM(revenue), 2)
+    FROM DailyRoomStats
+    WHERE day BETWEEN ? AND ?
+    GROUP BY room_type
+    ORDER BY room_type
+"""
+
+PAYMENT_METHOD_QUERY = """
+    SELECT payment_method, SUM(payments), ROUND(SUM(amount), 2)
+    FROM DailyPaymentStats
+    WHERE day BETWEEN ? AND ?
+    GROUP BY payment_method
+    ORDER BY payment_method
+"""
+
+
+def merge_ranges(ranges):
+    """ Sorted, non-overlapping (first, last) date spans covering every (first_day, last_day) text range """
+    spans = []
+    for first_day, last_day in ranges:
+        try:
+            first, last = date.fromisoformat(first_day), date.fromisoformat(last_day)
+        except (TypeError, ValueError):
+            continue  #   Not a date; nothing to total for it
+        spans.append((first, max(first, last)))
+
+    merged = []
+    for first, last in sorted(spans):
+        if merged and first <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def recompute_days(conn, first, last, room_table="DailyRoomStats", payment_table="DailyPaymentStats"):
+    """ Replace the totals for first..last (dates) with fresh ones from the base tables """
+    longest_stay = conn.execute(
+        "SELECT MAX(julianday(check_out_date) - julianday(check_in_date)) FROM Bookings"
+    ).fetchone()[0] or 0
+    days = {
+        "first_day": first.isoformat(),
+        "last_day": last.isoformat(),
+        "earliest_check_in": (first - timedelta(days=math.ceil(max(longest_stay, 0)))).isoformat(),
+    }
+    conn.execute(f"DELETE FROM {room_table} WHERE day BETWEEN :first_day AND :last_day", days)
+    conn.execute(f"DELETE FROM {payment_table} WHERE day BETWEEN :first_day AND :last_day", days)
+    conn.execute(ROOM_STATS_SQL.format(table=room_table), days)
+    conn.execute(PAYMENT_STATS_SQL.format(table=payment_table), days)
+
+
+def refresh_rollups(conn):
+    """ Recompute the days the triggers queued; returns how many days were rebuilt.
+
+    Costs a single primary-key read when nothing is queued. Otherwise it commits a transaction
+    of its own, so `conn` must not be in one (sqlite3.ProgrammingError).
+    """
+    if conn.execute("SELECT 1 FROM RollupDirtyRanges LIMIT 1").fetchone() is None:
+        return 0
+
+    begin_immediate(conn)  #   No write can slip in between the queue read and the recompute
+    try:
+        queued = conn.execute("SELECT first_day, last_day FROM RollupDirtyRanges").fetchall()
+        spans = merge_ranges(queued)
+        for first, last in spans:
+            recompute_days(conn, first, last)
+        conn.execute("DELETE FROM RollupDirtyRanges")
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    return sum((last - first).days + 1 for first, last in spans)
+
+
+def data_range(conn):
+    """ (first_day, last_day) text covering every booking night and payment, or None for an empty database """
+    row = conn.execute("""
+        SELECT MIN(first_day), MAX(last_day) FROM (
+            SELECT MIN(check_in_date) AS first_day, MAX(check_out_date) AS last_day FROM Bookings
+            UNION ALL
+            SELECT date(MIN(payment_date)), date(MAX(payment_date)) FROM Payments
+        )
+    """).fetchone()
+    return row if row and row[0] else None
+
+
+def rebuild_rollups(conn):
+    """ Drop every total and recompute all days from the base tables """
+    with conn:
+        conn.execute("DELETE FROM DailyRoomStats")
+        conn.execute("DELETE FROM DailyPaymentStats")
+        span = data_range(conn)
+        if span:
+            conn.execute("INSERT INTO RollupDirtyRanges (first_day, last_day) VALUES (?, ?)", span)
+    return refresh_rollups(conn)
+
+
+def check_rollups(conn):
+    """ [(table, row)] for every rollup row that differs from a fresh computation (both directions) """
+    refresh_rollups(conn)
+    span = data_range(conn)
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS ExpectedRoomStats AS SELECT * FROM DailyRoomStats WHERE 0")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS ExpectedPaymentStats AS SELECT * FROM DailyPaymentStats WHERE 0")
+    conn.execute("DELETE FROM ExpectedRoomStats")
+    conn.execute("DELETE FROM ExpectedPaymentStats")
+    if span:
+        first, last = merge_ranges([span])[0]
+        recompute_days(conn, first, last, "ExpectedRoomStats", "ExpectedPaymentStats")
+
+    mismatches = []
+    for table, expected, key in (("DailyRoomStats", "ExpectedRoomStats", "day, room_type"),
+                                 ("DailyPaymentStats", "ExpectedPaymentStats", "day, payment_method")):
+        #   Round REAL totals so float summation order does not count as a difference
+        columns = f"{key}, " + ", ".join(
+            f"ROUND({name}, 2)" for name in [row[1] for row in conn.execute(f"PRAGMA table_info({table})")][2:]
+        )
+        rows = conn.execute(f"""
+            SELECT * FROM (SELECT {columns} FROM {table} EXCEPT SELECT {columns} FROM {expected})
+            UNION ALL
+            SELECT * FROM (SELECT {columns} FROM {expected} EXCEPT SELECT {columns} FROM {table})
+        """).fetchall()
+        mismatches.extend((table, row) for row in rows)
+    conn.commit()
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show, check or rebuild the daily report rollups")
+    parser.add_argument("--from", dest="from_date", help="First day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="to_date", help="Last day (YYYY-MM-DD)")
+    parser.add_argument("--by", choices=["day", "room_type", "method"], default="day", help="Grouping")
+    parser.add_argument("--check", action="store_true", help="Compare the rollups with the base tables")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute every day")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    try:
+        if args.rebuild:
+            print(f"  Rebuilt {rebuild_rollups(conn)} days")
+            return 0
+        if args.check:
+            mismatches = check_rollups(conn)
+            for table, row in mismatches:
+                print(f"❌ {table}: {row}")
+            if not mismatches:
+                print("  Rollups match the base tables.")
+            return 1 if mismatches else 0
+        if not args.from_date or not args.to_date:
+            parser.error("give --from and --to, or --check / --rebuild")
+
+        refresh_rollups(conn)
+        query = {"day": DAILY_REVENUE_QUERY, "room_type": ROOM_TYPE_QUERY, "method": PAYMENT_METHOD_QUERY}[args.by]
+        for row in conn.execute(query, (args.from_date, args.to_date)):
+            print("  " + "  ".join(f"{str(value):>12}" for value in row))
+        return 0
+    finally:
+        release_connection(conn)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
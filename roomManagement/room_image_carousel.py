@@ -1,13 +1,12 @@
 from PyQt6.QtWidgets import QWidget,QMessageBox, QLabel, QVBoxLayout, QPushButton, QStackedWidget, QHBoxLayout
 from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QPixmap, QIcon
+from PyQt6.QtGui import QIcon
 import os
-import sqlite3
+from util.database import get_connection, release_connection
 
+from util.image_store import ROOM_IMAGE_DIR, forget_images, image_file
 from util.imgpop import ImagePopup
-
-#   Define Image Storage Directory
-ROOM_IMAGE_DIR = os.path.join(os.path.expanduser("~"), "documents/hotel-room-images/room_img")
+from util.thumbnail_cache import get_thumbnail_cache
 
 class RoomImageCarousel(QWidget):
     def __init__(self, room_id=None):
@@ -51,13 +50,13 @@ class RoomImageCarousel(QWidget):
 
         self.current_index = 0  #   Reset image index when switching rooms
 
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT id, image_path FROM RoomImages WHERE room_id=?", (self.room_id,))
         images = cursor.fetchall()
-        conn.close()
+        release_connection(conn)
 
-        self.image_paths = [(img[0], os.path.join(ROOM_IMAGE_DIR, img[1])) for img in images]
+        self.image_paths = [(img[0], image_file(img[1], ROOM_IMAGE_DIR)) for img in images]
 
         #   Clear previous images but keep delete functionality
         while self.image_stack.count():
@@ -84,9 +83,8 @@ class RoomImageCarousel(QWidget):
 
                 #   Create Clickable Image Label
                 image_label = QLabel()
-                pixmap = QPixmap(image_path).scaled(250, 250, Qt.AspectRatioMode.KeepAspectRatio)
-                image_label.setPixmap(pixmap)
                 image_label.setFixedSize(250, 150)
+                get_thumbnail_cache().load_into(image_label, image_path, 250, 250)  #   Placeholder until the thumbnail is ready
                 image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
                 image_label.setCursor(Qt.CursorShape.PointingHandCursor)
                 image_label.mousePressEvent = lambda event, img=image_path: self.view_image(img)
@@ -151,26 +149,18 @@ class RoomImageCarousel(QWidget):
         )
 
         if confirm == QMessageBox.StandardButton.Yes:
-            conn = sqlite3.connect("hotel_management.db")
+            conn = get_connection()
             cursor = conn.cursor()
 
             cursor.execute("SELECT image_path FROM RoomImages WHERE id=?", (image_id,))
             image = cursor.fetchone()
-            conn.close()
 
-            if image:
-                image_path = os.path.join(ROOM_IMAGE_DIR, image[0])
-                if os.path.exists(image_path):
-                    os.remove(image_path)  #   Delete from disk
-                else:
-                    print(f"⚠️ Warning: Image file not found: {image_path}")
-
-            #   Remove from database
-            conn = sqlite3.connect("hotel_management.db")
-            cursor = conn.cursor()
+            #   Remove from database, then drop the file once nothing refers to it
             cursor.execute("DELETE FROM RoomImages WHERE id=?", (image_id,))
             conn.commit()
-            conn.close()
+            if image:
+                forget_images(conn, [image[0]], ROOM_IMAGE_DIR)
+            release_connection(conn)
 
             QMessageBox.information(self, "Success", "Image deleted successfully!")
 
@@ -252,9 +242,8 @@ class RoomImageCarousel(QWidget):
         #   Create Clickable Image Label
         image_label = QLabel()
         image_label.image_path = file_path  #   Store file path in QLabel object
-        pixmap = QPixmap(file_path).scaled(250, 250, Qt.AspectRatioMode.KeepAspectRatio)
-        image_label.setPixmap(pixmap)
         image_label.setFixedSize(250, 150)
+        get_thumbnail_cache().load_into(image_label, file_path, 250, 250)
         image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         image_label.setCursor(Qt.CursorShape.PointingHandCursor)
         image_label.mousePressEvent = lambda event, img=file_path: self.view_image(img)
@@ -6,30 +6,25 @@ from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import QSizePolicy
 
 from PyQt6.QtWidgets import QFileDialog, QLabel
-from PyQt6.QtGui import QPixmap
-import os
-import shutil
 from PyQt6.QtWidgets import QFileDialog
 from PyQt6.QtGui import QIcon
-import sqlite3
+from util.database import get_connection, release_connection
+from util.image_store import ROOM_IMAGE_DIR, forget_images, image_file, store_image
+from bookingManagement.availability_index import invalidate_availability_index
 
 from roomManagement.room_image_carousel import RoomImageCarousel
 from util.custom_btn import CustomButton
 from util.custom_input import CustomInput
 from util.custom_label_title import CustomLabelTitle
+from util.event_bus import DirtySet, get_event_bus
 
 
-# Define the fixed directory for room images
-IMAGE_DIR = os.path.join(os.path.expanduser("~"), "documents/hotel-room-images/room_img")
-
-# Ensure the directory exists
-os.makedirs(IMAGE_DIR, exist_ok=True)
-
 class RoomManagement(QWidget):
     def __init__(self):
         super().__init__()
         self.current_room_id = None
         self.temporary_images = []
+        self.dirty = DirtySet(["rooms"], self)
         self.initUI()
 
 
@@ -154,45 +149,82 @@ class RoomManagement(QWidget):
 
     def load_rooms(self):
         """ Load and display room data in the table with Edit & Delete buttons in Actions column """
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT id, room_number, room_type, capacity, base_price FROM Rooms")
         rooms = cursor.fetchall()
-        conn.close()
+        release_connection(conn)
 
         self.room_table.setRowCount(len(rooms))
         self.room_table.setColumnCount(6)
         self.room_table.setHorizontalHeaderLabels(["ID", "Room Number", "Type", "Capacity", "Price", "Actions"])
 
-        for row, (room_id, room_no, room_type, capacity, price) in enumerate(rooms):
-            self.room_table.setItem(row, 0, QTableWidgetItem(str(room_id)))
-            self.room_table.setItem(row, 1, QTableWidgetItem(room_no))
-            self.room_table.setItem(row, 2, QTableWidgetItem(room_type))
-            self.room_table.setItem(row, 3, QTableWidgetItem(str(capacity)))
-            self.room_table.setItem(row, 4, QTableWidgetItem(f"${price}"))
-
-            action_widget = QWidget()
-            action_layout = QHBoxLayout(action_widget)
-            action_layout.setContentsMargins(0, 0, 0, 0)
-
-            # Edit Icon Button
-            edit_button = QPushButton()
-            edit_button.setIcon(QIcon("icons/ic_edit.png"))  # Use edit icon
-            edit_button.setFixedSize(30, 30)  # Set button size
-            edit_button.setStyleSheet("border: none;")  # Remove button border
-            edit_button.clicked.connect(lambda _, r_id=room_id: self.edit_room(r_id))
-            action_layout.addWidget(edit_button)
-
-            # Delete Icon Button
-            delete_button = QPushButton()
-            delete_button.setIcon(QIcon("icons/ic_delete.png"))  # Use delete icon
-            delete_button.setFixedSize(30, 30)  # Set button size
-            delete_button.setStyleSheet("border: none;")  # Remove button border
-            delete_button.clicked.connect(lambda _, r_id=room_id: self.delete_room(r_id))
-            action_layout.addWidget(delete_button)
-
-            action_widget.setLayout(action_layout)
-            self.room_table.setCellWidget(row, 5, action_widget)
+        for row, room in enumerate(rooms):
+            self.fill_room_row(row, room)
+
+    def fill_room_row(self, row, room):
+        """ Write one (id, room_number, room_type, capacity, base_price) row and its action buttons """
+        room_id, room_no, room_type, capacity, price = room
+        self.room_table.setItem(row, 0, QTableWidgetItem(str(room_id)))
+        self.room_table.setItem(row, 1, QTableWidgetItem(room_no))
+        self.room_table.setItem(row, 2, QTableWidgetItem(room_type))
+        self.room_table.setItem(row, 3, QTableWidgetItem(str(capacity)))
+        self.room_table.setItem(row, 4, QTableWidgetItem(f"${price}"))
+
+        action_widget = QWidget()
+        action_layout = QHBoxLayout(action_widget)
+        action_layout.setContentsMargins(0, 0, 0, 0)
+
+        # Edit Icon Button
+        edit_button = QPushButton()
+        edit_button.setIcon(QIcon("icons/ic_edit.png"))  # Use edit icon
+        edit_button.setFixedSize(30, 30)  # Set button size
+        edit_button.setStyleSheet("border: none;")  # Remove button border
+        edit_button.clicked.connect(lambda _, r_id=room_id: self.edit_room(r_id))
+        action_layout.addWidget(edit_button)
+
+        # Delete Icon Button
+        delete_button = QPushButton()
+        delete_button.setIcon(QIcon("icons/ic_delete.png"))  # Use delete icon
+        delete_button.setFixedSize(30, 30)  # Set button size
+        delete_button.setStyleSheet("border: none;")  # Remove button border
+        delete_button.clicked.connect(lambda _, r_id=room_id: self.delete_room(r_id))
+        action_layout.addWidget(delete_button)
+
+        action_widget.setLayout(action_layout)
+        self.room_table.setCellWidget(row, 5, action_widget)
+
+    def patch_rooms(self, room_ids):
+        """ Re-read just these rooms: update their rows in place, append new ones and drop deleted ones """
+        room_ids = list(room_ids)
+        conn = get_connection()
+        rooms = {room[0]: room for room in conn.execute(f"""
+            SELECT id, room_number, room_type, capacity, base_price FROM Rooms
+            WHERE id IN ({', '.join('?' * len(room_ids))})
+        """, room_ids)}
+        release_connection(conn)
+
+        positions = {int(self.room_table.item(row, 0).text()): row for row in range(self.room_table.rowCount())}
+        for room_id in sorted(rooms):
+            if room_id in positions:
+                self.fill_room_row(positions[room_id], rooms[room_id])
+            else:
+                #   Ids only grow, so a new room belongs at the end like in load_rooms()
+                row = self.room_table.rowCount()
+                self.room_table.insertRow(row)
+                self.fill_room_row(row, rooms[room_id])
+        for row in sorted((positions[room_id] for room_id in room_ids if room_id in positions and room_id not in rooms), reverse=True):
+            self.room_table.removeRow(row)
+
+    def apply_changes(self):
+        """ Patch the rooms changed since the last look (everything if unknown); nothing changed means no query """
+        changes = self.dirty.take()
+        if "rooms" not in changes:
+            return
+        if changes["rooms"] is None:
+            self.load_rooms()
+        else:
+            self.patch_rooms(changes["rooms"])
 
     def add_room(self):
         """ Add a new room along with images """
@@ -205,25 +237,24 @@ class RoomManagement(QWidget):
             QMessageBox.warning(self, "Input Error", "All fields are required!")
             return
 
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("INSERT INTO Rooms (room_number, room_type, capacity, base_price) VALUES (?, ?, ?, ?)",
                        (room_no, room_type, capacity, base_price))
         conn.commit()
         self.current_room_id = cursor.lastrowid  # Get the new room ID
 
-        # Save room images
+        # Save room images (identical files are stored once)
         for file_path in self.room_image_carousel.temporary_images:
-            filename = os.path.basename(file_path)
-            new_path = os.path.join(IMAGE_DIR, filename)
-            shutil.copy(file_path, new_path)
             cursor.execute("INSERT INTO RoomImages (room_id, image_path) VALUES (?, ?)",
-                           (self.current_room_id, filename))
+                           (self.current_room_id, store_image(conn, file_path)))
         conn.commit()
-        conn.close()
+        release_connection(conn)
+        invalidate_availability_index()  #   Booking page picks up the new room
+        get_event_bus().publish("rooms", [self.current_room_id])
 
         QMessageBox.information(self, "Success", "Room added successfully!")
-        self.load_rooms()
+        self.apply_changes()
         self.clear_form()
         self.room_image_carousel.load_room_images()
 
@@ -231,11 +262,11 @@ class RoomManagement(QWidget):
 
     def edit_room(self, room_id):
         """ Edit room details including showing the stored image in the carousel """
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT room_number, room_type, capacity, base_price FROM Rooms WHERE id=?", (room_id,))
         room = cursor.fetchone()
-        conn.close()
+        release_connection(conn)
 
         if not room:
             QMessageBox.warning(self, "Error", "Room not found!")
@@ -267,7 +298,7 @@ class RoomManagement(QWidget):
             QMessageBox.warning(self, "Input Error", "All fields are required!")
             return
 
-        conn = sqlite3.connect("hotel_management.db")
+        conn = get_connection()
         cursor = conn.cursor()
 
         #   Update Room Info
@@ -279,20 +310,19 @@ class RoomManagement(QWidget):
 
         #   Now save the images from temporary memory (ONLY when clicking 'Update Room')
         for file_path in self.temporary_images:
-            file_name = os.path.basename(file_path)
-            new_path = os.path.join(IMAGE_DIR, file_name)
-            shutil.copy(file_path, new_path)  #   Copy image to permanent storage
-
-            cursor.execute("INSERT INTO RoomImages (room_id, image_path) VALUES (?, ?)", (room_id, file_name))
+            cursor.execute("INSERT INTO RoomImages (room_id, image_path) VALUES (?, ?)",
+                           (room_id, store_image(conn, file_path)))  #   Copy image to permanent storage
 
         conn.commit()
-        conn.close()
+        release_connection(conn)
+        invalidate_availability_index()
+        get_event_bus().publish("rooms", [room_id])
 
         #   Clear temporary images after saving
         self.temporary_images.clear()
 
         QMessageBox.information(self, "Success", "Room updated successfully!")
-        self.load_rooms()
+        self.apply_changes()
         self.room_image_carousel.load_room_images()
 
         #   Reset button to "Add Room"
@@ -307,40 +337,29 @@ class RoomManagement(QWidget):
 
 
     def delete_room(self, room_id):
-        """ Deletes a room and removes its image from 'hotel-room-images/' if no other room is using it. """
+        """ Deletes a room and its images; image files go once no other room or guest is using them. """
         confirm = QMessageBox.question(self, "Delete Room", "Are you sure you want to delete this room?",
                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
 
         if confirm == QMessageBox.StandardButton.Yes:
-            conn = sqlite3.connect("hotel_management.db")
+            conn = get_connection()
             cursor = conn.cursor()
 
-            # Get the image filename before deleting the room
-            cursor.execute("SELECT image_path FROM Rooms WHERE id=?", (room_id,))
-            result = cursor.fetchone()
-            image_filename = result[0] if result else None
+            # Get the image paths before deleting the room
+            cursor.execute("SELECT image_path FROM RoomImages WHERE room_id=?", (room_id,))
+            image_paths = [row[0] for row in cursor.fetchall()]
 
-            # Delete the room from the database
+            # Delete the room and its image rows from the database
+            cursor.execute("DELETE FROM RoomImages WHERE room_id=?", (room_id,))
             cursor.execute("DELETE FROM Rooms WHERE id=?", (room_id,))
             conn.commit()
 
-            # Check if the image is still used by any other room
-            if image_filename:
-                cursor.execute("SELECT COUNT(*) FROM Rooms WHERE image_path=?", (image_filename,))
-                count = cursor.fetchone()[0]
-
-                if count == 0:  # If no other rooms use the image, delete the file
-                    image_path = os.path.join(os.path.expanduser("~"), "documents/hotel-room-images", image_filename)
-                    if os.path.exists(image_path):
-                        try:
-                            os.remove(image_path)
-                            print(f"Deleted image: {image_path}")  # Log deletion
-                        except Exception as e:
-                            print(f" Error deleting image: {str(e)}")
-
-            conn.close()
+            forget_images(conn, image_paths, ROOM_IMAGE_DIR)
+            release_connection(conn)
+            invalidate_availability_index()
+            get_event_bus().publish("rooms", [room_id])
             QMessageBox.information(self, "Success", "Room deleted successfully!")
-            self.load_rooms()
+            self.apply_changes()
 
     def upload_images(self):
         """ Allow users to select multiple images and ensure they update correctly in the carousel. """
@@ -362,23 +381,20 @@ class RoomManagement(QWidget):
         
         else:
             #   Save images directly to the database
-            conn = sqlite3.connect("hotel_management.db")
+            conn = get_connection()
             cursor = conn.cursor()
 
             for file_path in files:
-                file_name = os.path.basename(file_path)
-                new_path = os.path.join(IMAGE_DIR, file_name)
-
                 try:
-                    shutil.copy(file_path, new_path)  #   Copy image to the correct directory
+                    stored_path = store_image(conn, file_path)  #   Copied only if this content is new
                     cursor.execute("INSERT INTO RoomImages (room_id, image_path) VALUES (?, ?)", 
-                                (self.current_room_id, file_name))
-                    self.room_image_carousel.add_image_to_carousel(new_path, is_temporary=False)  #   Show in UI
+                                (self.current_room_id, stored_path))
+                    self.room_image_carousel.add_image_to_carousel(image_file(stored_path, ROOM_IMAGE_DIR), is_temporary=False)  #   Show in UI
                 except Exception as e:
                     QMessageBox.warning(self, "Error", f"Failed to save image: {str(e)}")
 
             conn.commit()
-            conn.close()
+            release_connection(conn)
 
             QMessageBox.information(self, "Success", f"{len(files)} images uploaded!")
 
@@ -416,6 +432,6 @@ class RoomManagement(QWidget):
         self.repaint()  # Force update UI if needed
 
     def refresh_room_list(self):
-        """ Refresh the room list and update the UI """
-        self.load_rooms()  
+        """ Bring the room list up to date (only changed rooms are read again) and clear the form """
+        self.apply_changes()
         self.clear_form()  
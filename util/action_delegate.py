@@ -0,0 +1,59 @@
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt6.QtGui import QIcon
+from PyQt6.QtCore import Qt, QEvent, QRect, QSize, pyqtSignal
+
+
+class ActionButtonDelegate(QStyledItemDelegate):
+    """ Paints a row of icon buttons in a table cell instead of creating real QPushButtons.
+
+    `actions` is a list of (name, icon_path, is_enabled) where is_enabled is an optional
+    callable taking the row number. Clicks emit `action_triggered(name, row)`.
+    """
+
+    action_triggered = pyqtSignal(str, int)
+
+    def __init__(self, actions, button_size=30, spacing=4, parent=None):
+        super().__init__(parent)
+        self.button_size = button_size
+        self.spacing = spacing
+        #   Load each icon once for the whole column
+        self.actions = [(name, QIcon(icon_path), is_enabled) for name, icon_path, is_enabled in actions]
+
+    def button_rects(self, cell_rect):
+        """ Rectangles of every button inside a cell """
+        rects = []
+        x = cell_rect.left() + self.spacing
+        y = cell_rect.top() + (cell_rect.height() - self.button_size) // 2
+        for _ in self.actions:
+            rects.append(QRect(x, y, self.button_size, self.button_size))
+            x += self.button_size + self.spacing
+        return rects
+
+    def is_enabled(self, row, action):
+        is_enabled = action[2]
+        return is_enabled(row) if is_enabled else True
+
+    def paint(self, painter, option, index):
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+
+        icon_size = self.button_size - 8
+        for action, rect in zip(self.actions, self.button_rects(option.rect)):
+            mode = QIcon.Mode.Normal if self.is_enabled(index.row(), action) else QIcon.Mode.Disabled
+            icon_rect = QRect(0, 0, icon_size, icon_size)
+            icon_rect.moveCenter(rect.center())
+            action[1].paint(painter, icon_rect, Qt.AlignmentFlag.AlignCenter, mode)
+
+    def sizeHint(self, option, index):
+        count = len(self.actions)
+        return QSize(count * self.button_size + (count + 1) * self.spacing, self.button_size + 4)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            position = event.position().toPoint()
+            for action, rect in zip(self.actions, self.button_rects(option.rect)):
+                if rect.contains(position):
+                    if self.is_enabled(index.row(), action):
+                        self.action_triggered.emit(action[0], index.row())
+                    return True
+        return super().editorEvent(event, model, option, index)
@@ -0,0 +1,20 @@
+""" Change numbers for tables whose on-screen copies are refreshed incrementally.
+
+ChangeSequence holds one counter per tracked table. Every insert, update or delete
+bumps it. For Guests, changed rows are also stamped with the new value in their
+change_seq column and deleted rows leave a tombstone with it, so a page that
+remembers the counter it last saw can ask for exactly the rows that changed since,
+and skip the query altogether when the counter has not moved. Bookings, Rooms and
+Payments only keep the counter, which tells util.event_bus which kind of data
+another terminal changed.
+"""
+
+def change_counters(conn):
+    """ {table name: change number} for every tracked table """
+    return dict(conn.execute("SELECT table_name, seq FROM ChangeSequence"))
+
+
+def change_seq(conn, table_name):
+    """ Current change number of a tracked table (0 if nothing has changed yet) """
+    row = conn.execute("SELECT seq FROM ChangeSequence WHERE table_name = ?", (table_name,)).fetchone()
+    return row[0] if row else 0
@@ -36,10 +36,14 @@ class DashboardCard(QFrame):
         opacity_effect.setOpacity(0.7)
         bg_label.setGraphicsEffect(opacity_effect)
 
-        value_label = QLabel(str(value), self)
-        value_label.setFont(QFont("Arial", 30, QFont.Weight.Bold))
-        value_label.setStyleSheet("color: white; background: transparent; text-align: right")
-        value_label.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignCenter)
+        self.value_label = QLabel(str(value), self)
+        self.value_label.setFont(QFont("Arial", 30, QFont.Weight.Bold))
+        self.value_label.setStyleSheet("color: white; background: transparent; text-align: right")
+        self.value_label.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignCenter)
 
-        value_label.setGeometry(30, 190, 200, 50)  #   Adjusted to overlay the image
+        self.value_label.setGeometry(30, 190, 200, 50)  #   Adjusted to overlay the image
+
+    def set_value(self, value):
+        """ Update the number shown on the card in place """
+        self.value_label.setText(str(value))
 
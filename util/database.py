@@ -0,0 +1,224 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+
+#   Database file used by every page (override with HOTEL_DB_PATH)
+DB_PATH = os.environ.get("HOTEL_DB_PATH", "hotel_management.db")
+
+#   Connection tuning, applied once when a connection is opened
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",      # Readers never block the writer
+    "PRAGMA cache_size = -16000",     # ~16 MB page cache per connection
+    "PRAGMA mmap_size = 134217728",   # 128 MB memory-mapped reads
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+#   Prepared statements kept per connection (sqlite3 default is 128)
+STATEMENT_CACHE_SIZE = 256
+
+#   Queries slower than this are printed as they happen
+SLOW_QUERY_MS = float(os.environ.get("HOTEL_SLOW_QUERY_MS", "100"))
+
+
+class QueryStats:
+    """ Thread-safe counters for connections and query timings """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.query_count = 0
+        self.total_time = 0.0
+        self.by_statement = {}  # sql -> [count, total_seconds, max_seconds]
+
+    def reset(self):
+        with self.lock:
+            self._clear()
+
+    def record_connection(self, opened=True):
+        with self.lock:
+            if opened:
+                self.connections_opened += 1
+            else:
+                self.connections_closed += 1
+
+    def record_query(self, sql, elapsed):
+        key = " ".join(sql.split())
+        with self.lock:
+            self.query_count += 1
+            self.total_time += elapsed
+            entry = self.by_statement.setdefault(key, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            print(f"🐢 Slow query ({elapsed * 1000:.1f} ms): {key[:120]}")
+
+    def snapshot(self, top=5):
+        """ Return the current counters as a plain dict """
+        with self.lock:
+            statements = sorted(self.by_statement.items(), key=lambda item: item[1][1], reverse=True)
+            return {
+                "connections_opened": self.connections_opened,
+                "connections_open": self.connections_opened - self.connections_closed,
+                "query_count": self.query_count,
+                "total_ms": self.total_time * 1000,
+                "avg_ms": (self.total_time / self.query_count * 1000) if self.query_count else 0.0,
+                "top_statements": [
+                    {"sql": sql, "count": count, "total_ms": total * 1000, "max_ms": worst * 1000}
+                    for sql, (count, total, worst) in statements[:top]
+                ],
+            }
+
+
+stats = QueryStats()
+
+
+class TimedCursor(sqlite3.Cursor):
+    """ Cursor that reports how long every statement takes """
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            stats.record_query(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            stats.record_query(sql, time.perf_counter() - start)
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            stats.record_query(sql_script, time.perf_counter() - start)
+
+
+class TimedConnection(sqlite3.Connection):
+    """ Connection whose cursors (and shortcut execute calls) are timed """
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+_local = threading.local()
+_registry_lock = threading.Lock()
+_connections = {}  # thread id -> connection
+
+
+def open_connection(path=None):
+    """ Open a new tuned connection (not pooled; caller closes it) """
+    conn = sqlite3.connect(
+        path or DB_PATH,
+        factory=TimedConnection,
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    stats.record_connection(opened=True)
+    return conn
+
+
+def get_connection():
+    """ Return the long-lived connection for the calling thread """
+    conn = getattr(_local, "conn", None)
+    if conn is not None and getattr(_local, "path", None) == DB_PATH:
+        return conn
+
+    if conn is not None:
+        _close(threading.get_ident())
+
+    conn = open_connection()
+    _local.conn = conn
+    _local.path = DB_PATH
+    with _registry_lock:
+        _connections[threading.get_ident()] = conn
+    return conn
+
+
+def release_connection(conn):
+    """ Finish a unit of work: roll back anything left uncommitted, keep the connection open """
+    if conn.in_transaction:
+        conn.rollback()
+
+
+def begin_immediate(conn):
+    """ Start a transaction that holds the write lock from its first statement.
+
+    Raises sqlite3.ProgrammingError if `conn` is already in a transaction: the work would run
+    without the lock, and committing or rolling back would end the caller's transaction.
+    """
+    if conn.in_transaction:
+        raise sqlite3.ProgrammingError("A transaction is already open on this connection")
+    conn.execute("BEGIN IMMEDIATE")
+
+
+def _close(thread_id):
+    with _registry_lock:
+        conn = _connections.pop(thread_id, None)
+    if conn is not None:
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError:
+            pass  # Connection belongs to another (finished) thread
+        stats.record_connection(opened=False)
+    if thread_id == threading.get_ident():
+        _local.conn = None
+
+
+def close_connection():
+    """ Close the calling thread's pooled connection (e.g. when a worker thread exits) """
+    _close(threading.get_ident())
+
+
+def close_all():
+    """ Close every pooled connection """
+    with _registry_lock:
+        thread_ids = list(_connections)
+    for thread_id in thread_ids:
+        _close(thread_id)
+
+
+def set_database_path(path):
+    """ Point the pool at another database file; existing connections reopen lazily """
+    global DB_PATH
+    DB_PATH = path
+
+
+def get_stats(top=5):
+    """ Connection count and query timings collected so far """
+    return stats.snapshot(top)
+
+
+def print_stats(top=5):
+    """ Print a short summary of connection and query timings """
+    summary = get_stats(top)
+    print("📊 Database usage:")
+    print(f"   Connections opened: {summary['connections_opened']} (open now: {summary['connections_open']})")
+    print(f"   Queries: {summary['query_count']}  total {summary['total_ms']:.1f} ms  avg {summary['avg_ms']:.2f} ms")
+    for entry in summary["top_statements"]:
+        print(f"   {entry['total_ms']:8.1f} ms  x{entry['count']:<5} max {entry['max_ms']:.1f} ms  {entry['sql'][:90]}")
+
+
+atexit.register(close_all)
@@ -0,0 +1,110 @@
+""" In-process change notifications, so pages refresh only what changed.
+
+Writers publish (entity, ids) after they commit, e.g.
+    get_event_bus().publish("bookings", [booking_id])
+Each page owns a DirtySet for the entities it shows. The set collects the ids
+while the page is hidden, and the page's refresh method patches just those rows
+when it is shown again. A page with an empty set does no database work at all.
+
+Writes from other terminals (or other connections) are picked up by a watcher. It
+reads PRAGMA data_version, which only moves when *another* connection commits. When
+that happens it compares the ChangeSequence counters, and entities whose counter
+moved are published with ids=None ("reload everything").
+"""
+import os
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from util.change_tracking import change_counters
+from util.database import get_connection
+
+#   Entity name -> table whose ChangeSequence counter tracks it
+ENTITY_TABLES = {
+    "guests": "Guests",
+    "bookings": "Bookings",
+    "rooms": "Rooms",
+    "payments": "Payments",
+}
+
+#   How often the watcher looks for commits from other terminals (0 disables it)
+WATCH_INTERVAL_MS = int(os.environ.get("HOTEL_CHANGE_WATCH_MS", "2000"))
+
+
+class EventBus(QObject):
+    """ Broadcasts entity-level changes; ids is a frozenset of primary keys or None for "unknown rows" """
+
+    changed = pyqtSignal(str, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.data_version = None
+        self.counters = {}
+        self.watch_timer = QTimer(self)
+        self.watch_timer.timeout.connect(self.check_external_changes)
+
+    def publish(self, entity, ids=None):
+        self.changed.emit(entity, None if ids is None else frozenset(ids))
+
+    def start_watching(self, interval_ms=WATCH_INTERVAL_MS):
+        if interval_ms > 0 and not self.watch_timer.isActive():
+            self.check_external_changes()  #   Remember the starting point
+            self.watch_timer.start(interval_ms)
+
+    def check_external_changes(self):
+        """ Publish every entity another connection changed since the last check """
+        conn = get_connection()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self.data_version:
+            return  #   Nobody else committed: one pragma read, no table access
+        self.data_version = version
+
+        #   Counters also move for our own (already published) writes; re-publishing
+        #   those only costs the page a reload, while a missed external write would be stale data
+        counters = change_counters(conn)
+        previous, self.counters = self.counters, counters
+        if not previous:
+            return
+        for entity, table_name in ENTITY_TABLES.items():
+            if counters.get(table_name) != previous.get(table_name):
+                self.publish(entity)
+
+
+class DirtySet(QObject):
+    """ What changed, per entity, since a page last refreshed: {entity: set of ids, or None for everything} """
+
+    def __init__(self, entities, parent=None):
+        super().__init__(parent)
+        self.entities = set(entities)
+        self.changes = {}
+        get_event_bus().changed.connect(self.mark)
+
+    def mark(self, entity, ids=None):
+        if entity not in self.entities:
+            return
+        if ids is None or (entity in self.changes and self.changes[entity] is None):
+            self.changes[entity] = None
+        else:
+            self.changes.setdefault(entity, set()).update(ids)
+
+    def mark_all(self):
+        for entity in self.entities:
+            self.changes[entity] = None
+
+    def take(self):
+        """ Return the collected changes and start over """
+        changes, self.changes = self.changes, {}
+        return changes
+
+    def __bool__(self):
+        return bool(self.changes)
+
+
+_bus = None
+
+
+def get_event_bus():
+    """ Shared bus (created on the GUI thread on first use) """
+    global _bus
+    if _bus is None:
+        _bus = EventBus()
+    return _bus
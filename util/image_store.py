@@ -0,0 +1,170 @@
+""" Content-addressed storage for guest and room photos.
+
+Every uploaded file is hashed and kept once under
+    <IMAGE_ROOT>/blobs/<2 hex>/<2 hex>/<hash><ext>
+GuestImages.image_path and RoomImages.image_path hold that relative path. Triggers
+keep ImageBlobs.ref_count equal to the number of rows that point at each blob, so
+uploading the same scan twice costs no disk or copy time and a blob is deleted
+only after its last row is gone.
+
+Rows written before the store existed still hold a bare filename inside guest_img/
+or room_img/; image_file() resolves both forms. From the project root:
+    python -m util.image_store --gc      # delete unreferenced blobs
+    python -m util.image_store --adopt   # move old guest_img/room_img files into the store
+"""
+import argparse
+import hashlib
+import os
+import shutil
+
+from util.database import get_connection, release_connection
+
+IMAGE_ROOT = os.environ.get(
+    "HOTEL_IMAGE_DIR", os.path.join(os.path.expanduser("~"), "documents/hotel-room-images")
+)
+BLOB_PREFIX = "blobs/"
+
+#   Where rows from before the store keep their files
+GUEST_IMAGE_DIR = os.path.join(IMAGE_ROOT, "guest_img")
+ROOM_IMAGE_DIR = os.path.join(IMAGE_ROOT, "room_img")
+IMAGE_TABLES = (("GuestImages", GUEST_IMAGE_DIR), ("RoomImages", ROOM_IMAGE_DIR))
+
+def content_hash(path):
+    """ Hash of the file contents, so renamed or copied photos share one blob """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_blob(stored_path):
+    return stored_path.startswith(BLOB_PREFIX)
+
+
+def image_file(stored_path, legacy_dir):
+    """ Absolute file for an image_path value (store blob, or a bare filename in `legacy_dir`) """
+    if is_blob(stored_path):
+        return os.path.join(IMAGE_ROOT, stored_path)
+    return os.path.join(legacy_dir, stored_path)
+
+
+def store_image(conn, source_path):
+    """ Add a file to the store (copying it only if its content is new) and return its image_path value.
+
+    The ImageBlobs row starts unreferenced; inserting the GuestImages/RoomImages row
+    in the same transaction is what takes the reference.
+    """
+    digest = content_hash(source_path)
+    row = conn.execute("SELECT image_path FROM ImageBlobs WHERE digest = ?", (digest,)).fetchone()
+    if row:
+        stored_path = row[0]
+    else:
+        extension = os.path.splitext(source_path)[1].lower()
+        stored_path = f"{BLOB_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+    target = os.path.join(IMAGE_ROOT, stored_path)
+    if not os.path.exists(target):  #   New content, or a blob someone removed by hand
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temporary_path = f"{target}.{os.getpid()}.tmp"
+        shutil.copyfile(source_path, temporary_path)
+        os.replace(temporary_path, target)  #   Never leave a half-written blob behind
+
+    if not row:
+        conn.execute(
+            "INSERT INTO ImageBlobs (digest, image_path, size) VALUES (?, ?, ?)",
+            (digest, stored_path, os.path.getsize(target)),
+        )
+    return stored_path
+
+
+def collect_garbage(conn):
+    """ Delete every blob no image row points at; returns (blobs removed, bytes freed) """
+    unreferenced = conn.execute(
+        "SELECT digest, image_path, size FROM ImageBlobs WHERE ref_count <= 0"
+    ).fetchall()
+    if not unreferenced:
+        return 0, 0
+
+    with conn:
+        conn.executemany(
+            "DELETE FROM ImageBlobs WHERE digest = ? AND ref_count <= 0",
+            [(digest,) for digest, _, _ in unreferenced],
+        )
+    for _, stored_path, _ in unreferenced:
+        try:
+            os.remove(os.path.join(IMAGE_ROOT, stored_path))
+        except FileNotFoundError:
+            pass
+    return len(unreferenced), sum(size for _, _, size in unreferenced)
+
+
+def forget_images(conn, stored_paths, legacy_dir):
+    """ Clean up after image rows were deleted and committed.
+
+    Old-style files are removed once no row names them any more; blobs go through
+    collect_garbage().
+    """
+    for stored_path in stored_paths:
+        if is_blob(stored_path) or _still_referenced(conn, stored_path):
+            continue
+        try:
+            os.remove(image_file(stored_path, legacy_dir))
+        except FileNotFoundError:
+            print(f"⚠️ Warning: Image file not found: {image_file(stored_path, legacy_dir)}")
+    return collect_garbage(conn)
+
+
+def _still_referenced(conn, stored_path):
+    return any(
+        conn.execute(f"SELECT 1 FROM {table} WHERE image_path = ? LIMIT 1", (stored_path,)).fetchone()
+        for table, _ in IMAGE_TABLES
+    )
+
+
+def adopt_legacy_images(conn):
+    """ Move old guest_img/room_img files into the store; returns (rows moved, rows with missing files) """
+    moved = missing = 0
+    for table, legacy_dir in IMAGE_TABLES:
+        rows = conn.execute(
+            f"SELECT id, image_path FROM {table} WHERE image_path NOT LIKE '{BLOB_PREFIX}%'"
+        ).fetchall()
+        for image_id, stored_path in rows:
+            source_path = image_file(stored_path, legacy_dir)
+            if not os.path.exists(source_path):
+                missing += 1
+                continue
+            with conn:
+                new_path = store_image(conn, source_path)
+                conn.execute(f"UPDATE {table} SET image_path = ? WHERE id = ?", (new_path, image_id))
+            forget_images(conn, [stored_path], legacy_dir)
+            moved += 1
+    return moved, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the content-addressed image store")
+    parser.add_argument("--gc", action="store_true", help="Delete blobs no image row refers to")
+    parser.add_argument("--adopt", action="store_true", help="Move old guest_img/room_img files into the store")
+    args = parser.parse_args()
+
+    from util.migrations import migrate
+
+    conn = get_connection()
+    migrate(conn)
+    if args.adopt:
+        moved, missing = adopt_legacy_images(conn)
+        print(f"  Moved {moved} images into the store ({missing} rows point at missing files).")
+    if args.gc or args.adopt:
+        removed, freed = collect_garbage(conn)
+        print(f"  Removed {removed} unreferenced blobs ({freed / 1024 / 1024:.1f} MB).")
+
+    blobs, total_size, references = conn.execute(
+        "SELECT COUNT(*), IFNULL(SUM(size), 0), IFNULL(SUM(ref_count), 0) FROM ImageBlobs"
+    ).fetchone()
+    print(f"  {blobs} blobs, {total_size / 1024 / 1024:.1f} MB, {references} image rows")
+    release_connection(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class LazyTableModel(QAbstractTableModel):
+    """ Read-only table model that pulls rows from the database page by page as the view scrolls.
+
+    Subclasses implement `fetch_page(after_row, limit)` (keyset pagination: return the next
+    `limit` rows that sort after `after_row`, or the first page when it is None) and
+    `display_value(row, column)`.
+
+    Loaded rows can be patched in place: `apply_row` / `remove_key` keep the list in
+    `sort_key` order (descending when `descending` is set), and `patch_rows(keys)`
+    re-reads just those rows through the `fetch_rows` hook.
+    """
+
+    descending = False
+
+    def __init__(self, headers, page_size=200, parent=None):
+        super().__init__(parent)
+        self.headers = headers
+        self.page_size = page_size
+        self.rows = []
+        self.exhausted = False
+
+    #   Subclass hooks
+    def fetch_page(self, after_row, limit):
+        raise NotImplementedError
+
+    def display_value(self, row, column):
+        return row[column] if column < len(row) else None
+
+    def fetch_rows(self, keys):
+        """ Current rows for `keys` that still belong in this list (same filter), in any order """
+        raise NotImplementedError
+
+    def row_key(self, row):
+        return row[0]
+
+    def sort_key(self, row):
+        return row[0]
+
+    #   Qt model interface
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        value = self.display_value(self.rows[index.row()], index.column())
+        return None if value is None else str(value)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted:
+            return
+
+        after_row = self.rows[-1] if self.rows else None
+        page = self.fetch_page(after_row, self.page_size)
+        if len(page) < self.page_size:
+            self.exhausted = True
+        if not page:
+            return
+
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self.rows.extend(page)
+        self.endInsertRows()
+
+    #   Helpers
+    def reload(self):
+        """ Drop cached rows; the view fetches the first page again on demand """
+        self.beginResetModel()
+        self.rows = []
+        self.exhausted = False
+        self.endResetModel()
+
+    def row_data(self, row):
+        return self.rows[row] if 0 <= row < len(self.rows) else None
+
+    #   Patching loaded rows
+    def row_position(self, key):
+        for position, row in enumerate(self.rows):
+            if self.row_key(row) == key:
+                return position
+        return None
+
+    def sorts_before(self, row, other):
+        if self.descending:
+            return self.sort_key(row) > self.sort_key(other)
+        return self.sort_key(row) < self.sort_key(other)
+
+    def remove_key(self, key):
+        position = self.row_position(key)
+        if position is not None:
+            self.beginRemoveRows(QModelIndex(), position, position)
+            del self.rows[position]
+            self.endRemoveRows()
+
+    def apply_row(self, row):
+        """ Update a loaded row in place, or move/insert it where the sort order puts it """
+        position = self.row_position(self.row_key(row))
+        if position is not None and self.sort_key(self.rows[position]) == self.sort_key(row):
+            self.rows[position] = row
+            self.dataChanged.emit(self.index(position, 0), self.index(position, len(self.headers) - 1))
+            return
+
+        if position is not None:
+            self.remove_key(self.row_key(row))
+
+        #   Rows past the last loaded one arrive with the next page
+        if self.rows and not self.exhausted and self.sorts_before(self.rows[-1], row):
+            return
+        low, high = 0, len(self.rows)
+        while low < high:
+            middle = (low + high) // 2
+            if self.sorts_before(self.rows[middle], row):
+                low = middle + 1
+            else:
+                high = middle
+        self.beginInsertRows(QModelIndex(), low, low)
+        self.rows.insert(low, row)
+        self.endInsertRows()
+
+    def patch_rows(self, keys):
+        """ Re-read the rows for `keys`: update, move, insert or drop each one as the data now says """
+        keys = set(keys)
+        if not keys:
+            return
+        fresh = {self.row_key(row): row for row in self.fetch_rows(keys)}
+        for key in keys:
+            if key in fresh:
+                self.apply_row(fresh[key])
+            else:
+                self.remove_key(key)
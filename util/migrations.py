@@ -0,0 +1,688 @@
+""" Versioned schema migrations for hotel_management.db.
+
+The schema version is stored in PRAGMA user_version. migrate() applies every
+migration newer than that version in order, so fresh and existing databases end
+up with the same tables, triggers and indexes. Every step is plain SQL kept here, a
+frozen copy of the schema at that version (the feature modules only use the tables),
+and runs in one transaction with its version bump:
+    python -m util.migrations                  # upgrade hotel_management.db
+    python -m util.migrations --status         # print the current version only
+"""
+import argparse
+
+from util.database import get_connection, release_connection
+
+#   v1: the tables and triggers initialize_db.py used to create (every statement is IF NOT EXISTS,
+#   so databases made by the old script are adopted unchanged)
+BASELINE_SCHEMA = """
+    --   Create Rooms Table
+    CREATE TABLE IF NOT EXISTS Rooms (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        room_number TEXT NOT NULL UNIQUE,
+        room_type TEXT NOT NULL,
+        capacity INTEGER NOT NULL,
+        base_price REAL NOT NULL,
+        discount_price REAL DEFAULT 0,
+        low_season_price REAL DEFAULT NULL,
+        high_season_price REAL DEFAULT NULL,
+        three_hour_price REAL DEFAULT NULL,
+        status TEXT DEFAULT 'Available' CHECK (status IN ('Available', 'Booked', 'Occupied')),
+        image_path TEXT DEFAULT NULL
+    );
+
+    --   Create Guests Table
+    CREATE TABLE IF NOT EXISTS Guests (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        contact TEXT NOT NULL,
+        email TEXT,
+        address TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS GuestImages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guest_id INTEGER NOT NULL,
+        image_path TEXT NOT NULL,
+        FOREIGN KEY (guest_id) REFERENCES Guests(id) ON DELETE CASCADE
+    );
+
+    --   Create Bookings Table (with Payment Status)
+    CREATE TABLE IF NOT EXISTS Bookings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guest_id INTEGER NOT NULL,
+        room_id INTEGER NOT NULL,
+        check_in_date TEXT NOT NULL,
+        check_out_date TEXT NOT NULL,
+        check_in_time TEXT DEFAULT '12:00',
+        check_out_time TEXT DEFAULT '10:00',
+        price_type TEXT NOT NULL CHECK (price_type IN ('Normal', 'Low Season', 'High Season', '3 Hour')),
+        custom_price REAL DEFAULT NULL,  --   Added custom_price for 3 Hour bookings
+        payment_status TEXT CHECK (payment_status IN ('PENDING', 'HALF PAID', 'PAID')) DEFAULT 'PENDING',
+        calculated_price REAL NOT NULL DEFAULT 0.0,
+        status TEXT DEFAULT 'Pending',
+        FOREIGN KEY(guest_id) REFERENCES Guests(id) ON DELETE CASCADE,
+        FOREIGN KEY(room_id) REFERENCES Rooms(id) ON DELETE CASCADE
+    );
+
+    --   Prevent Booking the Same Room for Different Guests on the Same Date (Except for "3 Hour")
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_unique_room_booking
+    ON Bookings (room_id, check_in_date)
+    WHERE price_type != '3 Hour';
+
+    --   Ensure Time Constraints for "3 Hour" Bookings
+    CREATE INDEX IF NOT EXISTS idx_room_booking_time
+    ON Bookings (room_id, check_in_date, check_in_time, check_out_time)
+    WHERE price_type = '3 Hour';
+
+    --   Create Guest History Table with Total Amount
+    CREATE TABLE IF NOT EXISTS GuestHistory (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guest_id INTEGER NOT NULL,
+        room_id INTEGER NOT NULL,
+        check_in_date TEXT NOT NULL,
+        check_out_date TEXT NOT NULL,
+        total_amount REAL DEFAULT 0.0,  --   Added total_amount column
+        payment_status TEXT CHECK (payment_status IN ('PENDING', 'PAID')) DEFAULT 'PENDING',
+        FOREIGN KEY(guest_id) REFERENCES Guests(id) ON DELETE CASCADE,
+        FOREIGN KEY(room_id) REFERENCES Rooms(id) ON DELETE CASCADE
+    );
+
+    --   Create Payments Table
+    CREATE TABLE IF NOT EXISTS Payments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        booking_id INTEGER NOT NULL,
+        amount_paid REAL NOT NULL,
+        remaining_balance REAL DEFAULT 0,
+        payment_date TEXT DEFAULT CURRENT_TIMESTAMP,
+        payment_method TEXT CHECK(payment_method IN ('Cash', 'KHQR')),
+        FOREIGN KEY(booking_id) REFERENCES Bookings(id) ON DELETE CASCADE
+    );
+
+    --   Create `BookingDetails` as a Table (instead of a View)
+    CREATE TABLE IF NOT EXISTS BookingDetails (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        booking_id INTEGER NOT NULL UNIQUE,
+        guest_id INTEGER NOT NULL,
+        room_id INTEGER NOT NULL,
+        check_in_date TEXT NOT NULL,
+        check_in_time TEXT DEFAULT '12:00',
+        check_out_date TEXT NOT NULL,
+        check_out_time TEXT DEFAULT '10:00',
+        calculated_price REAL NOT NULL DEFAULT 0.0,  --   Ensured calculated_price is never NULL
+        payment_status TEXT CHECK (payment_status IN ('PENDING', 'HALF PAID', 'PAID')) DEFAULT 'PENDING',
+        status TEXT DEFAULT 'Pending',
+        FOREIGN KEY (booking_id) REFERENCES Bookings(id) ON DELETE CASCADE
+    );
+
+    --   Trigger to Auto-Insert Data into `BookingDetails` When a New Booking is Created
+    CREATE TRIGGER IF NOT EXISTS insert_booking_details
+    AFTER INSERT ON Bookings
+    BEGIN
+        INSERT INTO BookingDetails (booking_id, guest_id, room_id, check_in_date, check_in_time, check_out_date, check_out_time, calculated_price, payment_status, status)
+        SELECT
+            NEW.id, NEW.guest_id, NEW.room_id, NEW.check_in_date,
+            IFNULL(NEW.check_in_time, '12:00'),
+            NEW.check_out_date, IFNULL(NEW.check_out_time, '10:00'),
+            CASE
+                WHEN NEW.price_type = '3 Hour' THEN
+                    (SELECT COALESCE(NEW.calculated_price, (SELECT three_hour_price FROM Rooms WHERE id = NEW.room_id), 0))
+                WHEN NEW.price_type = 'Low Season' THEN
+                    (SELECT COALESCE(base_price * 0.9, 0) FROM Rooms WHERE id = NEW.room_id)  --   Apply 10% discount
+                WHEN NEW.price_type = 'High Season' THEN
+                    (SELECT COALESCE(base_price * 1.1, 0) FROM Rooms WHERE id = NEW.room_id)  --   Apply 10% increase
+                ELSE
+                    (SELECT COALESCE(base_price, 0) FROM Rooms WHERE id = NEW.room_id)
+            END,
+            NEW.payment_status,
+            NEW.status;
+    END;
+
+    --   Trigger to Auto-Update `BookingDetails` When a Booking is Updated
+    CREATE TRIGGER IF NOT EXISTS update_booking_details
+    AFTER UPDATE ON Bookings
+    BEGIN
+        UPDATE BookingDetails
+        SET check_in_date = NEW.check_in_date,
+            check_in_time = IFNULL(NEW.check_in_time, '12:00'),
+            check_out_date = NEW.check_out_date,
+            check_out_time = IFNULL(NEW.check_out_time, '10:00'),
+
+            -- 🛠️ Fix Calculation of `calculated_price`
+            calculated_price = CASE
+                WHEN NEW.price_type = 'Normal' THEN (SELECT base_price FROM Rooms WHERE id = NEW.room_id)
+                WHEN NEW.price_type = 'Low Season' THEN (SELECT base_price * 0.9 FROM Rooms WHERE id = NEW.room_id)
+                WHEN NEW.price_type = 'High Season' THEN (SELECT base_price * 1.1 FROM Rooms WHERE id = NEW.room_id)
+                WHEN NEW.price_type = '3 Hour' THEN
+                    COALESCE((SELECT three_hour_price FROM Rooms WHERE id = NEW.room_id), NEW.calculated_price, 0)
+                ELSE 0
+            END,
+
+            payment_status = NEW.payment_status,
+            status = NEW.status
+        WHERE booking_id = NEW.id;
+    END;
+
+    --   Trigger to Auto-Delete `BookingDetails` When a Booking is Deleted
+    CREATE TRIGGER IF NOT EXISTS delete_booking_details
+    AFTER DELETE ON Bookings
+    BEGIN
+        DELETE FROM BookingDetails WHERE booking_id = OLD.id;
+    END;
+
+    CREATE TABLE IF NOT EXISTS RoomImages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    room_id INTEGER NOT NULL,
+    image_path TEXT NOT NULL,
+    FOREIGN KEY (room_id) REFERENCES Rooms(id) ON DELETE CASCADE
+    );
+
+    CREATE TABLE IF NOT EXISTS Employees (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        role TEXT CHECK(role IN ('admin', 'user')) NOT NULL
+    );
+"""
+
+#   v2: per-booking paid totals kept by triggers (see paymentManagement/balance_ledger.py)
+LEDGER_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS BookingBalances (
+        booking_id INTEGER PRIMARY KEY,
+        paid_total REAL NOT NULL DEFAULT 0,
+        payment_count INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_payments_booking ON Payments (booking_id);
+
+    CREATE TRIGGER IF NOT EXISTS payments_ledger_insert
+    AFTER INSERT ON Payments
+    BEGIN
+        INSERT INTO BookingBalances (booking_id, paid_total, payment_count)
+        VALUES (NEW.booking_id, NEW.amount_paid, 1)
+        ON CONFLICT(booking_id) DO UPDATE SET
+            paid_total = paid_total + excluded.paid_total,
+            payment_count = payment_count + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS payments_ledger_delete
+    AFTER DELETE ON Payments
+    BEGIN
+        UPDATE BookingBalances
+        SET paid_total = paid_total - OLD.amount_paid,
+            payment_count = payment_count - 1
+        WHERE booking_id = OLD.booking_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS payments_ledger_update
+    AFTER UPDATE OF booking_id, amount_paid ON Payments
+    BEGIN
+        UPDATE BookingBalances
+        SET paid_total = paid_total - OLD.amount_paid,
+            payment_count = payment_count - 1
+        WHERE booking_id = OLD.booking_id;
+
+        INSERT INTO BookingBalances (booking_id, paid_total, payment_count)
+        VALUES (NEW.booking_id, NEW.amount_paid, 1)
+        ON CONFLICT(booking_id) DO UPDATE SET
+            paid_total = paid_total + excluded.paid_total,
+            payment_count = payment_count + 1;
+    END;
+
+    --   Fill the ledger from the payments already recorded
+    DELETE FROM BookingBalances;
+    INSERT INTO BookingBalances (booking_id, paid_total, payment_count)
+    SELECT booking_id, SUM(amount_paid), COUNT(*) FROM Payments GROUP BY booking_id;
+"""
+
+#   v3: indexes for the predicates the pages actually filter, join and sort on
+#   (see util/query_plan_check.py for the queries they serve)
+HOT_QUERY_INDEXES = """
+    --   Booking list keyset pagination, payment grid and report date ranges
+    CREATE INDEX IF NOT EXISTS idx_bookings_check_in ON Bookings (check_in_date, id);
+    CREATE INDEX IF NOT EXISTS idx_bookings_check_out ON Bookings (check_out_date);
+
+    --   Guest delete check and guest report join
+    CREATE INDEX IF NOT EXISTS idx_bookings_guest ON Bookings (guest_id, check_out_date);
+
+    --   Dashboard "today" check-in / check-out tables
+    CREATE INDEX IF NOT EXISTS idx_booking_details_check_in ON BookingDetails (check_in_date);
+    CREATE INDEX IF NOT EXISTS idx_booking_details_check_out ON BookingDetails (check_out_date);
+
+    --   Payment report date range (Payments.booking_id is indexed with the ledger in v2)
+    CREATE INDEX IF NOT EXISTS idx_payments_date ON Payments (payment_date);
+
+    --   Image carousels
+    CREATE INDEX IF NOT EXISTS idx_guest_images_guest ON GuestImages (guest_id);
+    CREATE INDEX IF NOT EXISTS idx_room_images_room ON RoomImages (room_id);
+
+    --   Guest history dialog
+    CREATE INDEX IF NOT EXISTS idx_guest_history_guest ON GuestHistory (guest_id, check_in_date);
+
+    --   Invoice / payment lookups match on TRIM(room_number)
+    CREATE INDEX IF NOT EXISTS idx_rooms_trimmed_number ON Rooms (TRIM(room_number));
+"""
+
+#   v4: dashboard card totals kept by triggers (see dashboardManagement/dashboard_stats.py)
+STATS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS DashboardStats (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total_bookings INTEGER NOT NULL DEFAULT 0,
+        total_guests INTEGER NOT NULL DEFAULT 0,
+        total_revenue REAL NOT NULL DEFAULT 0,
+        available_rooms INTEGER NOT NULL DEFAULT 0
+    );
+
+    INSERT OR IGNORE INTO DashboardStats (id) VALUES (1);
+
+    --   Bookings
+    CREATE TRIGGER IF NOT EXISTS dashboard_stats_booking_insert AFTER INSERT ON Bookings
+    BEGIN
+        UPDATE DashboardStats SET total_bookings = total_bookings + 1 WHERE id = 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS dashboard_stats_booking_delete AFTER DELETE ON Bookings
+    BEGIN
+        UPDATE DashboardStats SET total_bookings = total_bookings - 1 WHERE id = 1;
+    END;
+
+    --   Guests
+    CREATE TRIGGER IF NOT EXISTS dashboard_stats_guest_insert AFTER INSERT ON Guests
+    BEGIN
+        UPDATE DashboardStats SET total_guests = total_guests + 1 WHERE id = 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS dashboard_stats_guest_delete AFTER DELETE ON Guests
+    BEGIN
+        UPDATE DashboardStats SET total_guests = total_guests - 1 WHERE id = 1;
+    END;
+
+    --   Payments
+    CREATE TRIGGER IF NOT EXISTS dashboard_stats_payment_insert AFTER INSERT ON Payments
+    BEGIN
+        UPDATE DashboardStats SET total_revenue = total_revenue + NEW.amount_paid WHERE id = 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS dashboard_stats_payment_update AFTER UPDATE OF amount_paid ON Payments
+    BEGIN
+        UPDATE DashboardStats SET total_revenue = total_revenue + NEW.amount_paid - OLD.amount_paid WHERE id = 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS dashboard_stats_payment_delete AFTER DELETE ON Payments
+    BEGIN
+        UPDATE DashboardStats SET total_revenue = total_revenue - OLD.amount_paid WHERE id = 1;
+    END;
+
+    --   Rooms ("IS" so a NULL status counts as 0 rather than NULL)
+    CREATE TRIGGER IF NOT EXISTS dashboard_stats_room_insert AFTER INSERT ON Rooms
+    BEGIN
+        UPDATE DashboardStats SET available_rooms = available_rooms + (NEW.status IS 'Available') WHERE id = 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS dashboard_stats_room_update AFTER UPDATE OF status ON Rooms
+    BEGIN
+        UPDATE DashboardStats
+        SET available_rooms = available_rooms + (NEW.status IS 'Available') - (OLD.status IS 'Available')
+        WHERE id = 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS dashboard_stats_room_delete AFTER DELETE ON Rooms
+    BEGIN
+        UPDATE DashboardStats SET available_rooms = available_rooms - (OLD.status IS 'Available') WHERE id = 1;
+    END;
+
+    --   Count what is already there
+    UPDATE DashboardStats SET
+        total_bookings = (SELECT COUNT(*) FROM Bookings),
+        total_guests = (SELECT COUNT(*) FROM Guests),
+        total_revenue = (SELECT IFNULL(SUM(amount_paid), 0) FROM Payments),
+        available_rooms = (SELECT COUNT(*) FROM Rooms WHERE status = 'Available')
+    WHERE id = 1;
+"""
+
+#   v5: reference counts for the content-addressed image store (see util/image_store.py)
+IMAGE_STORE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS ImageBlobs (
+        digest TEXT PRIMARY KEY,
+        image_path TEXT NOT NULL UNIQUE,
+        size INTEGER NOT NULL,
+        ref_count INTEGER NOT NULL DEFAULT 0
+    );
+
+    --   Garbage collection only ever looks at unreferenced blobs
+    CREATE INDEX IF NOT EXISTS idx_image_blobs_unreferenced ON ImageBlobs (ref_count) WHERE ref_count <= 0;
+
+    --   GuestImages
+    CREATE TRIGGER IF NOT EXISTS guest_images_blob_insert AFTER INSERT ON GuestImages
+    BEGIN
+        UPDATE ImageBlobs SET ref_count = ref_count + 1 WHERE image_path = NEW.image_path;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS guest_images_blob_delete AFTER DELETE ON GuestImages
+    BEGIN
+        UPDATE ImageBlobs SET ref_count = ref_count - 1 WHERE image_path = OLD.image_path;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS guest_images_blob_update AFTER UPDATE OF image_path ON GuestImages
+    BEGIN
+        UPDATE ImageBlobs SET ref_count = ref_count - 1 WHERE image_path = OLD.image_path;
+        UPDATE ImageBlobs SET ref_count = ref_count + 1 WHERE image_path = NEW.image_path;
+    END;
+
+    --   RoomImages
+    CREATE TRIGGER IF NOT EXISTS room_images_blob_insert AFTER INSERT ON RoomImages
+    BEGIN
+        UPDATE ImageBlobs SET ref_count = ref_count + 1 WHERE image_path = NEW.image_path;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS room_images_blob_delete AFTER DELETE ON RoomImages
+    BEGIN
+        UPDATE ImageBlobs SET ref_count = ref_count - 1 WHERE image_path = OLD.image_path;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS room_images_blob_update AFTER UPDATE OF image_path ON RoomImages
+    BEGIN
+        UPDATE ImageBlobs SET ref_count = ref_count - 1 WHERE image_path = OLD.image_path;
+        UPDATE ImageBlobs SET ref_count = ref_count + 1 WHERE image_path = NEW.image_path;
+    END;
+"""
+
+#   v6: full-text index over guests and rooms (see util/search.py)
+#   "-", "+", "." and "@" stay inside a token, so "012-345" and "sok@mail.com" are one
+#   word each and typing "012" or "sok" finds them as a prefix
+SEARCH_SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS GuestSearch USING fts5(
+        name, contact, email,
+        content='Guests', content_rowid='id',
+        tokenize="unicode61 tokenchars '-+.@'", prefix='1 2 3'
+    );
+
+    CREATE VIRTUAL TABLE IF NOT EXISTS RoomSearch USING fts5(
+        room_number,
+        content='Rooms', content_rowid='id',
+        tokenize="unicode61 tokenchars '-+.@'", prefix='1 2'
+    );
+
+    --   Guests
+    CREATE TRIGGER IF NOT EXISTS guest_search_insert AFTER INSERT ON Guests
+    BEGIN
+        INSERT INTO GuestSearch (rowid, name, contact, email) VALUES (NEW.id, NEW.name, NEW.contact, NEW.email);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS guest_search_delete AFTER DELETE ON Guests
+    BEGIN
+        INSERT INTO GuestSearch (GuestSearch, rowid, name, contact, email)
+        VALUES ('delete', OLD.id, OLD.name, OLD.contact, OLD.email);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS guest_search_update AFTER UPDATE OF name, contact, email ON Guests
+    BEGIN
+        INSERT INTO GuestSearch (GuestSearch, rowid, name, contact, email)
+        VALUES ('delete', OLD.id, OLD.name, OLD.contact, OLD.email);
+        INSERT INTO GuestSearch (rowid, name, contact, email) VALUES (NEW.id, NEW.name, NEW.contact, NEW.email);
+    END;
+
+    --   Rooms (status changes on every check-in/out and do not touch the index)
+    CREATE TRIGGER IF NOT EXISTS room_search_insert AFTER INSERT ON Rooms
+    BEGIN
+        INSERT INTO RoomSearch (rowid, room_number) VALUES (NEW.id, NEW.room_number);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS room_search_delete AFTER DELETE ON Rooms
+    BEGIN
+        INSERT INTO RoomSearch (RoomSearch, rowid, room_number) VALUES ('delete', OLD.id, OLD.room_number);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS room_search_update AFTER UPDATE OF room_number ON Rooms
+    BEGIN
+        INSERT INTO RoomSearch (RoomSearch, rowid, room_number) VALUES ('delete', OLD.id, OLD.room_number);
+        INSERT INTO RoomSearch (rowid, room_number) VALUES (NEW.id, NEW.room_number);
+    END;
+
+    --   Bookings of the matched rooms (guests already have idx_bookings_guest)
+    CREATE INDEX IF NOT EXISTS idx_bookings_room ON Bookings (room_id);
+
+    --   Index the rows already there
+    INSERT INTO GuestSearch (GuestSearch) VALUES ('rebuild');
+    INSERT INTO RoomSearch (RoomSearch) VALUES ('rebuild');
+"""
+
+#   v7: Guests change numbers and tombstones (see util/change_tracking.py)
+CHANGE_TRACKING_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS ChangeSequence (
+        table_name TEXT PRIMARY KEY,
+        seq INTEGER NOT NULL DEFAULT 0
+    );
+
+    INSERT OR IGNORE INTO ChangeSequence (table_name) VALUES ('Guests');
+
+    --   Guest ids are AUTOINCREMENT, so a deleted id is never reused
+    CREATE TABLE IF NOT EXISTS GuestTombstones (
+        guest_id INTEGER PRIMARY KEY,
+        change_seq INTEGER NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_guests_change_seq ON Guests (change_seq);
+    CREATE INDEX IF NOT EXISTS idx_guest_tombstones_seq ON GuestTombstones (change_seq);
+
+    --   Guest list sorted by name (keyset pagination on (name, id))
+    CREATE INDEX IF NOT EXISTS idx_guests_name ON Guests (name, id);
+
+    CREATE TRIGGER IF NOT EXISTS guest_change_insert AFTER INSERT ON Guests
+    BEGIN
+        UPDATE ChangeSequence SET seq = seq + 1 WHERE table_name = 'Guests';
+        UPDATE Guests SET change_seq = (SELECT seq FROM ChangeSequence WHERE table_name = 'Guests') WHERE id = NEW.id;
+    END;
+
+    --   Listing the columns keeps the change_seq stamp itself from firing the trigger
+    CREATE TRIGGER IF NOT EXISTS guest_change_update AFTER UPDATE OF name, contact, email ON Guests
+    BEGIN
+        UPDATE ChangeSequence SET seq = seq + 1 WHERE table_name = 'Guests';
+        UPDATE Guests SET change_seq = (SELECT seq FROM ChangeSequence WHERE table_name = 'Guests') WHERE id = NEW.id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS guest_change_delete AFTER DELETE ON Guests
+    BEGIN
+        UPDATE ChangeSequence SET seq = seq + 1 WHERE table_name = 'Guests';
+        INSERT OR REPLACE INTO GuestTombstones (guest_id, change_seq)
+        VALUES (OLD.id, (SELECT seq FROM ChangeSequence WHERE table_name = 'Guests'));
+    END;
+"""
+
+
+def change_tracking_step(conn):
+    """ v7 script; Guests.change_seq is only added if the database does not have it yet """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(Guests)")]
+    add_column = "" if "change_seq" in columns else "ALTER TABLE Guests ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0;"
+    return add_column + CHANGE_TRACKING_SCHEMA
+
+
+#   v8: change counters for bookings, rooms and payments
+#   Counter-only tables (no row stamps: a trigger updating Bookings would re-fire its other triggers)
+COUNTED_TABLES = ("Bookings", "Rooms", "Payments")
+
+
+def counter_schema(table_name):
+    return f"""
+    INSERT OR IGNORE INTO ChangeSequence (table_name) VALUES ('{table_name}');
+
+    CREATE TRIGGER IF NOT EXISTS {table_name.lower()}_change_insert AFTER INSERT ON {table_name}
+    BEGIN
+        UPDATE ChangeSequence SET seq = seq + 1 WHERE table_name = '{table_name}';
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS {table_name.lower()}_change_update AFTER UPDATE ON {table_name}
+    BEGIN
+        UPDATE ChangeSequence SET seq = seq + 1 WHERE table_name = '{table_name}';
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS {table_name.lower()}_change_delete AFTER DELETE ON {table_name}
+    BEGIN
+        UPDATE ChangeSequence SET seq = seq + 1 WHERE table_name = '{table_name}';
+    END;
+    """
+
+
+CHANGE_COUNTERS_SCHEMA = "".join(counter_schema(table_name) for table_name in COUNTED_TABLES)
+
+
+#   v9: report rollup tables and the triggers queuing their dirty days (see reportManagement/rollups.py)
+def queue_booking_range(row):
+    """ Trigger statement queuing the arrival day and every night of the booking in `row` (NEW or OLD) """
+    return f"""
+        INSERT INTO RollupDirtyRanges (first_day, last_day)
+        VALUES ({row}.check_in_date, max({row}.check_in_date, IFNULL(date({row}.check_out_date, '-1 day'), {row}.check_in_date)));
+    """
+
+
+def queue_payment_days(row):
+    """ Trigger statements queuing the payment day and its booking's arrival day (revenue) """
+    return f"""
+        INSERT INTO RollupDirtyRanges (first_day, last_day)
+        SELECT date({row}.payment_date), date({row}.payment_date) WHERE date({row}.payment_date) IS NOT NULL;
+        INSERT INTO RollupDirtyRanges (first_day, last_day)
+        SELECT check_in_date, check_in_date FROM Bookings WHERE id = {row}.booking_id;
+    """
+
+
+ROLLUP_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS DailyRoomStats (
+        day TEXT NOT NULL,
+        room_type TEXT NOT NULL,
+        bookings INTEGER NOT NULL DEFAULT 0,
+        check_ins INTEGER NOT NULL DEFAULT 0,
+        room_nights INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, room_type)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS DailyPaymentStats (
+        day TEXT NOT NULL,
+        payment_method TEXT NOT NULL,
+        payments INTEGER NOT NULL DEFAULT 0,
+        amount REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, payment_method)
+    ) WITHOUT ROWID;
+
+    --   Days whose totals are out of date (inclusive ranges, overlaps are fine)
+    CREATE TABLE IF NOT EXISTS RollupDirtyRanges (
+        id INTEGER PRIMARY KEY,
+        first_day TEXT NOT NULL,
+        last_day TEXT NOT NULL
+    );
+
+    --   Bookings (payment_status changes do not touch any total)
+    CREATE TRIGGER IF NOT EXISTS rollup_booking_insert AFTER INSERT ON Bookings
+    BEGIN
+        {queue_booking_range("NEW")}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS rollup_booking_update
+    AFTER UPDATE OF check_in_date, check_out_date, status, room_id ON Bookings
+    BEGIN
+        {queue_booking_range("OLD")}
+        {queue_booking_range("NEW")}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS rollup_booking_delete AFTER DELETE ON Bookings
+    BEGIN
+        {queue_booking_range("OLD")}
+    END;
+
+    --   Payments
+    CREATE TRIGGER IF NOT EXISTS rollup_payment_insert AFTER INSERT ON Payments
+    BEGIN
+        {queue_payment_days("NEW")}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS rollup_payment_update
+    AFTER UPDATE OF booking_id, amount_paid, payment_date, payment_method ON Payments
+    BEGIN
+        {queue_payment_days("OLD")}
+        {queue_payment_days("NEW")}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS rollup_payment_delete AFTER DELETE ON Payments
+    BEGIN
+        {queue_payment_days("OLD")}
+    END;
+
+    --   Longest stay, so a recompute only looks that far back for bookings still in house
+    CREATE INDEX IF NOT EXISTS idx_bookings_stay_length ON Bookings (julianday(check_out_date) - julianday(check_in_date));
+
+    --   A room changing type moves all of its bookings to another DailyRoomStats row
+    CREATE TRIGGER IF NOT EXISTS rollup_room_update AFTER UPDATE OF room_type ON Rooms
+    BEGIN
+        INSERT INTO RollupDirtyRanges (first_day, last_day)
+        SELECT MIN(check_in_date), MAX(check_out_date) FROM Bookings WHERE room_id = NEW.id HAVING COUNT(*) > 0;
+    END;
+
+    --   Queue every day with bookings or payments; refresh_rollups() totals them before the first report
+    INSERT INTO RollupDirtyRanges (first_day, last_day)
+    SELECT first_day, last_day FROM (
+        SELECT MIN(first_day) AS first_day, MAX(last_day) AS last_day FROM (
+            SELECT MIN(check_in_date) AS first_day, MAX(check_out_date) AS last_day FROM Bookings
+            UNION ALL
+            SELECT date(MIN(payment_date)), date(MAX(payment_date)) FROM Payments
+        )
+    )
+    WHERE first_day IS NOT NULL;
+"""
+
+
+#   (version, description, SQL script or a callable returning it for the database at hand)
+MIGRATIONS = [
+    (1, "Baseline schema", BASELINE_SCHEMA),
+    (2, "BookingBalances ledger", LEDGER_SCHEMA),
+    (3, "Indexes for hot query predicates", HOT_QUERY_INDEXES),
+    (4, "DashboardStats counters", STATS_SCHEMA),
+    (5, "ImageBlobs content-addressed image store", IMAGE_STORE_SCHEMA),
+    (6, "GuestSearch/RoomSearch full-text index", SEARCH_SCHEMA),
+    (7, "ChangeSequence counters and guest tombstones", change_tracking_step),
+    (8, "ChangeSequence counters for bookings, rooms and payments", CHANGE_COUNTERS_SCHEMA),
+    (9, "DailyRoomStats/DailyPaymentStats report rollups", ROLLUP_SCHEMA),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target=LATEST_VERSION):
+    """ Bring the database up to `target`; each migration commits together with its version bump """
+    current = schema_version(conn)
+    for version, description, step in MIGRATIONS:
+        if version <= current or version > target:
+            continue
+
+        #   One script (executescript() commits any transaction opened outside it), so a step that
+        #   fails leaves neither its tables nor the version bump behind
+        script = step(conn) if callable(step) else step
+        try:
+            conn.executescript(f"BEGIN IMMEDIATE;\n{script}\nPRAGMA user_version = {version};\nCOMMIT;")
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+        print(f"🛠️ Database migrated to v{version}: {description}")
+        current = version
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrade hotel_management.db to the latest schema")
+    parser.add_argument("--status", action="store_true", help="Only print the current schema version")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    if args.status:
+        print(f"Schema version {schema_version(conn)} (latest {LATEST_VERSION})")
+    else:
+        print(f"  Schema version {migrate(conn)}")
+    release_connection(conn)
+
+
+if __name__ == "__main__":
+    main()
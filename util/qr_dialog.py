@@ -1,10 +1,12 @@
 
-import requests
 from PyQt6.QtWidgets import QDialog, QLabel, QVBoxLayout, QMessageBox
 from PyQt6.QtGui import QPixmap,QPainter
-from PyQt6.QtCore import QTimer, Qt
+from PyQt6.QtCore import Qt
 from cryptography.fernet import Fernet
 
+from paymentManagement.payment_gateway import QR_EXPIRE_MINUTES
+from paymentManagement.payment_status_poller import PaymentStatusPoller
+
 
 class QRCodeDialog(QDialog):
     """ Custom Dialog to Display QR Code with Background & API """
@@ -12,7 +14,7 @@ class QRCodeDialog(QDialog):
     key = Fernet.generate_key()
     cipher_suite = Fernet(key)
 
-    def __init__(self, qr_image_data, order_id, update_ui_callback):
+    def __init__(self, qr_image_data, order_id, update_ui_callback, expire_minutes=QR_EXPIRE_MINUTES):
         super().__init__()
 
         self.setFixedSize(400, 550)
@@ -20,8 +22,8 @@ class QRCodeDialog(QDialog):
 
         self.order_id = order_id
         self.update_ui_callback = update_ui_callback
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.check_payment_status)
+        self.poller = PaymentStatusPoller(order_id, expire_minutes)  #   Time the QR has left, not a fresh 15 minutes
+        self.poller.completed.connect(self.on_payment_status)  #   Delivered on the GUI thread
 
         layout = QVBoxLayout()
         self.label = QLabel(self)
@@ -47,9 +49,8 @@ class QRCodeDialog(QDialog):
         layout.addWidget(self.label)
         self.setLayout(layout)
 
-        #   Start checking payment status every 15 seconds
-        self.timer.start(15000)  # 15000 ms = 15 sec
-        self.check_payment_status()  # Initial check
+        #   Check payment status in the background until paid, closed or expired
+        self.poller.start()
 
     def overlay_qr_on_background(self, background, qr):
         """ Overlay QR code on the background image at the center """
@@ -66,41 +67,23 @@ class QRCodeDialog(QDialog):
 
         return combined
 
-    def check_payment_status(self):
-        """ Check the payment status of the QR code """
-        url = f"https://URL_FOR_RETURN_CHECK_IT_SUCCESS_OR_FAIL/{self.order_id}"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": "TOKEN_FOR_AUTH"
-        }
-
-        try:
-            response = requests.get(url, headers=headers, timeout=0.3)
-            response.raise_for_status()  # Raise an error for 4xx or 5xx responses
-
-            data = response.json()  # Convert response to JSON
-
-            if not data or "data" not in data:
-                print("⚠️ Error: Empty or invalid response received!")
-                return  # Exit without crashing
-
-            status = data["data"].get("status", "")
-
-            if status == "success":
-                self.timer.stop()  
-                self.accept()  #   Close the QR dialog
-                QMessageBox.information(self, "Payment Success", "Payment was successful!")
-                self.update_ui_callback()  #   Update the payment UI
+    def on_payment_status(self, outcome):
+        """ Final status from the poller: "success", "closed", "expired" or "cancelled" """
+        if outcome == "success":
+            self.accept()  #   Close the QR dialog
+            QMessageBox.information(self, "Payment Success", "Payment was successful!")
+            self.update_ui_callback()  #   Update the payment UI
 
-            elif status == "closed":
-                self.timer.stop()  #   Stop checking
-                self.reject()  #   Close the QR dialog
-                QMessageBox.warning(self, "QR Expired", "QR code expired. Please try again.")
+        elif outcome in ("closed", "expired"):
+            self.reject()  #   Close the QR dialog
+            QMessageBox.warning(self, "QR Expired", "QR code expired. Please try again.")
 
-        except requests.exceptions.RequestException as e:
-            print(f"⚠️ Error checking payment status: {e}")
+    def done(self, result):
+        """ Stop checking whenever the dialog closes (accept, reject or Esc) """
+        self.poller.stop()
+        super().done(result)
 
     def closeEvent(self, event):
         """ Stop checking when the dialog is manually closed """
-        self.timer.stop()
+        self.poller.stop()
         event.accept()
@@ -0,0 +1,145 @@
+""" EXPLAIN QUERY PLAN regression check for the queries the pages run most.
+
+Builds an empty in-memory database at the latest schema version and fails if any
+query below reads a table with a full scan instead of an index:
+    python -m util.query_plan_check             # exit code 1 on a regression
+    python -m util.query_plan_check --verbose   # also print every plan
+
+The list pages' queries are built by the same functions the pages call, so a change
+to a page query is checked as-is; add a page's new hot query here when it gets one.
+"""
+import argparse
+import re
+import sqlite3
+
+from bookingManagement.booking_table_model import booking_page_query
+from paymentManagement.payment_billing import payment_grid_query
+from reportManagement.report_queries import BOOKING_REPORT_QUERY, GUEST_REPORT_QUERY, PAYMENT_REPORT_QUERY
+from reportManagement.rollups import (
+    DAILY_REVENUE_QUERY, PAYMENT_METHOD_QUERY, PAYMENT_STATS_SQL, ROOM_STATS_SQL, ROOM_TYPE_QUERY
+)
+from util.migrations import migrate
+from util.search import guest_search_query
+
+#   (name, sql, parameters, aliases allowed a full scan because every row is wanted)
+HOT_QUERIES = [
+    ("Booking list: first page", *booking_page_query(""), ()),
+    ("Booking list: next page", *booking_page_query("", ("2025-01-01", 10)), ()),
+    ("Booking list: search", *booking_page_query("sok", ("2025-01-01", 10)), ()),
+    ("Payment grid", *payment_grid_query("All", ""), ()),
+    ("Payment grid: unpaid", *payment_grid_query("Unpaid", ""), ()),
+    ("Payment grid: search", *payment_grid_query("All", "10"), ()),
+    ("Guest list: page by id", """
+        SELECT id, name, contact, email FROM Guests WHERE id > ? ORDER BY id LIMIT ?
+    """, (0, 200), ()),
+    ("Guest list: page by name", """
+        SELECT id, name, contact, email FROM Guests WHERE (name, id) > (?, ?) ORDER BY name, id LIMIT ?
+    """, ("", 0, 200), ()),
+    ("Guest list: changed rows", "SELECT id, name, contact, email FROM Guests WHERE change_seq > ?", (0,), ()),
+    ("Guest list: deleted rows", "SELECT guest_id FROM GuestTombstones WHERE change_seq > ?", (0,), ()),
+    #   The ranked prefix window and the match lists built from it are read in full
+    ("Guest list: search", *guest_search_query("sok"), ("recent", "hit")),
+    ("Pay selected bookings: balances", """
+        SELECT bd.booking_id, (bd.calculated_price - IFNULL(bal.paid_total, 0))
+        FROM BookingDetails bd
+        LEFT JOIN BookingBalances bal ON bal.booking_id = bd.booking_id
+        WHERE bd.booking_id IN (?, ?, ?)
+    """, (1, 2, 3), ()),
+    ("Guest history", """
+        SELECT B.id, R.room_number, B.check_in_date, B.check_out_date, COALESCE(bal.paid_total, 0)
+        FROM GuestHistory B
+        JOIN Rooms R ON B.room_id = R.id
+        LEFT JOIN BookingBalances bal ON bal.booking_id = B.id
+        WHERE B.guest_id = ?
+        ORDER BY B.check_in_date DESC
+    """, (1,), ()),
+    ("Guest delete check", "SELECT COUNT(*) FROM Bookings WHERE guest_id=?", (1,), ()),
+    ("Guest images", "SELECT id, image_path FROM GuestImages WHERE guest_id=?", (1,), ()),
+    ("Room images", "SELECT id, image_path FROM RoomImages WHERE room_id=?", (1,), ()),
+    ("Image store: blob by content hash", "SELECT image_path FROM ImageBlobs WHERE digest = ?", ("00",), ()),
+    ("Image store: unreferenced blobs", "SELECT digest, image_path, size FROM ImageBlobs WHERE ref_count <= 0", (), ()),
+    ("Room by trimmed number", "SELECT room_type, base_price FROM Rooms WHERE TRIM(room_number) = ?", ("101",), ()),
+    ("Dashboard check-ins today", """
+        SELECT b.id, COALESCE(r.room_number, 'N/A')
+        FROM BookingDetails b
+        LEFT JOIN Rooms r ON b.room_id = r.id
+        WHERE b.check_in_date = DATE('now')
+    """, (), ()),
+    ("Dashboard check-outs today", """
+        SELECT b.id, COALESCE(r.room_number, 'N/A')
+        FROM BookingDetails b
+        LEFT JOIN Rooms r ON b.room_id = r.id
+        WHERE b.check_out_date = DATE('now')
+    """, (), ()),
+    ("Guest report", GUEST_REPORT_QUERY, ("2025-01-01", "2025-01-31", "2025-01-01", "2025-01-31"), ("G",)),
+    ("Booking report", BOOKING_REPORT_QUERY, ("2025-01-01", "2025-01-31", "2025-01-01", "2025-01-31"), ()),
+    ("Payment report", PAYMENT_REPORT_QUERY, ("2025-01-01", "2025-01-31"), ()),
+    ("Invoice batch", """
+        SELECT b.id, g.id, g.name, TRIM(r.room_number), r.room_type, r.base_price,
+            b.check_in_date, b.check_out_date, (bd.calculated_price - IFNULL(bal.paid_total, 0))
+        FROM Bookings b
+        JOIN Guests g ON b.guest_id = g.id
+        JOIN Rooms r ON b.room_id = r.id
+        JOIN BookingDetails bd ON b.id = bd.booking_id
+        LEFT JOIN BookingBalances bal ON bal.booking_id = b.id
+        WHERE b.check_out_date BETWEEN ? AND ?
+        ORDER BY g.id, b.check_in_date, b.id
+    """, ("2025-01-01", "2025-01-31"), ()),
+    ("Invoice room lookup", """
+        SELECT TRIM(room_number), room_type, base_price FROM Rooms WHERE TRIM(room_number) IN (?, ?)
+    """, ("101", "102"), ()),
+    ("Revenue report", DAILY_REVENUE_QUERY, ("2025-01-01", "2025-01-31"), ()),
+    ("Rollups: revenue by room type", ROOM_TYPE_QUERY, ("2025-01-01", "2025-01-31"), ()),
+    ("Rollups: payments by method", PAYMENT_METHOD_QUERY, ("2025-01-01", "2025-01-31"), ()),
+    #   The nights CTE is generated per booking (its rows are all wanted)
+    ("Rollups: recompute room stats", ROOM_STATS_SQL.format(table="DailyRoomStats"),
+     {"first_day": "2025-01-01", "last_day": "2025-01-31", "earliest_check_in": "2024-12-01"}, ("nights", "n")),
+    ("Rollups: longest stay", "SELECT MAX(julianday(check_out_date) - julianday(check_in_date)) FROM Bookings", (), ()),
+    ("Rollups: recompute payment stats", PAYMENT_STATS_SQL.format(table="DailyPaymentStats"),
+     {"first_day": "2025-01-01", "last_day": "2025-01-31"}, ()),
+]
+
+#   "SCAN Bookings" / "SCAN b" without "USING ... INDEX" reads the whole table
+#   ("SCAN GuestSearch VIRTUAL TABLE INDEX ..." is an FTS5 index lookup, not a scan)
+FULL_SCAN = re.compile(r"^SCAN (\w+)\b(?! USING| VIRTUAL TABLE)")
+
+
+def query_plan(conn, sql, parameters):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, parameters)]
+
+
+def check_query_plans(conn=None, verbose=False):
+    """ [(query name, plan line)] for every hot query that falls back to a full table scan """
+    if conn is None:
+        conn = sqlite3.connect(":memory:")
+        migrate(conn)
+
+    failures = []
+    for name, sql, parameters, allowed_scans in HOT_QUERIES:
+        plan = query_plan(conn, sql, parameters)
+        if verbose:
+            print(f"{name}:")
+            for line in plan:
+                print(f"    {line}")
+        for line in plan:
+            match = FULL_SCAN.match(line)
+            if match and match.group(1) not in allowed_scans:
+                failures.append((name, line))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a hot query plan uses a full table scan")
+    parser.add_argument("--verbose", action="store_true", help="Print every query plan")
+    args = parser.parse_args()
+
+    failures = check_query_plans(verbose=args.verbose)
+    for name, line in failures:
+        print(f"❌ {name}: {line}")
+    if not failures:
+        print(f"  All {len(HOT_QUERIES)} hot queries use indexes.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
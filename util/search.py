@@ -0,0 +1,209 @@
+""" Full-text search over guests and rooms (SQLite FTS5), shared by the list pages.
+
+GuestSearch indexes Guests.name, contact and email; RoomSearch indexes
+Rooms.room_number. Both are external-content tables (the text lives only in
+Guests/Rooms) kept in sync by triggers, so every page sees the same index without
+a rebuild. Each word the user types is matched as a prefix and guests are ranked
+with bm25, name hits first. The payment grid and booking list match a booking when
+its guest, its room or its id matches.
+
+Compare against the old leading-wildcard LIKE on a throwaway database:
+    python -m util.search --benchmark --guests 500000
+    python -m util.search "sok 012"            # search hotel_management.db
+"""
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+
+from util.database import get_connection, release_connection
+
+#   Guest list results per search (best matches first)
+SEARCH_LIMIT = 200
+
+#   Search boxes wait this long after the last keystroke before querying
+SEARCH_DEBOUNCE_MS = 250
+
+#   Only the newest prefix matches are scored with bm25: a short prefix can match most of
+#   the guest table, and ranking all of it would cost far more than the search itself
+RANK_WINDOW = 5000
+
+#   Older guests matching every word exactly are scored too, up to this many (newest first);
+#   a name typed in full is usually rare, so the one being looked for is within it
+EXACT_WINDOW = 1000
+
+#   bm25 column weights for (name, contact, email)
+GUEST_WEIGHTS = (10.0, 4.0, 1.0)
+
+#   Characters that separate search words (everything the tokenizer does not keep)
+WORD_SEPARATORS = re.compile(r"[^\w\-+.@]+")
+
+
+def match_expression(text, prefix=True):
+    """ FTS5 query matching every typed word (as a prefix, or as a whole word), or None if nothing searchable was typed.
+
+    Words are quoted, so input such as `AND`, `"` or `name:` is searched for literally.
+    """
+    words = [word for word in WORD_SEPARATORS.split(text.strip()) if word.strip("-+.@")]
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' if prefix else f'"{word}"' for word in words)
+
+
+def guest_search_query(text, limit=SEARCH_LIMIT):
+    """ (SQL, parameters) behind search_guests(), or (None, []) when there is nothing to search for.
+
+    Prefix matches are ranked within the RANK_WINDOW most recently added ones. Only when
+    that window is full, guests older than it that match every word exactly are ranked
+    too (at most EXACT_WINDOW, newest first), so an older "Sok Chea" is still found
+    when "sok chea" prefix-matches more than the window. On equal scores the shorter
+    name wins, so "Guest 14" comes before "Guest 1498".
+    """
+    expression = match_expression(text)
+    if expression is None:
+        return None, []
+    weights = ", ".join(map(str, GUEST_WEIGHTS))
+    #   The exact branch starts below the oldest windowed match, so no guest is listed twice
+    return f"""
+        WITH recent AS (
+            SELECT rowid AS guest_id, bm25(GuestSearch, {weights}) AS score
+            FROM GuestSearch
+            WHERE GuestSearch MATCH ?
+            ORDER BY rowid DESC
+            LIMIT ?
+        )
+        SELECT g.id, g.name, g.contact, g.email
+        FROM (
+            SELECT guest_id, score FROM recent
+            UNION ALL
+            SELECT * FROM (
+                SELECT rowid, bm25(GuestSearch, {weights})
+                FROM GuestSearch
+                WHERE GuestSearch MATCH ?
+                AND rowid < (SELECT MIN(guest_id) FROM recent)
+                AND (SELECT COUNT(*) FROM recent) = ?
+                ORDER BY rowid DESC
+                LIMIT ?
+            )
+        ) AS hit
+        JOIN Guests g ON g.id = hit.guest_id
+        ORDER BY hit.score, length(g.name), hit.guest_id DESC
+        LIMIT ?
+    """, [expression, RANK_WINDOW, match_expression(text, prefix=False), RANK_WINDOW, EXACT_WINDOW, limit]
+
+
+def search_guests(conn, text, limit=SEARCH_LIMIT):
+    """ [(id, name, contact, email)] for guests matching `text`, best match first (see guest_search_query) """
+    sql, parameters = guest_search_query(text, limit)
+    if sql is None:
+        return []
+    return conn.execute(sql, parameters).fetchall()
+
+
+def booking_filter(text, alias="b"):
+    """ (SQL condition, parameters) matching bookings whose guest, room or id matches `text`.
+
+    Returns (None, []) when there is nothing to search for. The condition is meant to
+    be ANDed into a query over Bookings aliased as `alias`.
+    """
+    expression = match_expression(text)
+    if expression is None:
+        return None, []
+
+    #   Every matching guest is followed: the IN list comes from the FTS index and each
+    #   guest's bookings from idx_bookings_guest
+    conditions = [
+        f"{alias}.guest_id IN (SELECT rowid FROM GuestSearch WHERE GuestSearch MATCH ?)",
+        f"{alias}.room_id IN (SELECT rowid FROM RoomSearch WHERE RoomSearch MATCH ?)",
+    ]
+    parameters = [expression, expression]
+    if text.strip().isdigit():
+        conditions.append(f"{alias}.id = ?")
+        parameters.append(int(text.strip()))
+    return "(" + " OR ".join(conditions) + ")", parameters
+
+
+def legacy_guest_search(conn, text, limit=SEARCH_LIMIT):
+    """ The leading-wildcard LIKE the pages used before, kept only for the benchmark """
+    pattern = f"%{text}%"
+    return conn.execute("""
+        SELECT id, name, contact, email FROM Guests
+        WHERE name LIKE ? OR contact LIKE ? OR email LIKE ?
+        LIMIT ?
+    """, (pattern, pattern, pattern, limit)).fetchall()
+
+
+FIRST_NAMES = ["Sok", "Dara", "Sophea", "Vanna", "Chan", "Rithy", "Maly", "Bopha", "Kosal", "Nary",
+               "John", "Maria", "Chen", "Anna", "Pierre", "Yuki", "Omar", "Lena", "Ivan", "Sara"]
+LAST_NAMES = ["Chea", "Kim", "Heng", "Lim", "Touch", "Meas", "Prak", "Sok", "Ly", "Nguyen",
+              "Smith", "Garcia", "Wang", "Muller", "Dubois", "Sato", "Haddad", "Novak", "Petrov", "Silva"]
+
+
+def build_benchmark_db(path, guests, rooms=200):
+    """ Throwaway database at the latest schema with `guests` synthetic guests """
+    from util.database import open_connection
+    from util.migrations import migrate
+
+    conn = open_connection(path)
+    migrate(conn)
+    generator = random.Random(7)
+    conn.executemany(
+        "INSERT INTO Rooms (room_number, room_type, capacity, base_price) VALUES (?, 'Double', 2, 30.0)",
+        [(str(100 + number),) for number in range(rooms)],
+    )
+    rows = []
+    for number in range(guests):
+        first, last = generator.choice(FIRST_NAMES), generator.choice(LAST_NAMES)
+        rows.append((
+            f"{first} {last} {number}",
+            f"0{generator.randint(10, 99)}-{generator.randint(100000, 999999)}",
+            f"{first.lower()}.{last.lower()}{number}@mail.com",
+        ))
+    conn.executemany("INSERT INTO Guests (name, contact, email) VALUES (?, ?, ?)", rows)
+    conn.commit()
+    return conn
+
+
+def benchmark(guests, repeat):
+    queries = ["sok", "sok chea", "012", "maria.g", "pierre 4242", "zz"]
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        conn = build_benchmark_db(os.path.join(directory, "search.db"), guests)
+        print(f"  {guests} guests indexed in {time.perf_counter() - start:.1f} s")
+        print(f"  {'query':<14} {'LIKE %..%':>10} {'FTS5':>9} {'hits':>6}")
+        for text in queries:
+            timings = []
+            for search in (legacy_guest_search, search_guests):
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    hits = search(conn, text)
+                timings.append((time.perf_counter() - start) / repeat)
+            print(f"  {text:<14} {timings[0] * 1000:>8.2f}ms {timings[1] * 1000:>7.2f}ms {len(hits):>6}")
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search guests, or benchmark FTS5 against LIKE")
+    parser.add_argument("text", nargs="?", help="Search text")
+    parser.add_argument("--benchmark", action="store_true", help="Time searches on a synthetic database")
+    parser.add_argument("--guests", type=int, default=500000, help="Guests in the benchmark database")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark query")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.guests, args.repeat)
+        return 0
+    if not args.text:
+        parser.error("give search text or --benchmark")
+
+    conn = get_connection()
+    for guest_id, name, contact, email in search_guests(conn, args.text):
+        print(f"  {guest_id:>7}  {name:<30} {contact:<16} {email or ''}")
+    release_connection(conn)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
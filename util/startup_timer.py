@@ -0,0 +1,42 @@
+import importlib
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """ Collects how long start-up steps take, grouped by kind ("import", "build", ...) """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps = []  # (kind, label, seconds)
+        self.reported = False
+
+    @contextmanager
+    def measure(self, kind, label):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((kind, label, time.perf_counter() - start))
+
+    def import_module(self, name):
+        """ Import a module, timing it the first time it is loaded """
+        with self.measure("import", name):
+            return importlib.import_module(name)
+
+    def report(self, title="Startup timing"):
+        """ Print every step and the total per kind ("wait" is time spent on user input) """
+        self.reported = True
+        waiting = sum(seconds for kind, _, seconds in self.steps if kind == "wait")
+        total = time.perf_counter() - self.started - waiting
+        print(f"⏱️ {title}: {total * 1000:.0f} ms since launch, not counting {waiting:.1f} s at the login prompt")
+
+        totals = {}
+        for kind, label, seconds in self.steps:
+            totals[kind] = totals.get(kind, 0.0) + seconds
+            print(f"   {kind:<7} {seconds * 1000:8.1f} ms  {label}")
+        for kind, seconds in totals.items():
+            print(f"   {kind:<7} {seconds * 1000:8.1f} ms  (total)")
+
+
+startup_timer = StartupTimer()
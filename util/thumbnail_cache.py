@@ -0,0 +1,153 @@
+""" Thumbnails for guest and room photos, made once off the GUI thread.
+
+Phone-camera scans are several MB; decoding them with QPixmap(path).scaled(...) on
+every display froze the UI. Thumbnails are now:
+  - generated with Pillow on a small QThreadPool,
+  - stored on disk as <content hash>_<width>x<height>.jpg so every later run reuses them,
+  - kept in memory in an LRU capped by bytes.
+Labels show a placeholder until their thumbnail is ready.
+"""
+import os
+import tempfile
+from collections import OrderedDict
+
+from PIL import Image, ImageOps
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, QThreadPool
+from PyQt6.QtGui import QColor, QImage, QPixmap
+
+from util.image_store import IMAGE_ROOT, content_hash
+from util.worker import Worker
+
+THUMBNAIL_DIR = os.environ.get("HOTEL_THUMBNAIL_DIR", os.path.join(IMAGE_ROOT, ".thumbnails"))
+MEMORY_LIMIT_BYTES = int(float(os.environ.get("HOTEL_THUMBNAIL_CACHE_MB", "64")) * 1024 * 1024)
+MAX_WORKERS = 4
+JPEG_QUALITY = 85
+
+
+def make_thumbnail(path, digest, width, height):
+    """ Runs on a worker thread: return a QImage thumbnail, creating the disk copy if needed """
+    thumbnail_path = os.path.join(THUMBNAIL_DIR, f"{digest}_{width}x{height}.jpg")
+    if not os.path.exists(thumbnail_path):
+        os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+        with Image.open(path) as image:
+            image.draft("RGB", (width * 2, height * 2))  #   Let the JPEG decoder skip detail we throw away
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            image.thumbnail((width, height), Image.Resampling.LANCZOS)
+
+            #   A unique temporary file per call: pool threads may write the same thumbnail at once
+            fd, temporary_path = tempfile.mkstemp(prefix=f"{digest}_", suffix=".tmp", dir=THUMBNAIL_DIR)
+            try:
+                with os.fdopen(fd, "wb") as temporary_file:
+                    image.save(temporary_file, "JPEG", quality=JPEG_QUALITY)
+                os.replace(temporary_path, thumbnail_path)  #   Never leave a half-written thumbnail behind
+            except Exception:
+                os.remove(temporary_path)
+                raise
+    return QImage(thumbnail_path)
+
+
+class ThumbnailCache(QObject):
+    """ Byte-bounded LRU of thumbnail pixmaps backed by the on-disk thumbnail folder """
+
+    def __init__(self, memory_limit=MEMORY_LIMIT_BYTES, parent=None):
+        super().__init__(parent)
+        self.memory_limit = memory_limit
+        self.memory_used = 0
+        self.pixmaps = OrderedDict()  # (path, mtime, width, height) -> QPixmap
+        self.hashes = {}              # (path, mtime, file size) -> content hash
+        self.pending = {}             # key -> [callbacks waiting for it]
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(min(MAX_WORKERS, QThreadPool.globalInstance().maxThreadCount()))
+
+    def request(self, path, width, height, callback):
+        """ Call `callback(pixmap)` with the thumbnail, at once if cached, otherwise when it is ready """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        key = (path, stat.st_mtime_ns, width, height)
+
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(key)
+            callback(pixmap)
+            return
+
+        if key in self.pending:
+            self.pending[key].append(callback)
+            return
+        self.pending[key] = [callback]
+
+        worker = Worker(self.load, key, (path, stat.st_mtime_ns, stat.st_size))
+        worker.signals.result.connect(self.on_loaded)  #   Queued back to the GUI thread
+        self.pool.start(worker)
+
+    def load(self, key, hash_key):
+        """ Runs on a worker thread; returns (key, QImage or None) """
+        path, _, width, height = key
+        try:
+            digest = self.hashes.get(hash_key)
+            if digest is None:
+                digest = self.hashes[hash_key] = content_hash(path)
+            return key, make_thumbnail(path, digest, width, height)
+        except Exception as e:  #   Pillow's decoders raise SyntaxError, ValueError, struct.error... on bad files
+            #   Always answer, or the key would stay pending and the image never be requested again
+            print(f"⚠️ Could not make a thumbnail for {path}: {e}")
+            return key, None
+
+    def on_loaded(self, result):
+        key, image = result
+        callbacks = self.pending.pop(key, [])
+        if image is None or image.isNull():
+            return
+
+        pixmap = QPixmap.fromImage(image)
+        self.store(key, pixmap)
+        for callback in callbacks:
+            callback(pixmap)
+
+    def store(self, key, pixmap):
+        self.pixmaps[key] = pixmap
+        self.memory_used += self.cost(pixmap)
+        while self.memory_used > self.memory_limit and len(self.pixmaps) > 1:
+            _, evicted = self.pixmaps.popitem(last=False)
+            self.memory_used -= self.cost(evicted)
+
+    @staticmethod
+    def cost(pixmap):
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def load_into(self, label, path, width, height):
+        """ Show a placeholder in `label` now and the thumbnail (fitting width x height) as soon as it exists """
+        label.setPixmap(placeholder(min(width, label.width()), min(height, label.height())))
+
+        def show(pixmap):
+            if not sip.isdeleted(label):  #   The carousel may have been cleared meanwhile
+                label.setPixmap(pixmap)
+
+        self.request(path, width, height, show)
+
+
+_placeholders = {}
+
+
+def placeholder(width, height):
+    """ Plain grey box shown while a thumbnail loads """
+    pixmap = _placeholders.get((width, height))
+    if pixmap is None:
+        pixmap = QPixmap(width, height)
+        pixmap.fill(QColor("#dddddd"))
+        _placeholders[(width, height)] = pixmap
+    return pixmap
+
+
+_cache = None
+
+
+def get_thumbnail_cache():
+    """ Shared cache (created on first use, after the QApplication exists) """
+    global _cache
+    if _cache is None:
+        _cache = ThumbnailCache()
+    return _cache
@@ -0,0 +1,40 @@
+import traceback
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+
+class WorkerSignals(QObject):
+    """ Signals a Worker emits back on the GUI thread """
+    result = pyqtSignal(object)
+    progress = pyqtSignal(object)  #   Partial results, emitted by `fn` itself (see Worker)
+    error = pyqtSignal(str)
+    finished = pyqtSignal()
+
+
+class Worker(QRunnable):
+    """ Run `fn(*args, **kwargs)` on a QThreadPool thread and report through `signals`.
+
+    Database work inside `fn` should call get_connection() itself so it uses the
+    pooled connection of the worker thread, never the GUI thread's one.
+
+    To report partial results, hand `fn` the progress signal before starting it:
+        worker.kwargs["on_progress"] = worker.signals.progress.emit
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()